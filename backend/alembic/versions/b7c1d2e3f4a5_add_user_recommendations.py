@@ -0,0 +1,36 @@
+"""Add user_recommendations
+
+Revision ID: b7c1d2e3f4a5
+Revises: f10539bb0408
+Create Date: 2026-10-16 23:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1d2e3f4a5'
+down_revision: Union[str, None] = 'f10539bb0408'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_recommendations',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('inputs', sa.String(), nullable=True),
+        sa.Column('outfits', sa.JSON(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_recommendations')
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
-from typing import Optional
+from typing import Callable, List, Optional
 from pydantic import BaseModel
 
 from backend.models.database import User, UserPreferences, Gender, Occasion, engine
@@ -20,6 +20,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 router = APIRouter()
 
+# Called with a user's id, in the background, after a write that changes what
+# should be recommended to them (preferences, skin tone)
+preference_listeners: List[Callable[[int], None]] = []
+
+def notify_preference_listeners(background_tasks: BackgroundTasks, user_id: int):
+    for listener in preference_listeners:
+        background_tasks.add_task(listener, user_id)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -86,6 +94,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 @router.post("/preferences")
 async def create_user_preferences(
     preferences: UserPreferencesCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -98,6 +107,7 @@ async def create_user_preferences(
     db.add(db_preferences)
     db.commit()
     db.refresh(db_preferences)
+    notify_preference_listeners(background_tasks, current_user.id)
     return {"message": "Preferences created successfully"}
 
 class GoogleAuthRequest(BaseModel):
@@ -173,10 +183,12 @@ class SkinToneRequest(BaseModel):
 @router.post("/skin-tone")
 async def save_skin_tone(
     req: SkinToneRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     current_user.skin_tone = req.skin_tone
     db.commit()
     db.refresh(current_user)
+    notify_preference_listeners(background_tasks, current_user.id)
     return {"message": "Skin tone saved"}
\ No newline at end of file
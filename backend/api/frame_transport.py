@@ -0,0 +1,100 @@
+"""Binary transport of webcam frames.
+
+Clients post the raw encoded frame, either as the request body
+(image/jpeg, image/webp, image/png or application/octet-stream) or as the
+`frame` field of a multipart form, and get a multipart/form-data response
+back: JSON fields plus the result images as binary parts. Browsers parse
+it with `await response.formData()`, so nothing is base64 encoded either
+way. Streamed frames (WebSockets) go through a latest-frame-wins mailbox.
+"""
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from typing import Dict, Optional, Tuple, Union
+import asyncio
+import json
+import mimetypes
+import uuid
+
+# Request body types taken as the raw encoded frame
+FRAME_CONTENT_TYPES = {"image/jpeg", "image/webp", "image/png", "application/octet-stream"}
+
+async def read_frame(request: Request) -> bytes:
+    """The encoded frame posted as the raw body or as the `frame` form field"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("frame")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart requests need a 'frame' file field")
+        data = await upload.read()
+    elif content_type in FRAME_CONTENT_TYPES or not content_type:
+        data = await request.body()
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported frame content type: {content_type}")
+
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty frame data received")
+    return data
+
+class FormDataResponse(Response):
+    """A multipart/form-data response of JSON fields and binary files.
+
+    `fields` values are serialized as JSON, like a JSON response would
+    serialize them; `files` maps names to
+    (bytes, content type). Each file is copied into the body once.
+    """
+
+    def __init__(self,
+                 fields: Dict[str, object],
+                 files: Optional[Dict[str, Tuple[bytes, str]]] = None,
+                 status_code: int = 200):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n'
+                         f'Content-Type: application/json\r\n\r\n'.encode())
+            parts.append(json.dumps(jsonable_encoder(value)).encode())
+            parts.append(b"\r\n")
+        for name, (data, content_type) in (files or {}).items():
+            extension = mimetypes.guess_extension(content_type) or ""
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{name}{extension}"\r\n'
+                         f'Content-Type: {content_type}\r\n\r\n'.encode())
+            parts.append(data)
+            parts.append(b"\r\n")
+        parts.append(f"--{boundary}--\r\n".encode())
+        super().__init__(content=b"".join(parts), status_code=status_code,
+                         media_type=f"multipart/form-data; boundary={boundary}")
+
+class LatestFrame:
+    """A one-frame mailbox between a receiving and a processing task.
+
+    put() replaces a frame that was not taken yet, counting it in
+    `dropped`, so the consumer always gets the newest frame and never
+    works through a backlog. get() returns None once closed and empty.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, frame: Union[bytes, str]):
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[Union[bytes, str]]:
+        while self._frame is None:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
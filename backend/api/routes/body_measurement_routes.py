@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Body
+from fastapi import APIRouter, HTTPException, Depends, status, Body, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -6,14 +6,15 @@ from typing import Optional, List, Dict, Any, Union
 import logging
 import cv2
 import numpy as np
-import base64
 import os
 from datetime import datetime
 import json
-import re
 
 # Import the body measurement class
 from services.ai.measurement import BodyMeasurement
+from services.ai.frame_codec import decode_image, encode_data_url, encode_jpeg
+from services.ai.inference_pool import INFERENCE_WORKERS, InferencePool, InferencePoolFull
+from backend.api.frame_transport import FormDataResponse, read_frame
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +22,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize the body measurement service
-bodyMeasure = BodyMeasurement()
+# Initialize the body measurement service on its worker thread. At most one worker:
+# the service tracks a single pose across frames and keeps the latest measurements
+body_measurers = InferencePool("body-measurement", BodyMeasurement, workers=min(INFERENCE_WORKERS, 1))
 
 # Data models
 class FrameRequest(BaseModel):
@@ -53,87 +55,45 @@ class MeasurementSaveRequest(BaseModel):
     size_categories: Optional[Dict[str, str]] = None
     notes: Optional[str] = None
 
-# Helper function for decoding base64 images
-def decode_base64_image(base64_img):
-    """
-    Decode base64 image to OpenCV format with enhanced error handling
-    """
-    try:
-        # Log the first part of the image string for debugging
-        logger.info(f"Decoding base64 image, first 50 chars: {base64_img[:50]}...")
-        
-        # Check if the string is empty
-        if not base64_img:
-            logger.error("Empty base64 string received")
-            return None
-        
-        # Remove data URL prefix if present
-        if ';base64,' in base64_img:
-            base64_img = base64_img.split(';base64,')[1]
-            logger.info("Removed data URL prefix")
-        elif ',' in base64_img:
-            base64_img = base64_img.split(',')[1]
-            logger.info("Removed partial URL prefix")
-            
-        # Check if the base64 string is valid
-        if not re.match(r'^[A-Za-z0-9+/]+={0,2}$', base64_img):
-            logger.error("Invalid base64 format")
-            return None
-            
-        # Decode base64 string to bytes
-        img_bytes = base64.b64decode(base64_img)
-        logger.info(f"Decoded base64 to {len(img_bytes)} bytes")
-        
-        # Check if we got any bytes
-        if not img_bytes:
-            logger.error("Decoded base64 resulted in empty bytes")
-            return None
-            
-        # Convert bytes to numpy array
-        img_array = np.frombuffer(img_bytes, dtype=np.uint8)
-        logger.info(f"Converted to numpy array of size {img_array.size}")
-        
-        # Check if array is not empty
-        if img_array.size == 0:
-            logger.error("Empty array after fromBuffer")
-            return None
-            
-        # Decode the numpy array as an image
-        img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-        if img is not None:
-            logger.info(f"Successfully decoded image with shape {img.shape}")
-        else:
-            logger.error("Failed to decode image from bytes")
-        
-        return img
-        
-    except Exception as e:
-        logger.error(f"Error decoding base64 image: {str(e)}")
+def measure_image(body_measure, image):
+    """Measurements of a BGR frame, or None while the pose is not stable yet"""
+    logger.info(f"Processing frame with shape: {image.shape}")
+    measurements = body_measure.process_frame(image)
+    
+    # If no measurements were obtained (pose not stable)
+    if measurements is None:
+        logger.info("No stable measurements obtained yet")
         return None
+    
+    # Log the measurement keys
+    logger.info(f"Measurements obtained: {measurements.keys()}")
+    return measurements
 
-# Helper function to encode an image to base64
-def encode_image_to_base64(image):
-    """
-    Encode OpenCV image to base64 string
+def measure_frame(body_measure, frame, encode):
+    """(measurements, encoded visualization) of an encoded or base64 frame.
+
+    None when it is not an image; (None, None) while the pose is not stable yet.
     """
-    try:
-        if image is None:
-            logger.error("Cannot encode None image")
-            return None
-            
-        # Encode image to jpg format
-        success, buffer = cv2.imencode('.jpg', image)
-        if not success:
-            logger.error("Failed to encode image")
-            return None
-            
-        # Convert to base64
-        encoded_image = base64.b64encode(buffer).decode('utf-8')
-        return f"data:image/jpeg;base64,{encoded_image}"
-        
-    except Exception as e:
-        logger.error(f"Error encoding image to base64: {str(e)}")
+    image = decode_image(frame)
+    if image is None:
         return None
+    measurements = measure_image(body_measure, image)
+    if measurements is None:
+        return None, None
+    return measurements, encode(image)
+
+async def run_body_measurement(fn, *args):
+    """fn(body_measure, *args) on the body measurement worker, answering 503 while it is busy"""
+    try:
+        return await body_measurers.run(fn, *args)
+    except InferencePoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def pose_not_stable_response():
+    return JSONResponse(
+        status_code=202,  # Accepted but not complete
+        content={"message": "Pose not stable or detection incomplete"}
+    )
 
 # Routes
 @router.post("/body-measurement/process-body-frame", response_model=MeasurementResponse)
@@ -153,29 +113,16 @@ async def process_frame(request: FrameRequest):
                 detail="Empty or invalid frame data received"
             )
         
-        # Decode the base64 image
-        image = decode_base64_image(request.frame)
-        if image is None:
+        # Decode and process the frame with the body measurement service, and
+        # encode the processed image to base64 for the response
+        result = await run_body_measurement(measure_frame, request.frame, encode_data_url)
+        if result is None:
             logger.error("Could not decode base64 image")
             raise HTTPException(status_code=400, detail="Invalid image data")
         
-        # Process the frame with the body measurement service
-        logger.info(f"Processing frame with shape: {image.shape}")
-        measurements = bodyMeasure.process_frame(image)
-        
-        # If no measurements were obtained (pose not stable)
+        measurements, visualization_image = result
         if measurements is None:
-            logger.info("No stable measurements obtained yet")
-            return JSONResponse(
-                status_code=202,  # Accepted but not complete
-                content={"message": "Pose not stable or detection incomplete"}
-            )
-        
-        # Log the measurement keys
-        logger.info(f"Measurements obtained: {measurements.keys()}")
-        
-        # Encode the processed image to base64 for response
-        visualization_image = encode_image_to_base64(image)
+            return pose_not_stable_response()
         
         # Create response with measurements and visualization
         response_data = {
@@ -185,6 +132,34 @@ async def process_frame(request: FrameRequest):
         
         return response_data
     
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing frame: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/body-measurement/process-body-frame/binary")
+async def process_frame_binary(request: Request):
+    """
+    /body-measurement/process-body-frame for raw JPEG/WebP/PNG frames.
+    Answers multipart/form-data: a `measurements` JSON field and the
+    `visualization_image` JPEG part; 202 with a JSON message while the
+    pose is not stable.
+    """
+    data = await read_frame(request)
+    logger.info(f"Received binary frame of {len(data)} bytes")
+    
+    try:
+        result = await run_body_measurement(measure_frame, data, encode_jpeg)
+        if result is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
+        measurements, visualization_image = result
+        if measurements is None:
+            return pose_not_stable_response()
+        return FormDataResponse({"measurements": measurements},
+                                {"visualization_image": (visualization_image, "image/jpeg")})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing frame: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -196,7 +171,7 @@ async def get_latest_measurements():
     """
     try:
         # Get the latest stored measurements
-        measurements = bodyMeasure.get_latest_measurements()
+        measurements = await run_body_measurement(BodyMeasurement.get_latest_measurements)
         
         if not measurements:
             return JSONResponse(
@@ -206,6 +181,8 @@ async def get_latest_measurements():
             
         return measurements
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting latest measurements: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import pandas as pd
 import random
 import os
 import traceback
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from services.recommendation.catalog_store import CatalogStore
+from services.recommendation.color_harmony import ANALOGOUS_MAP, COMPLEMENTARY_MAP, NEUTRALS
+from services.recommendation.outfit_generator import MAX_OUTFITS_PER_REQUEST, generate_outfits, make_rng
+from services.recommendation.pool_cache import PoolCache, pool_cache_key
+from services.recommendation.skin_tone_palette import skin_tone_palette
 
 # Use APIRouter instead of FastAPI for route modules
 router = APIRouter()
@@ -15,6 +22,8 @@ class RecommendationRequest(BaseModel):
     gender: str
     usage: List[str]
     footwear_preference: str  # Fixed typo from footware to footwear
+    count: int = Field(10, ge=1, le=MAX_OUTFITS_PER_REQUEST)  # Number of outfits to return
+    seed: Optional[int] = None  # Seed for reproducible sampling
 
 class OutfitItem (BaseModel):
     id: int
@@ -38,133 +47,28 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 data_path = os.path.join(BASE_DIR, "data", "fashion-dataset", "styles.csv")
 image_path = os.path.join(BASE_DIR, "data", "fashion-dataset", "images.csv")
 
-# Load data on module initialization
+# Catalog data, image lookup and indexes, swapped as one unit on reload
+catalog_store = CatalogStore(
+    data_path,
+    image_path,
+    delta_dir=os.getenv("CATALOG_DELTA_DIR") or None,
+    publish=os.getenv("CATALOG_PUBLISH_SNAPSHOT", "1") != "0",
+)
+
+# Load data on module initialization, preferring the binary catalog snapshot
 try:
-    data = pd.read_csv(data_path, on_bad_lines="skip")
-    images = pd.read_csv(image_path, on_bad_lines="skip")
-    data = data.dropna(subset=["baseColour", "season", "usage", "productDisplayName"])
-    print(f"[DEBUG] Data loaded: {len(data)} rows, Images loaded: {len(images)} rows")
+    catalog = catalog_store.load()
+    print(f"[DEBUG] Data loaded: {len(catalog.data)} rows, Images loaded: {len(catalog.image_lookup)} rows")
 except Exception as e:
     print(f"[ERROR] Failed to load data: {e}")
-    data = None
-    images = None
-
-# Skin tone to color mapping
-SKIN_TONE_COLOR_MAPPING = {
-    "#373028": ["Navy Blue", "Black", "Charcoal", "Burgundy", "Maroon", "Olive", "Rust", "Gold", "Cream", "Peach"],
-    "#422811": ["Navy Blue", "Brown", "Khaki", "Olive", "Maroon", "Mustard", "Teal", "Tan", "Rust", "Burgundy"],
-    "#513B2E": ["Cream", "Beige", "Olive", "Burgundy", "Red", "Orange", "Mustard", "Bronze", "Teal", "Peach"],
-    "#6F503C": ["Beige", "Brown", "Green", "Khaki", "Cream", "Peach", "Lime Green", "Olive", "Maroon", "Rust", "Mustard"],
-    "#81654F": ["Beige", "Off White", "Sea Green", "Cream", "Lavender", "Mauve", "Burgundy", "Yellow", "Lime Green"],
-    "#9D7A54": ["Olive", "Khaki", "Yellow", "Sea Green", "Turquoise Blue", "White", "Gold", "Peach"],
-    "#BEA07E": ["Sea Green", "Turquoise Blue", "Pink", "Lavender", "Rose", "White", "Peach", "Teal", "Fluorescent Green"],
-    "#E5C8A6": ["Turquoise Blue", "Peach", "Teal", "Pink", "Red", "Rose", "Off White", "White", "Cream", "Gold", "Yellow"],
-    "#E7C1B8": ["Pink", "Rose", "Peach", "White", "Off White", "Beige", "Lavender", "Teal", "Fluorescent Green"],
-    "#F3DAD6": ["White", "Cream", "Peach", "Pink", "Rose", "Lavender", "Mustard", "Lime Green", "Light Blue", "Fluorescent Green"],
-    "#FBF2F3": ["Peach", "Lavender", "Pink", "White", "Off White", "Rose", "Light Blue", "Sea Green", "Fluorescent Green", "Silver", "Cream", "Tan"]
-}
-
-# Color harmony maps
-COMPLEMENTARY_MAP = {
-    "Navy Blue": ["Orange", "Copper"],
-    "Blue": ["Orange", "Gold"],
-    "Silver": ["Black", "Charcoal"],
-    "Black": ["White", "Beige"],
-    "Grey": ["Maroon", "Burgundy"],
-    "Green": ["Red", "Maroon"],
-    "Purple": ["Yellow", "Gold"],
-    "White": ["Black", "Navy Blue"],
-    "Beige": ["Brown", "Burgundy"],
-    "Brown": ["Beige", "Cream"],
-    "Bronze": ["Turquoise Blue", "Teal"],
-    "Teal": ["Orange", "Copper"],
-    "Copper": ["Blue", "Teal"],
-    "Pink": ["Green", "Olive"],
-    "Off White": ["Charcoal", "Navy Blue"],
-    "Maroon": ["Grey", "Teal"],
-    "Red": ["Green", "Teal"],
-    "Khaki": ["Brown", "Olive"],
-    "Orange": ["Blue", "Teal"],
-    "Yellow": ["Purple", "Lavender"],
-    "Charcoal": ["Off White", "Beige"],
-    "Gold": ["Blue", "Navy Blue"],
-    "Steel": ["Rust", "Copper"],
-    "Tan": ["Brown", "Burgundy"],
-    "Multi": ["Depends on context"],
-    "Magenta": ["Lime Green", "Sea Green"],
-    "Lavender": ["Peach", "Pink"],
-    "Sea Green": ["Magenta", "Maroon"],
-    "Cream": ["Burgundy", "Coffee Brown"],
-    "Peach": ["Lavender", "Turquoise Blue"],
-    "Olive": ["Pink", "Beige"],
-    "Skin": ["Nude", "Beige"],
-    "Burgundy": ["Cream", "Olive"],
-    "Coffee Brown": ["Cream", "Beige"],
-    "Grey Melange": ["Rust", "Steel"],
-    "Rust": ["Steel", "Turquoise Blue"],
-    "Rose": ["Olive", "Sea Green"],
-    "Lime Green": ["Magenta", "Lavender"],
-    "Mauve": ["Peach", "Turquoise Blue"],
-    "Turquoise Blue": ["Bronze", "Rust"],
-    "Metallic": ["Depends on shade"],
-    "Mustard": ["Navy Blue", "Teal"],
-    "Taupe": ["Grey", "Charcoal"],
-    "Nude": ["Beige", "Cream"],
-    "Mushroom Brown": ["Beige", "Tan"],
-    "Fluorescent Green": ["Magenta", "Pink"],
-}
+catalog_store.watch(float(os.getenv("CATALOG_WATCH_INTERVAL", "0")))
 
-# Analogous color relationships
-ANALOGOUS_MAP = {
-    "Navy Blue": ["Blue", "Steel", "Charcoal"],
-    "Blue": ["Navy Blue", "Teal", "Turquoise Blue"],
-    "Silver": ["Grey", "White", "Steel"],
-    "Black": ["Charcoal", "Grey", "Steel"],
-    "Grey": ["Silver", "Charcoal", "Steel"],
-    "Green": ["Sea Green", "Olive", "Teal"],
-    "Purple": ["Magenta", "Lavender", "Mauve"],
-    "White": ["Off White", "Cream", "Silver"],
-    "Beige": ["Tan", "Cream", "Nude"],
-    "Brown": ["Burgundy", "Coffee Brown", "Khaki"],
-    "Bronze": ["Copper", "Gold", "Rust"],
-    "Teal": ["Turquoise Blue", "Green", "Sea Green"],
-    "Copper": ["Bronze", "Rust", "Steel"],
-    "Pink": ["Rose", "Lavender", "Mauve"],
-    "Off White": ["Cream", "White", "Beige"],
-    "Maroon": ["Burgundy", "Rust", "Brown"],
-    "Red": ["Maroon", "Rust", "Burgundy"],
-    "Khaki": ["Olive", "Tan", "Brown"],
-    "Orange": ["Mustard", "Rust", "Copper"],
-    "Yellow": ["Mustard", "Gold", "Peach"],
-    "Charcoal": ["Grey", "Black", "Steel"],
-    "Gold": ["Mustard", "Bronze", "Copper"],
-    "Steel": ["Silver", "Charcoal", "Grey"],
-    "Tan": ["Beige", "Cream", "Brown"],
-    "Multi": ["Depends on the dominant colors"],
-    "Magenta": ["Purple", "Lavender", "Mauve"],
-    "Lavender": ["Pink", "Peach", "Mauve"],
-    "Sea Green": ["Teal", "Green", "Turquoise Blue"],
-    "Cream": ["Beige", "Off White", "Nude"],
-    "Peach": ["Orange", "Lavender", "Pink"],
-    "Olive": ["Khaki", "Green", "Brown"],
-    "Skin": ["Nude", "Beige", "Cream"],
-    "Burgundy": ["Maroon", "Brown", "Rust"],
-    "Coffee Brown": ["Brown", "Beige", "Burgundy"],
-    "Grey Melange": ["Grey", "Silver", "Steel"],
-    "Rust": ["Copper", "Orange", "Bronze"],
-    "Rose": ["Pink", "Mauve", "Lavender"],
-    "Lime Green": ["Fluorescent Green", "Yellow", "Sea Green"],
-    "Mauve": ["Lavender", "Pink", "Peach"],
-    "Turquoise Blue": ["Teal", "Sea Green", "Blue"],
-    "Metallic": ["Depends on shade"],
-    "Mustard": ["Gold", "Yellow", "Khaki"],
-    "Taupe": ["Grey", "Charcoal", "Brown"],
-    "Nude": ["Beige", "Skin", "Cream"],
-    "Mushroom Brown": ["Beige", "Tan", "Brown"],
-    "Fluorescent Green": ["Lime Green", "Sea Green", "Teal"],
-}
-
-NEUTRALS = {"Black", "White", "Beige", "Cream", "Off White", "Grey", "Charcoal", "Steel", "Taupe", "Mushroom Brown"}
+# Candidate pools cached per normalized query, so repeated kiosk queries skip filtering
+pool_cache = PoolCache(
+    maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL", "300")),
+)
+catalog_store.on_swap(lambda catalog: pool_cache.clear())
 
 def get_complementary(color, palette):
     """Return a complementary color from the palette."""
@@ -185,96 +89,43 @@ def get_neutral(palette):
 
 def get_image_url(item_id):
     """Get image URL for an item ID"""
-    try:
-        item_image = images[images['filename'] == f"{item_id}.jpg"].iloc[0]
-        return item_image.link
-    except Exception as e:
-        print(f"[DEBUG] Image not found for {item_id}: {e}")
-        return "https://via.placeholder.com/200"
-
-def generate_price():
-    """Generate a random price for demonstration purposes"""
-    return round(random.uniform(19.99, 79.99), 2)
+    return catalog_store.current.image_lookup.get(item_id)
 
 @router.post("/recommend", response_model=RecommendationResponse)
 async def recommend_outfits(request: RecommendationRequest):
+    catalog = catalog_store.current
     try:
-        if data is None or images is None:
-            print(f"[DEBUG] Data or images not loaded. data is None: {data is None}, images is None: {images is None}")
+        if catalog is None:
+            print("[DEBUG] Data or images not loaded")
             raise HTTPException(status_code=500, detail="Data not loaded properly. Check server logs2.")
 
         print(f"[DEBUG] Received request: {request}")
-        recommended_colors = SKIN_TONE_COLOR_MAPPING.get(request.skin_tone_hex, [])
-        if not recommended_colors:
-            recommended_colors = SKIN_TONE_COLOR_MAPPING["#422811"]
+        # Nearest palette in CIELAB, so any hex stone reports gets its own colors
+        recommended_colors = skin_tone_palette.colors_for(request.skin_tone_hex)
         print(f"[DEBUG] Recommended colors: {recommended_colors}")
 
-        filtered_data = data[data['gender'] == request.gender]
-        filtered_data = filtered_data[filtered_data['baseColour'].isin(recommended_colors)]
-        print(f"[DEBUG] Filtered data by gender and color: {len(filtered_data)} rows")
-
-        topwear = filtered_data[filtered_data['subCategory'] == 'Topwear']
-        topwear = topwear[topwear['usage'].isin(request.usage)]
-        print(f"[DEBUG] Topwear count: {len(topwear)}")
-
-        bottomwear = filtered_data[filtered_data['subCategory'] == 'Bottomwear']
-        bottomwear = bottomwear[bottomwear['usage'].isin(request.usage)]
-        print(f"[DEBUG] Bottomwear count: {len(bottomwear)}")
-
-        footwear = filtered_data[filtered_data['masterCategory'] == 'Footwear']
-        if request.footwear_preference and request.footwear_preference != "Any":
-            footwear = footwear[footwear['articleType'] == request.footwear_preference]
-        print(f"[DEBUG] Footwear count: {len(footwear)}")
-
-        if len(topwear) < 1 or len(bottomwear) < 1 or len(footwear) < 1:
-            print(f"[DEBUG] Not enough items: topwear={len(topwear)}, bottomwear={len(bottomwear)}, footwear={len(footwear)}")
+        cache_key = (catalog.version, pool_cache_key(skin_tone_palette.nearest(request.skin_tone_hex), request.gender, request.usage, request.footwear_preference))
+        pools = await pool_cache.get_or_compute_async(
+            cache_key,
+            lambda: catalog.index.outfit_pools(request.gender, recommended_colors, request.usage, request.footwear_preference)
+        )
+        print(f"[DEBUG] Topwear count: {len(pools.topwear)}")
+        print(f"[DEBUG] Bottomwear count: {len(pools.bottomwear)}")
+        print(f"[DEBUG] Footwear count: {len(pools.footwear)}")
+
+        if len(pools.topwear) < 1 or len(pools.bottomwear) < 1 or len(pools.footwear) < 1:
+            print(f"[DEBUG] Not enough items: topwear={len(pools.topwear)}, bottomwear={len(pools.bottomwear)}, footwear={len(pools.footwear)}")
             raise HTTPException(status_code=404, detail="Not enough items found for the specified criteria")
 
-        top_samples = topwear.sample(min(10, len(topwear)))
-        bottom_samples = bottomwear.sample(min(10, len(bottomwear)))
-        foot_samples = footwear.sample(min(10, len(footwear)))
-
-        combinations = []
-        outfit_id = 1
-        for _ in range(10):
-            top = top_samples.sample(1).iloc[0]
-            bottom = bottom_samples.sample(1).iloc[0]
-            foot = foot_samples.sample(1).iloc[0]
-            outfit = Outfit(
-                id=outfit_id,
-                topwear=OutfitItem(
-                    id=int(top.id),
-                    type="Topwear",
-                    display_name=top.productDisplayName,
-                    color=top.baseColour,
-                    image_url=get_image_url(top.id),
-                    price=generate_price()
-                ),
-                bottomwear=OutfitItem(
-                    id=int(bottom.id),
-                    type="Bottomwear",
-                    display_name=bottom.productDisplayName,
-                    color=bottom.baseColour,
-                    image_url=get_image_url(bottom.id),
-                    price=generate_price()
-                ),
-                footwear=OutfitItem(
-                    id=int(foot.id),
-                    type="Footwear",
-                    display_name=foot.productDisplayName,
-                    color=foot.baseColour,
-                    image_url=get_image_url(foot.id),
-                    price=generate_price()
-                )
-            )
-            combinations.append(outfit)
-            outfit_id += 1
+        # Most harmonious unique combinations first, built with a single take
+        rng = make_rng(request.seed)
+        combinations = generate_outfits(catalog.data, catalog.image_lookup, pools, request.count, rng, harmony=catalog.harmony)
         print(f"[DEBUG] Returning {len(combinations)} outfit combinations")
         return RecommendationResponse(outfits=combinations)
     except Exception as e:
         print("[ERROR] Exception in recommend_outfits:")
         traceback.print_exc()
-        if data is None or images is None:
+        if catalog is None:
             raise HTTPException(status_code=500, detail="Data not loaded properly. Check server logs.")
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
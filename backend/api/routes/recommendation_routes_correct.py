@@ -1,23 +1,47 @@
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List
-import pandas as pd
-import random
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+import json
 import os
+import secrets
 import traceback
 import logging
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from services.recommendation.catalog_index import OutfitPools
+from services.recommendation.catalog_store import CatalogStore
+from services.recommendation.complete_the_look import LOOK_SIZE
+from services.recommendation.facet_counts import FACET_FIELDS
+from services.recommendation.outfit_generator import MAX_OUTFITS_PER_REQUEST, build_outfits, generate_outfits, make_rng
+from services.recommendation.pool_cache import PoolCache, pool_cache_key
+from services.recommendation.price_index import price_segments, split_segments, to_cents
+from services.recommendation.recommendation_sessions import MAX_SESSION_OUTFITS, RecommendationSessions, make_cursor
+from services.recommendation.skin_tone_palette import skin_tone_palette
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(message)s')
 
 router = APIRouter()
 
+# How much harmony /recommend trades for variety between the outfits it returns (0 to 1)
+DEFAULT_DIVERSITY = float(os.getenv("OUTFIT_DIVERSITY", "0.3"))
+
 # Models
 class RecommendationRequest(BaseModel):
     skin_tone_hex: str
     gender: str
     usage: List[str]
     footwear_preference: str
+    count: int = Field(3, ge=1, le=MAX_OUTFITS_PER_REQUEST)
+    seed: Optional[int] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    budget: Optional[float] = Field(None, gt=0)
+    diversity: float = Field(DEFAULT_DIVERSITY, ge=0, le=1)
 
 class OutfitItem(BaseModel):
     id: int
@@ -35,140 +59,431 @@ class Outfit(BaseModel):
 
 class RecommendationResponse(BaseModel):
     outfits: List[Outfit]
+    next_cursor: Optional[str] = None
+
+# Upper bound on the requests a single batch call may carry
+MAX_BATCH_SIZE = 500
+
+class BatchRecommendationRequest(BaseModel):
+    requests: List[RecommendationRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchRecommendationResult(BaseModel):
+    index: int
+    outfits: List[Outfit] = []
+    status_code: int = 200
+    error: Optional[str] = None
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchRecommendationResult]
+
+# Upper bounds on the results of one catalog search / similar items call
+MAX_SEARCH_RESULTS = 100
+MAX_SIMILAR_RESULTS = 50
+
+class CatalogItem(BaseModel):
+    id: int
+    display_name: str
+    article_type: str
+    color: str
+    gender: str
+    usage: str
+    image_url: str
+
+class CatalogSearchResult(CatalogItem):
+    score: float
+
+class CatalogSearchResponse(BaseModel):
+    query: str
+    results: List[CatalogSearchResult]
+
+class SimilarItem(CatalogItem):
+    distance: float
+
+class SimilarItemsResponse(BaseModel):
+    item: CatalogItem
+    results: List[SimilarItem]
+
+class LookMatch(CatalogItem):
+    score: float
+
+class CompleteLookResponse(BaseModel):
+    item: CatalogItem
+    bottomwear: List[LookMatch]
+    footwear: List[LookMatch]
+
+class FacetCountsResponse(BaseModel):
+    total: int
+    facets: Dict[str, Dict[str, int]]
 
 # Data loading
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-data_path = os.path.join(BASE_DIR, "styles.csv")
-image_path = os.path.join(BASE_DIR, "images.csv")
+data_path = os.getenv("CATALOG_STYLES_PATH", os.path.join(BASE_DIR, "styles.csv"))
+image_path = os.getenv("CATALOG_IMAGES_PATH", os.path.join(BASE_DIR, "images.csv"))
 
 logging.info(f"Loading styles from: {data_path}")
 logging.info(f"Loading images from: {image_path}")
 logging.info(f"Styles CSV exists: {os.path.exists(data_path)}")
 logging.info(f"Images CSV exists: {os.path.exists(image_path)}")
 
+# Catalog data, image lookup, inverted index and color harmony matrix, swapped
+# as one unit on reload; each request reads catalog_store.current once
+catalog_store = CatalogStore(
+    data_path,
+    image_path,
+    delta_dir=os.getenv("CATALOG_DELTA_DIR") or None,
+    publish=os.getenv("CATALOG_PUBLISH_SNAPSHOT", "1") != "0",
+)
+
 def load_data():
     try:
-        data = pd.read_csv(data_path, on_bad_lines="skip")
-        images = pd.read_csv(image_path, on_bad_lines="skip")
-        data = data.dropna(subset=["baseColour", "season", "usage", "productDisplayName"])
-        logging.debug(f"[DEBUG] Data loaded: {len(data)} rows, Images loaded: {len(images)} rows")
-        return data, images
+        # Prefers the binary catalog snapshot and only parses the CSVs when it is stale
+        catalog = catalog_store.load()
+        logging.debug(f"[DEBUG] Data loaded: {len(catalog.data)} rows, Images loaded: {len(catalog.image_lookup)} rows")
+        return catalog
     except Exception as e:
         logging.error(f"[ERROR] Failed to load data: {e}")
-        return None, None
-
-data, images = load_data()
-
-SKIN_TONE_COLOR_MAPPING = {
-    "#373028": ["Navy Blue", "Black", "Charcoal", "Burgundy", "Maroon", "Olive", "Rust", "Gold", "Cream", "Peach"],
-    "#422811": ["Navy Blue", "Brown", "Khaki", "Olive", "Maroon", "Mustard", "Teal", "Tan", "Rust", "Burgundy"],
-    "#513B2E": ["Cream", "Beige", "Olive", "Burgundy", "Red", "Orange", "Mustard", "Bronze", "Teal", "Peach"],
-    "#6F503C": ["Beige", "Brown", "Green", "Khaki", "Cream", "Peach", "Lime Green", "Olive", "Maroon", "Rust", "Mustard"],
-    "#81654F": ["Beige", "Off White", "Sea Green", "Cream", "Lavender", "Mauve", "Burgundy", "Yellow", "Lime Green"],
-    "#9D7A54": ["Olive", "Khaki", "Yellow", "Sea Green", "Turquoise Blue", "White", "Gold", "Peach"],
-    "#BEA07E": ["Sea Green", "Turquoise Blue", "Pink", "Lavender", "Rose", "White", "Peach", "Teal", "Fluorescent Green"],
-    "#E5C8A6": ["Turquoise Blue", "Peach", "Teal", "Pink", "Red", "Rose", "Off White", "White", "Cream", "Gold", "Yellow"],
-    "#E7C1B8": ["Pink", "Rose", "Peach", "White", "Off White", "Beige", "Lavender", "Teal", "Fluorescent Green"],
-    "#F3DAD6": ["White", "Cream", "Peach", "Pink", "Rose", "Lavender", "Mustard", "Lime Green", "Light Blue", "Fluorescent Green"],
-    "#FBF2F3": ["Peach", "Lavender", "Pink", "White", "Off White", "Rose", "Light Blue", "Sea Green", "Fluorescent Green", "Silver", "Cream", "Tan"]
-}
+        return None
+
+load_data()
+catalog_store.watch(float(os.getenv("CATALOG_WATCH_INTERVAL", "0")))
+
+# Candidate pools cached per normalized query, so repeated kiosk queries skip filtering
+pool_cache = PoolCache(
+    maxsize=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RECOMMENDATION_CACHE_TTL", "300")),
+)
+
+# Pre-ranked outfit lists behind "load more" cursors, bounded and expiring
+recommendation_sessions = RecommendationSessions(
+    maxsize=int(os.getenv("RECOMMENDATION_SESSION_LIMIT", "1000")),
+    ttl_seconds=float(os.getenv("RECOMMENDATION_SESSION_TTL", "900")),
+)
+
+# Pools and sessions hold row positions of one catalog version, so drop them on swap
+catalog_store.on_swap(lambda catalog: pool_cache.clear())
+catalog_store.on_swap(lambda catalog: recommendation_sessions.clear())
 
 def get_image_url(item_id):
-    try:
-        item_image = images[images['filename'] == f"{item_id}.jpg"].iloc[0]
-        return item_image.link
-    except Exception as e:
-        logging.debug(f"[DEBUG] Image not found for {item_id}: {e}")
-        return "https://via.placeholder.com/200"
+    return catalog_store.current.image_lookup.get(item_id)
+
+def current_catalog():
+    catalog = catalog_store.current
+    if catalog is None:
+        logging.error("[DEBUG] Catalog not loaded")
+        raise HTTPException(status_code=500, detail="Data not loaded properly. Check server logs.")
+    return catalog
+
+def split_values(value: Optional[str]) -> List[str]:
+    """Values of a comma-separated query parameter, blanks dropped"""
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+def catalog_items(catalog, rows) -> List[Dict]:
+    """CatalogItem fields of the catalog rows at `rows`, taking each column once"""
+    data = catalog.data
+    ids = data["id"].to_numpy()[rows]
+    columns = {name: data[name].array.take(rows).tolist()
+               for name in ("productDisplayName", "articleType", "baseColour", "gender", "usage")}
+    image_urls = catalog.image_lookup.get_many(ids)
+    return [
+        {
+            "id": int(ids[i]),
+            "display_name": str(columns["productDisplayName"][i]),
+            "article_type": str(columns["articleType"][i]),
+            "color": str(columns["baseColour"][i]),
+            "gender": str(columns["gender"][i]),
+            "usage": str(columns["usage"][i]),
+            "image_url": image_urls[i],
+        }
+        for i in range(len(rows))
+    ]
+
+def pool_query(catalog, skin_tone_hex, gender, usage_list, footwear_preference, min_price=None, max_price=None):
+    """(cache key, compute) of a request's price-sorted candidate pools"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price must not be greater than max_price")
+
+    # Nearest palette in CIELAB, so any hex stone reports gets its own colors
+    recommended_colors = skin_tone_palette.colors_for(skin_tone_hex)
+    logging.debug(f"[DEBUG] Recommended colors: {recommended_colors}")
+
+    # Keyed by catalog version too, so a request finishing on the old catalog cannot poison the new one.
+    # Pools are cached sorted by price, so a price range is a binary search on each of them
+    cache_key = (catalog.version, pool_cache_key(skin_tone_palette.nearest(skin_tone_hex), gender, usage_list, footwear_preference))
+    return cache_key, lambda: price_segments(
+        catalog.index.outfit_pools(gender, recommended_colors, usage_list, footwear_preference),
+        catalog.data["price"].to_numpy())
+
+def select_pools(segments, min_price, max_price):
+    """(pools, prices) of the cached segments within the price range; 404 when a slot is empty"""
+    if min_price is not None or max_price is not None:
+        segments = OutfitPools(*[segment.within(min_price, max_price) for segment in segments])
+    pools, prices = split_segments(segments)
+    logging.debug(f"[DEBUG] Topwear count: {len(pools.topwear)}")
+    logging.debug(f"[DEBUG] Bottomwear count: {len(pools.bottomwear)}")
+    logging.debug(f"[DEBUG] Footwear count: {len(pools.footwear)}")
+
+    if len(pools.topwear) < 1 or len(pools.bottomwear) < 1 or len(pools.footwear) < 1:
+        logging.warning(f"[DEBUG] Not enough items: topwear={len(pools.topwear)}, bottomwear={len(pools.bottomwear)}, footwear={len(pools.footwear)}")
+        raise HTTPException(status_code=404, detail="Not enough items found for the specified criteria")
+    return pools, prices
 
-def generate_price():
-    return round(random.uniform(19.99, 79.99), 2)
+def candidate_pools(catalog, skin_tone_hex, gender, usage_list, footwear_preference, min_price=None, max_price=None):
+    """(pools, prices): candidate row positions per slot, each sorted by price, and their prices in cents.
+
+    Waits for another thread computing the same pools; handlers on the
+    event loop use candidate_pools_async instead.
+    """
+    segments = pool_cache.get_or_compute(
+        *pool_query(catalog, skin_tone_hex, gender, usage_list, footwear_preference, min_price, max_price))
+    return select_pools(segments, min_price, max_price)
+
+async def candidate_pools_async(catalog, skin_tone_hex, gender, usage_list, footwear_preference, min_price=None, max_price=None):
+    """candidate_pools for the event loop: awaits pools another caller is computing without blocking it"""
+    segments = await pool_cache.get_or_compute_async(
+        *pool_query(catalog, skin_tone_hex, gender, usage_list, footwear_preference, min_price, max_price))
+    return select_pools(segments, min_price, max_price)
+
+def budget_cents(budget: Optional[float]) -> Optional[int]:
+    return to_cents(budget) if budget is not None else None
 
 @router.get("/recommend", response_model=RecommendationResponse)
 async def recommend_outfits(
     skin_tone_hex: str = Query(...),
     gender: str = Query(...),
     usage: str = Query(..., description="Comma-separated usage values, e.g. 'casual,formal'"),
-    footwear_preference: str = Query(...)
+    footwear_preference: str = Query(...),
+    count: int = Query(3, ge=1, le=MAX_OUTFITS_PER_REQUEST, description="Number of outfits to return"),
+    seed: Optional[int] = Query(None, description="Seed for reproducible sampling"),
+    paginate: bool = Query(False, description="Return a cursor for loading more outfits via /recommend/more"),
+    min_price: Optional[float] = Query(None, ge=0, description="Lowest price of any item"),
+    max_price: Optional[float] = Query(None, ge=0, description="Highest price of any item"),
+    budget: Optional[float] = Query(None, gt=0, description="Highest total price of an outfit"),
+    diversity: float = Query(DEFAULT_DIVERSITY, ge=0, le=1, description="0 ranks by color harmony only, 1 by variety only")
 ):
+    catalog = catalog_store.current
     try:
-        if data is None or images is None:
-            logging.error(f"[DEBUG] Data or images not loaded. data is None: {data is None}, images is None: {images is None}")
+        if catalog is None:
+            logging.error("[DEBUG] Data or images not loaded")
             raise HTTPException(status_code=500, detail="Data not loaded properly. Check server logs.")
 
         # Convert usage string to list
         usage_list = [u.strip() for u in usage.split(",") if u.strip()]
-        logging.info(f"[DEBUG] Received request: skin_tone_hex={skin_tone_hex}, gender={gender}, usage={usage_list}, footwear_preference={footwear_preference}")
-        recommended_colors = SKIN_TONE_COLOR_MAPPING.get(skin_tone_hex, [])
-        if not recommended_colors:
-            recommended_colors = SKIN_TONE_COLOR_MAPPING["#422811"]
-        logging.debug(f"[DEBUG] Recommended colors: {recommended_colors}")
-
-        filtered_data = data[data['gender'] == gender]
-        filtered_data = filtered_data[filtered_data['baseColour'].isin(recommended_colors)]
-        logging.debug(f"[DEBUG] Filtered data by gender and color: {len(filtered_data)} rows")
-
-        topwear = filtered_data[filtered_data['subCategory'] == 'Topwear']
-        topwear = topwear[topwear['usage'].isin(usage_list)]
-        logging.debug(f"[DEBUG] Topwear count: {len(topwear)}")
-
-        bottomwear = filtered_data[filtered_data['subCategory'] == 'Bottomwear']
-        bottomwear = bottomwear[bottomwear['usage'].isin(usage_list)]
-        logging.debug(f"[DEBUG] Bottomwear count: {len(bottomwear)}")
-
-        footwear = filtered_data[filtered_data['masterCategory'] == 'Footwear']
-        if footwear_preference and footwear_preference != "Any":
-            footwear = footwear[footwear['articleType'] == footwear_preference]
-        logging.debug(f"[DEBUG] Footwear count: {len(footwear)}")
-
-        if len(topwear) < 1 or len(bottomwear) < 1 or len(footwear) < 1:
-            logging.warning(f"[DEBUG] Not enough items: topwear={len(topwear)}, bottomwear={len(bottomwear)}, footwear={len(footwear)}")
-            raise HTTPException(status_code=404, detail="Not enough items found for the specified criteria")
-
-        top_samples = topwear.sample(min(3, len(topwear)))
-        bottom_samples = bottomwear.sample(min(3, len(bottomwear)))
-        foot_samples = footwear.sample(min(3, len(footwear)))
-
-        combinations = []
-        outfit_id = 1
-        for _ in range(3):
-            top = top_samples.sample(1).iloc[0]
-            bottom = bottom_samples.sample(1).iloc[0]
-            foot = foot_samples.sample(1).iloc[0]
-            outfit = Outfit(
-                id=outfit_id,
-                topwear=OutfitItem(
-                    id=int(top.id),
-                    type="Topwear",
-                    display_name=top.productDisplayName,
-                    color=top.baseColour,
-                    image_url=get_image_url(top.id),
-                    price=generate_price()
-                ),
-                bottomwear=OutfitItem(
-                    id=int(bottom.id),
-                    type="Bottomwear",
-                    display_name=bottom.productDisplayName,
-                    color=bottom.baseColour,
-                    image_url=get_image_url(bottom.id),
-                    price=generate_price()
-                ),
-                footwear=OutfitItem(
-                    id=int(foot.id),
-                    type="Footwear",
-                    display_name=foot.productDisplayName,
-                    color=foot.baseColour,
-                    image_url=get_image_url(foot.id),
-                    price=generate_price()
-                )
-            )
-            combinations.append(outfit)
-            outfit_id += 1
+        logging.info(f"[DEBUG] Received request: skin_tone_hex={skin_tone_hex}, gender={gender}, usage={usage_list}, footwear_preference={footwear_preference}, "
+                     f"price={min_price}-{max_price}, budget={budget}")
+        pools, prices = await candidate_pools_async(catalog, skin_tone_hex, gender, usage_list, footwear_preference,
+                                                    min_price, max_price)
+
+        # Most harmonious unique combinations, reranked for variety, built with a single take
+        rng = make_rng(seed)
+        if paginate:
+            # Rank the whole session once; this and every later page is a slice of it
+            triples, _ = catalog.reranker.top_k(pools, max(count, MAX_SESSION_OUTFITS), rng, prices, budget_cents(budget),
+                                                diversity)
+            if len(triples) == 0:
+                raise HTTPException(status_code=404, detail="No outfit fits the budget")
+            session_id = recommendation_sessions.create(triples, catalog.version)
+            combinations = build_outfits(catalog.data, catalog.image_lookup, triples[:count])
+            next_cursor = make_cursor(session_id, len(combinations)) if len(triples) > count else None
+            logging.info(f"[DEBUG] Returning {len(combinations)} of {len(triples)} outfit combinations in session")
+            return RecommendationResponse(outfits=combinations, next_cursor=next_cursor)
+
+        combinations = generate_outfits(catalog.data, catalog.image_lookup, pools, count, rng,
+                                        prices=prices, budget=budget_cents(budget),
+                                        reranker=catalog.reranker, diversity=diversity)
+        if not combinations:
+            raise HTTPException(status_code=404, detail="No outfit fits the budget")
         logging.info(f"[DEBUG] Returning {len(combinations)} outfit combinations")
         return RecommendationResponse(outfits=combinations)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error("[ERROR] Exception in recommend_outfits:")
         traceback.print_exc()
-        if data is None or images is None:
+        if catalog is None:
             raise HTTPException(status_code=500, detail="Data not loaded properly. Check server logs.")
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+
+@router.get("/recommend/more", response_model=RecommendationResponse)
+async def recommend_more_outfits(
+    cursor: str = Query(..., description="next_cursor from the previous page"),
+    count: int = Query(3, ge=1, le=MAX_OUTFITS_PER_REQUEST, description="Number of outfits to return")
+):
+    """Next page of a paginated recommendation; never repeats an outfit of the same session"""
+    catalog = current_catalog()
+    try:
+        triples, offset, next_cursor = recommendation_sessions.page(cursor, count, catalog.version)
+    except KeyError:
+        raise HTTPException(status_code=410, detail="Recommendation session expired, request /recommend again")
+
+    combinations = build_outfits(catalog.data, catalog.image_lookup, triples, first_id=offset + 1)
+    logging.info(f"[DEBUG] Returning {len(combinations)} outfit combinations from offset {offset}")
+    return RecommendationResponse(outfits=combinations, next_cursor=next_cursor)
+
+@router.get("/recommend/cache-stats")
+async def recommendation_cache_stats():
+    """Hit/miss/eviction counters of the candidate pool cache and the paging session store"""
+    return {**pool_cache.stats(), "sessions": recommendation_sessions.stats()}
+
+def iter_batch_results(catalog, requests: List[RecommendationRequest]) -> Iterator[Dict]:
+    """Yield one result per request, grouped so each distinct candidate pool is computed once"""
+    groups: Dict[tuple, List[int]] = {}
+    for index, req in enumerate(requests):
+        key = pool_cache_key(skin_tone_palette.nearest(req.skin_tone_hex), req.gender, req.usage, req.footwear_preference)
+        groups.setdefault((key, req.min_price, req.max_price), []).append(index)
+    logging.info(f"[DEBUG] Batch of {len(requests)} requests shares {len(groups)} candidate pools")
+
+    for indices in groups.values():
+        first = requests[indices[0]]
+        try:
+            pools, prices = candidate_pools(catalog, first.skin_tone_hex, first.gender, first.usage, first.footwear_preference,
+                                            first.min_price, first.max_price)
+        except HTTPException as e:
+            for index in indices:
+                yield {"index": index, "outfits": [], "status_code": e.status_code, "error": e.detail}
+            continue
+
+        for index in indices:
+            req = requests[index]
+            try:
+                outfits = generate_outfits(catalog.data, catalog.image_lookup, pools, req.count, make_rng(req.seed),
+                                           prices=prices, budget=budget_cents(req.budget),
+                                           reranker=catalog.reranker, diversity=req.diversity)
+                if not outfits:
+                    yield {"index": index, "outfits": [], "status_code": 404, "error": "No outfit fits the budget"}
+                    continue
+                yield {"index": index, "outfits": outfits, "status_code": 200, "error": None}
+            except Exception as e:
+                logging.error(f"[ERROR] Batch item {index} failed: {e}")
+                yield {"index": index, "outfits": [], "status_code": 500, "error": f"Error generating recommendations: {str(e)}"}
+
+@router.post("/recommend/batch", response_model=BatchRecommendationResponse)
+async def recommend_outfits_batch(
+    batch: BatchRecommendationRequest,
+    stream: bool = Query(False, description="Stream results as NDJSON lines in completion order")
+):
+    """Recommendations for many customers in one call; results keep the request order unless streamed"""
+    catalog = current_catalog()
+
+    if stream:
+        lines = (json.dumps(result) + "\n" for result in iter_batch_results(catalog, batch.requests))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    # Ranking a large batch takes seconds; run it in the threadpool like the stream, off the event loop
+    results = await run_in_threadpool(
+        lambda: sorted(iter_batch_results(catalog, batch.requests), key=lambda result: result["index"]))
+    return BatchRecommendationResponse(results=results)
+
+@router.get("/catalog/search", response_model=CatalogSearchResponse)
+async def search_catalog(
+    q: str = Query(..., min_length=1, description="Free-text query, e.g. 'blue linen shirt'"),
+    gender: Optional[str] = Query(None),
+    usage: Optional[str] = Query(None, description="Comma-separated usage values, e.g. 'Casual,Formal'"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS, description="Number of results to return")
+):
+    """Best BM25 matches for `q` in product names, article types and colors"""
+    catalog = current_catalog()
+    usage_list = split_values(usage)
+
+    def keep(rows):
+        # Filters are checked on the ranked candidates only, never on the whole catalog
+        mask = np.ones(len(rows), dtype=bool)
+        if gender:
+            mask &= catalog.index.matches(rows, "gender", [gender])
+        if usage_list:
+            mask &= catalog.index.matches(rows, "usage", usage_list)
+        return mask
+
+    rows, scores = catalog.search.search(q, limit, keep if gender or usage_list else None)
+    results = [CatalogSearchResult(**item, score=round(float(score), 4))
+               for item, score in zip(catalog_items(catalog, rows), scores)]
+    logging.info(f"[DEBUG] Catalog search '{q}' returned {len(results)} results")
+    return CatalogSearchResponse(query=q, results=results)
+
+@router.get("/catalog/facets", response_model=FacetCountsResponse)
+async def catalog_facets(
+    gender: Optional[str] = Query(None),
+    usage: Optional[str] = Query(None, description="Comma-separated usage values, e.g. 'Casual,Formal'"),
+    baseColour: Optional[str] = Query(None, description="Comma-separated colors"),
+    articleType: Optional[str] = Query(None, description="Comma-separated article types"),
+    subCategory: Optional[str] = Query(None, description="Comma-separated subcategories"),
+    masterCategory: Optional[str] = Query(None, description="Comma-separated master categories")
+):
+    """Items matching a partial filter, and how many each baseColour, usage, articleType and subCategory option would match"""
+    catalog = current_catalog()
+    filters = {
+        "gender": split_values(gender),
+        "usage": split_values(usage),
+        "baseColour": split_values(baseColour),
+        "articleType": split_values(articleType),
+        "subCategory": split_values(subCategory),
+        "masterCategory": split_values(masterCategory),
+    }
+    total, facets = catalog.facets.counts(filters, FACET_FIELDS)
+    logging.info(f"[DEBUG] Facet counts for {filters}: {total} matching items")
+    return FacetCountsResponse(total=total, facets=facets)
+
+@router.get("/catalog/{item_id}/similar", response_model=SimilarItemsResponse)
+async def similar_items(
+    item_id: int,
+    limit: int = Query(10, ge=1, le=MAX_SIMILAR_RESULTS, description="Number of similar items to return")
+):
+    """Closest substitutes for an item: same article type family, gender and usage, nearby color"""
+    catalog = current_catalog()
+    position = int(catalog.index.positions_of([item_id])[0])
+    if position < 0:
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
+
+    rows, distances = catalog.similar.similar(position, limit)
+    item, = catalog_items(catalog, [position])
+    results = [SimilarItem(**result, distance=round(float(distance), 4))
+               for result, distance in zip(catalog_items(catalog, rows), distances)]
+    logging.info(f"[DEBUG] Returning {len(results)} items similar to {item_id}")
+    return SimilarItemsResponse(item=item, results=results)
+
+@router.get("/catalog/{item_id}/complete-look", response_model=CompleteLookResponse)
+async def complete_the_look(
+    item_id: int,
+    limit: int = Query(10, ge=1, le=LOOK_SIZE, description="Matches to return per slot")
+):
+    """Precomputed bottomwear and footwear that go with a topwear item, best color harmony first"""
+    catalog = current_catalog()
+    position = int(catalog.index.positions_of([item_id])[0])
+    if position < 0:
+        raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
+    data = catalog.data
+    if data["subCategory"].array[position] != "Topwear":
+        raise HTTPException(status_code=400, detail=f"Item {item_id} is not a topwear item")
+
+    # Missing colors are stored under ""
+    look = [data[name].array[position] for name in ("gender", "usage", "baseColour")]
+    look = [value if isinstance(value, str) else "" for value in look]
+    slots = {}
+    for slot in ("bottomwear", "footwear"):
+        ids, scores = catalog.looks.matches(*look, slot)
+        rows = catalog.index.positions_of(ids[:limit])
+        slots[slot] = [LookMatch(**match, score=float(score)) for match, score in zip(catalog_items(catalog, rows), scores)]
+
+    item, = catalog_items(catalog, [position])
+    logging.info(f"[DEBUG] Returning look for {item_id}: {len(slots['bottomwear'])} bottomwear, {len(slots['footwear'])} footwear")
+    return CompleteLookResponse(item=item, **slots)
+
+@router.get("/catalog/status")
+async def catalog_status():
+    """Live catalog version, size and the state of the last reload"""
+    return catalog_store.stats()
+
+@router.post("/catalog/reload", status_code=202)
+async def reload_catalog(
+    full: bool = Query(True, description="Rebuild from the base files; false applies only new delta files"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Rebuild the catalog in the background and swap it in when ready"""
+    admin_token = os.getenv("CATALOG_ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Catalog reload is disabled, set CATALOG_ADMIN_TOKEN")
+    # Constant-time, so response timing does not reveal how much of a guess matched
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    started = catalog_store.reload(full=full)
+    return {"started": started, "version": catalog_store.version}
@@ -1,11 +1,15 @@
 # backend/api/routes/segmentation.py
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import base64
+from typing import Literal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import cv2
+import logging
 import numpy as np
 import os
+import time
 import tempfile
 from datetime import datetime
 import sys
@@ -15,13 +19,15 @@ import uuid
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from services.ai.segmentation_services import (
     FaceLandmarker, FaceLandmarkerOptions, BaseOptions, VisionRunningMode,
-    get_triangulation, get_facial_features, draw_mesh,
-    create_face_mask
+    draw_mesh, create_face_mask, landmark_array, landmark_bounding_box
 )
+from services.ai.frame_codec import decode_image, encode_data_url, encode_jpeg
+from services.ai.inference_pool import INFERENCE_WORKERS, InferencePool, InferencePoolFull
+from backend.api.frame_transport import FormDataResponse, LatestFrame, read_frame
 
 router = APIRouter()
 
-# Initialize face landmarker once when the module is loaded
+# Initialize the face landmarkers once when the module is loaded
 model_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 
                          "models", "face_landmarker.task")
 
@@ -35,7 +41,36 @@ options = FaceLandmarkerOptions(
     output_face_blendshapes=True,
     output_facial_transformation_matrixes=True)
 
-face_landmarker = FaceLandmarker.create_from_options(options)
+# One landmarker per worker thread, so frames are processed off the event loop and in parallel
+face_landmarkers = InferencePool("face-landmarker", lambda: FaceLandmarker.create_from_options(options))
+
+# /ws/face-mesh gives every connection its own landmarker in VIDEO mode, which
+# tracks the face from frame to frame instead of detecting it from scratch
+stream_options = FaceLandmarkerOptions(
+    base_options=BaseOptions(model_asset_path=model_path),
+    running_mode=VisionRunningMode.VIDEO,
+    num_faces=1,
+    min_face_detection_confidence=0.5,
+    min_face_presence_confidence=0.5,
+    min_tracking_confidence=0.5)
+
+# Weight of the newest frame interval in the streamed FPS estimate
+FPS_SMOOTHING = 0.2
+
+# Concurrent /ws/face-mesh streams, each holding a landmarker and a thread;
+# further connections are closed with 1013 (try again later) and the client
+# falls back to posting frames through the pool
+MAX_FACE_MESH_STREAMS = int(os.getenv("MAX_FACE_MESH_STREAMS", str(max(INFERENCE_WORKERS, 1))))
+
+# WebSockets of the open face mesh streams
+active_streams = set()
+
+# Decimals of the landmark coordinates in JSON responses (a ten-thousandth of the frame)
+LANDMARK_DECIMALS = 4
+
+# What /process-frame returns: the rendered images (the default), only the
+# landmarks and face box, which clients can draw themselves, or both
+FrameMode = Literal["images", "landmarks", "all"]
 
 # Models
 class FrameRequest(BaseModel):
@@ -47,82 +82,241 @@ class SaveFaceResponse(BaseModel):
 class AnalyzeSkinToneRequest(BaseModel):
     imagePath: str
 
-# Helper function to decode base64 image
-def decode_base64_image(base64_img):
-    # Remove data URL prefix if present
-    if ',' in base64_img:
-        base64_img = base64_img.split(',')[1]
+def detect_face(landmarker, image, timestamp_ms=None):
+    """(n, 3) normalized landmarks of the face in a BGR frame, or None without a face.
+
+    `landmarker` is an IMAGE-mode one, or a VIDEO-mode one given the
+    frame's timestamp.
+    """
+    # Convert to RGB (MediaPipe requires RGB)
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
-    # Decode base64 string to bytes
-    img_bytes = base64.b64decode(base64_img)
+    # Create MediaPipe Image
+    import mediapipe as mp
+    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
     
-    # Convert bytes to numpy array
-    img_array = np.frombuffer(img_bytes, dtype=np.uint8)
+    # Process the image
+    if timestamp_ms is None:
+        detection_result = landmarker.detect(mp_image)
+    else:
+        detection_result = landmarker.detect_for_video(mp_image, timestamp_ms)
     
-    # Decode the numpy array as an image
-    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    # Check if a face was detected
+    if not detection_result.face_landmarks:
+        return None
+    return landmark_array(detection_result.face_landmarks[0])  # First face
+
+def render_face_images(image, face_landmarks):
+    """(mesh visualization, segmented face) of a BGR frame and its face landmarks"""
+    # Draw mesh visualization with the precompiled triangulation and facial features
+    mesh_visualization = draw_mesh(image, face_landmarks)
     
-    return img
+    # Create face mask and segmented face
+    face_mask = create_face_mask(image, face_landmarks)
+    segmented_face = cv2.bitwise_and(image, image, mask=face_mask)
+    return mesh_visualization, segmented_face
+
+def process_face_image(landmarker, image, timestamp_ms=None):
+    """(hasFace, mesh visualization, segmented face) of a BGR frame; the images are None without a face"""
+    face_landmarks = detect_face(landmarker, image, timestamp_ms)
+    if face_landmarks is None:
+        return False, None, None
+    return (True, *render_face_images(image, face_landmarks))
 
-# Helper function to encode image to base64
-def encode_image_to_base64(image):
-    # Convert numpy array to jpg
-    _, buffer = cv2.imencode('.jpg', image)
+async def run_face_landmarker(fn, *args):
+    """fn(landmarker, *args) on a face landmarker worker, answering 503 while they are all busy"""
+    try:
+        return await face_landmarkers.run(fn, *args)
+    except InferencePoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+def face_frame_response(landmarker, frame, mode):
+    """The /process-frame response for a base64 frame, or None when it is not an image"""
+    # Decode the base64 image
+    image = decode_image(frame)
+    if image is None:
+        return None
+    
+    face_landmarks = detect_face(landmarker, image)
+    has_face = face_landmarks is not None
+    
+    # Initialize response object
+    response = {
+        "hasFace": has_face,
+        "fps": 30 if has_face else 0  # Placeholder FPS (could be calculated on the frontend)
+    }
     
-    # Convert to base64 and then to string
-    base64_img = base64.b64encode(buffer).decode('utf-8')
+    if mode != "images":
+        response["landmarks"] = []
+        response["boundingBox"] = None
+        if has_face:
+            # Rounded in float64, so the JSON numbers stay short
+            response["landmarks"] = np.round(face_landmarks.astype(np.float64), LANDMARK_DECIMALS).ravel().tolist()
+            response["boundingBox"] = landmark_bounding_box(face_landmarks)
     
-    # Add data URL prefix
-    return f"data:image/jpeg;base64,{base64_img}"
+    if mode != "landmarks":
+        response["meshVisualization"] = ""
+        response["segmentedFace"] = ""
+        if has_face:
+            # Encode results as base64
+            mesh_visualization, segmented_face = render_face_images(image, face_landmarks)
+            response["meshVisualization"] = encode_data_url(mesh_visualization)
+            response["segmentedFace"] = encode_data_url(segmented_face)
+    return response
+
+def face_frame_parts(landmarker, data, mode, dtype):
+    """(result field, files) of the /process-frame/binary response for an encoded frame, or None when it is not an image"""
+    image = decode_image(data)
+    if image is None:
+        return None
+    face_landmarks = detect_face(landmarker, image)
+    has_face = face_landmarks is not None
+    result = {"hasFace": has_face, "fps": 30 if has_face else 0}
+    files = {}
+    if has_face and mode != "images":
+        result["boundingBox"] = landmark_bounding_box(face_landmarks)
+        files["landmarks"] = (face_landmarks.astype("<f2" if dtype == "float16" else "<f4").tobytes(),
+                              "application/octet-stream")
+    if has_face and mode != "landmarks":
+        mesh_visualization, segmented_face = render_face_images(image, face_landmarks)
+        files["meshVisualization"] = (encode_jpeg(mesh_visualization), "image/jpeg")
+        files["segmentedFace"] = (encode_jpeg(segmented_face), "image/jpeg")
+    return result, files
 
 @router.post("/process-frame")
-async def process_frame(request: FrameRequest):
+async def process_frame(request: FrameRequest, mode: FrameMode = Query("images")):
+    """Face mesh of a base64 frame.
+
+    mode=landmarks skips rendering and encoding the images and returns
+    `landmarks`, the flat [x, y, z, ...] normalized coordinates of the 478
+    landmarks, and the normalized `boundingBox` of the face instead;
+    mode=all returns both.
+    """
     try:
-        # Decode the base64 image
-        image = decode_base64_image(request.frame)
-        
-        # Convert to RGB (MediaPipe requires RGB)
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        
-        # Create MediaPipe Image
-        import mediapipe as mp
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
-        
-        # Process the image
-        detection_result = face_landmarker.detect(mp_image)
-        
-        # Initialize response object
-        response = {
-            "meshVisualization": "",
-            "segmentedFace": "",
-            "hasFace": False,
-            "fps": 0  # Placeholder for FPS
-        }
-        
-        # Check if a face was detected
-        if detection_result.face_landmarks:
-            response["hasFace"] = True
-            
-            # Get triangulation and facial features
-            triangulation = get_triangulation()
-            facial_features = get_facial_features()
-            
-            # Draw mesh visualization
-            face_landmarks = detection_result.face_landmarks[0]  # First face
-            mesh_visualization = draw_mesh(image.copy(), face_landmarks, triangulation, facial_features)
-            
-            # Create face mask and segmented face
-            face_mask = create_face_mask(image, face_landmarks)
-            segmented_face = cv2.bitwise_and(image, image, mask=face_mask)
-            
-            # Encode results as base64
-            response["meshVisualization"] = encode_image_to_base64(mesh_visualization)
-            response["segmentedFace"] = encode_image_to_base64(segmented_face)
-            
-            # Placeholder FPS (could be calculated on the frontend)
-            response["fps"] = 30
-        
+        response = await run_face_landmarker(face_frame_response, request.frame, mode)
+        if response is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
         return JSONResponse(content=response)
     
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/process-frame/binary")
+async def process_frame_binary(request: Request,
+                               mode: FrameMode = Query("images"),
+                               dtype: Literal["float32", "float16"] = Query("float32")):
+    """/process-frame for raw JPEG/WebP/PNG frames, answered as multipart/form-data.
+
+    The `result` field holds hasFace and fps; `meshVisualization` and
+    `segmentedFace` are JPEG parts, present only when a face was found.
+    With mode=landmarks or mode=all, `result` also holds the face's
+    `boundingBox` and the `landmarks` part packs the (478, 3) normalized
+    coordinates as little-endian `dtype` values, row by row.
+    """
+    data = await read_frame(request)
+    try:
+        parts = await run_face_landmarker(face_frame_parts, data, mode, dtype)
+        if parts is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
+        result, files = parts
+        return FormDataResponse({"result": result}, files)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def process_stream_frame(landmarker, data, timestamp_ms):
+    """Decode and process one streamed frame; (hasFace, {name: JPEG bytes}) or None when it is not an image"""
+    image = decode_image(data)
+    if image is None:
+        return None
+    has_face, mesh_visualization, segmented_face = process_face_image(landmarker, image, timestamp_ms)
+    if not has_face:
+        return False, {}
+    return True, {
+        "meshVisualization": encode_jpeg(mesh_visualization),
+        "segmentedFace": encode_jpeg(segmented_face),
+    }
+
+@router.websocket("/ws/face-mesh")
+async def face_mesh_stream(websocket: WebSocket):
+    """Stream webcam frames in, face mesh results out.
+
+    The client sends encoded frames as binary messages (or base64 data URLs
+    as text). Every result is pushed as it is produced: a JSON text message
+    {"type": "result", "hasFace", "fps", "droppedFrames", "images"}
+    followed by one binary JPEG message per name in "images". Frames that
+    arrive while one is being processed replace each other, so only the
+    newest is processed and a slow server never falls behind the camera.
+    At most MAX_FACE_MESH_STREAMS streams run at once; others are closed
+    with code 1013.
+    """
+    await websocket.accept()
+    if len(active_streams) >= MAX_FACE_MESH_STREAMS:
+        logging.info(f"Face mesh stream refused, {len(active_streams)} streams already open")
+        await websocket.close(code=1013, reason="Too many face mesh streams, try again later")
+        return
+    active_streams.add(websocket)
+
+    # The connection's landmarker lives on its own thread: created, used and closed there in order
+    loop = asyncio.get_running_loop()
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-mesh-stream")
+    landmarker, receiver = None, None
+    latest = LatestFrame()
+
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("bytes") or message.get("text")
+                if data:
+                    latest.put(data)
+        finally:
+            latest.close()
+
+    timestamp_ms, fps, last_sent = 0, 0.0, None
+    try:
+        try:
+            landmarker = await loop.run_in_executor(worker, FaceLandmarker.create_from_options, stream_options)
+        except Exception as e:
+            logging.error(f"Could not create the face mesh stream's landmarker: {e}")
+            await websocket.close(code=1011, reason="Face landmarker unavailable")
+            return
+        receiver = asyncio.create_task(receive_frames())
+        while True:
+            data = await latest.get()
+            if data is None:
+                break
+            # VIDEO mode needs strictly increasing timestamps
+            timestamp_ms = max(timestamp_ms + 1, int(time.monotonic() * 1000))
+            result = await loop.run_in_executor(worker, process_stream_frame, landmarker, data, timestamp_ms)
+            if result is None:
+                await websocket.send_json({"type": "error", "detail": "Invalid image data"})
+                continue
+
+            now = time.monotonic()
+            if last_sent is not None and now > last_sent:
+                instant = 1 / (now - last_sent)
+                fps = instant if fps == 0 else fps + FPS_SMOOTHING * (instant - fps)
+            last_sent = now
+            has_face, images = result
+            await websocket.send_json({"type": "result", "hasFace": has_face, "fps": round(fps, 1),
+                                       "droppedFrames": latest.dropped, "images": list(images)})
+            for image in images.values():
+                await websocket.send_bytes(image)
+    except (WebSocketDisconnect, RuntimeError):
+        # The client went away while a result was being sent
+        pass
+    finally:
+        active_streams.discard(websocket)
+        if receiver is not None:
+            receiver.cancel()
+        if landmarker is not None:
+            worker.submit(landmarker.close)
+        worker.shutdown(wait=False)
+        logging.info(f"Face mesh stream closed, {latest.dropped} stale frames dropped")
+
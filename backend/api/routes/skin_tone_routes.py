@@ -5,6 +5,7 @@ import logging
 import tempfile
 import os
 from services.ai.skin_tone_analyzer import SkinToneAnalyzer
+from services.ai.inference_pool import InferencePool, InferencePoolFull
 
 # Configure logging 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,8 +13,8 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize skin tone analyzer
-analyzer = SkinToneAnalyzer()
+# Initialize one skin tone analyzer per worker thread, so analyses run off the event loop
+analyzers = InferencePool("skin-tone", SkinToneAnalyzer)
 
 @router.post("/analyze-skin-tone")
 async def analyze_skin_tone (
@@ -27,7 +28,10 @@ async def analyze_skin_tone (
         image_data = await image_file.read()
 
         # Process the image 
-        result = analyzer.analyze_uploaded_image (image_data)
+        try:
+            result = await analyzers.run(SkinToneAnalyzer.analyze_uploaded_image, image_data)
+        except InferencePoolFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
 
         if "error" in result:
             logger.error (f"Error in skin tone analysis: {result['error']}")
@@ -38,6 +42,8 @@ async def analyze_skin_tone (
         
         return result 
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error (f"Error processing uploaded image: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing uploaded image: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,139 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import json
+import os
+import logging
+
+from backend.api.auth import SessionLocal, get_current_user, get_db, preference_listeners
+from backend.models.database import Gender, User, UserPreferences, UserRecommendation
+from backend.api.routes.recommendation_routes_correct import (
+    DEFAULT_DIVERSITY, RecommendationResponse, candidate_pools, candidate_pools_async, catalog_store, current_catalog,
+    recommendation_sessions,
+)
+from services.recommendation.catalog_index import OutfitPools
+from services.recommendation.outfit_generator import MAX_OUTFITS_PER_REQUEST, build_outfits, make_rng
+from services.recommendation.recommendation_sessions import MAX_SESSION_OUTFITS, make_cursor
+
+router = APIRouter()
+
+# Outfits stored per user, enough to page through like a /recommend session
+MATERIALIZED_OUTFITS = MAX_SESSION_OUTFITS
+
+# Stored outfits older than this are ranked again on read
+MAX_AGE = timedelta(seconds=float(os.getenv("USER_RECOMMENDATIONS_MAX_AGE", "86400")))
+
+def latest_preferences(db: Session, user_id: int) -> Optional[UserPreferences]:
+    return db.query(UserPreferences).filter(UserPreferences.user_id == user_id).order_by(UserPreferences.id.desc()).first()
+
+def recommendation_inputs(user: User, preferences: Optional[UserPreferences]) -> Optional[Dict]:
+    """/recommend parameters for a user's skin tone and latest preferences, built like the frontend does"""
+    if preferences is None or not user.skin_tone:
+        return None
+    return {
+        "skin_tone_hex": user.skin_tone,
+        "gender": "Men" if preferences.gender == Gender.MALE else "Women",
+        "usage": [preferences.occasion.value.replace("_", " ").title()] if preferences.occasion else [],
+        "footwear_preference": preferences.footwear.value if preferences.footwear else "",
+    }
+
+def inputs_key(inputs: Dict) -> str:
+    return json.dumps(inputs, sort_keys=True)
+
+def pool_arguments(inputs: Dict) -> Tuple:
+    """candidate_pools arguments for the user's inputs"""
+    return inputs["skin_tone_hex"], inputs["gender"], inputs["usage"], inputs["footwear_preference"]
+
+def rank_outfits(catalog, pools: OutfitPools) -> np.ndarray:
+    """Row positions of the user's best outfits from their candidate pools, shape (n, 3)"""
+    triples, _ = catalog.reranker.top_k(pools, MATERIALIZED_OUTFITS, make_rng(), diversity=DEFAULT_DIVERSITY)
+    return triples
+
+def store_recommendations(user_id: int, inputs: Dict, outfit_ids: List[List[int]]):
+    db = SessionLocal()
+    try:
+        db.merge(UserRecommendation(user_id=user_id, inputs=inputs_key(inputs), outfits=outfit_ids,
+                                    computed_at=datetime.utcnow()))
+        db.commit()
+    finally:
+        db.close()
+
+def materialize_recommendations(user_id: int):
+    """Rank and store a user's outfits; runs in the background after their preferences or skin tone change"""
+    catalog = catalog_store.current
+    if catalog is None:
+        return
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        inputs = recommendation_inputs(user, latest_preferences(db, user_id)) if user is not None else None
+    finally:
+        db.close()
+    if inputs is None:
+        return
+
+    try:
+        pools, _ = candidate_pools(catalog, *pool_arguments(inputs))
+        triples = rank_outfits(catalog, pools)
+    except HTTPException:
+        # Nothing matches; stored as such so reads do not rank again
+        triples = np.empty((0, 3), dtype=np.int64)
+    try:
+        store_recommendations(user_id, inputs, catalog.data["id"].to_numpy()[triples].tolist())
+        logging.info(f"[DEBUG] Materialized {len(triples)} outfits for user {user_id}")
+    except Exception as e:
+        logging.error(f"[ERROR] Could not store recommendations for user {user_id}: {e}")
+
+preference_listeners.append(materialize_recommendations)
+
+def stored_triples(catalog, stored: Optional[UserRecommendation], inputs: Dict) -> Optional[np.ndarray]:
+    """Row positions of the stored outfits, or None when they are stale.
+
+    Stale means ranked for other inputs (e.g. the background job has not
+    caught up with a change yet), older than MAX_AGE, or holding an item the
+    catalog no longer has.
+    """
+    if stored is None or stored.inputs != inputs_key(inputs) or stored.computed_at is None:
+        return None
+    if datetime.utcnow() - stored.computed_at > MAX_AGE:
+        return None
+    ids = np.asarray(stored.outfits, dtype=np.int64).reshape(-1, 3)
+    positions = catalog.index.positions_of(ids.ravel())
+    if (positions < 0).any():
+        return None
+    return positions.reshape(-1, 3)
+
+@router.get("/recommend/me", response_model=RecommendationResponse)
+async def my_recommendations(
+    background_tasks: BackgroundTasks,
+    count: int = Query(3, ge=1, le=MAX_OUTFITS_PER_REQUEST, description="Number of outfits to return"),
+    paginate: bool = Query(False, description="Return a cursor for loading more outfits via /recommend/more"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The signed-in user's outfits, precomputed when they saved their preferences; ranked live when stale"""
+    catalog = current_catalog()
+    inputs = recommendation_inputs(current_user, latest_preferences(db, current_user.id))
+    if inputs is None:
+        raise HTTPException(status_code=404, detail="Save your preferences and skin tone first")
+
+    # A primary key lookup
+    triples = stored_triples(catalog, db.get(UserRecommendation, current_user.id), inputs)
+    if triples is None:
+        logging.info(f"[DEBUG] Stored recommendations for user {current_user.id} are stale, ranking live")
+        pools, _ = await candidate_pools_async(catalog, *pool_arguments(inputs))
+        triples = rank_outfits(catalog, pools)
+        background_tasks.add_task(store_recommendations, current_user.id, inputs,
+                                  catalog.data["id"].to_numpy()[triples].tolist())
+    if len(triples) == 0:
+        raise HTTPException(status_code=404, detail="Not enough items found for the specified criteria")
+
+    next_cursor = None
+    if paginate and len(triples) > count:
+        session_id = recommendation_sessions.create(triples, catalog.version)
+        next_cursor = make_cursor(session_id, count)
+    combinations = build_outfits(catalog.data, catalog.image_lookup, triples[:count])
+    logging.info(f"[DEBUG] Returning {len(combinations)} outfit combinations for user {current_user.id}")
+    return RecommendationResponse(outfits=combinations, next_cursor=next_cursor)
@@ -0,0 +1,103 @@
+"""Compare catalog cold-start time and memory: CSV parsing vs the binary snapshot.
+
+The "csv_strings" path loads the CSV with plain string columns, as the routes
+did before the catalog columns became categorical, to show what the compact
+representation saves.
+
+Each path runs in a fresh interpreter so the numbers reflect a worker boot.
+Run from the backend directory:
+
+    python -m benchmarks.catalog_startup api/routes/styles.csv api/routes/images.csv
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+# Executed in a child process: load one path and report time / memory as JSON
+CHILD_SCRIPT = r"""
+import sys, json, time, resource
+import numpy as np
+import pandas as pd
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.catalog_snapshot import REQUIRED_COLUMNS, load_snapshot, read_catalog_csv
+from services.recommendation.image_lookup import ImageLookup
+
+def rss_kb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+path, styles, images, snapshot_dir = sys.argv[1:5]
+baseline = rss_kb()
+start = time.perf_counter()
+if path == "csv_strings":
+    data = pd.read_csv(styles, on_bad_lines="skip").dropna(subset=REQUIRED_COLUMNS)
+    frame = pd.read_csv(images, on_bad_lines="skip")
+    lookup = ImageLookup.from_frame(frame)
+    del frame
+elif path == "csv":
+    data, frame = read_catalog_csv(styles, images)
+    lookup = ImageLookup.from_frame(frame)
+    del frame
+else:
+    data, lookup = load_snapshot(snapshot_dir)
+loaded = time.perf_counter()
+index = CatalogIndex(data)
+indexed = time.perf_counter()
+
+print(json.dumps({
+    "path": path,
+    "rows": len(data),
+    "load_s": loaded - start,
+    "load_and_index_s": indexed - start,
+    "rss_delta_mb": (rss_kb() - baseline) / 1024,
+    "frame_mb": data.memory_usage(deep=True).sum() / 2**20,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def run_path(path, styles, images, snapshot_dir):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, path, styles, images, snapshot_dir],
+        cwd=backend_dir, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog startup from CSV vs snapshot")
+    parser.add_argument("styles", help="Path to styles.csv")
+    parser.add_argument("images", help="Path to images.csv")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per path (best run is kept)")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    styles, images = os.path.abspath(args.styles), os.path.abspath(args.images)
+
+    # Imported here so the parent process does not skew its own numbers
+    from services.recommendation.catalog_snapshot import build_snapshot
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_dir = build_snapshot(styles, images, os.path.join(tmp, "catalog_snapshot"))
+
+        results = []
+        for path in ("csv_strings", "csv", "snapshot"):
+            runs = [run_path(path, styles, images, snapshot_dir) for _ in range(args.repeat)]
+            results.append(min(runs, key=lambda r: r["load_and_index_s"]))
+
+    print(f"{'path':<13}{'rows':>10}{'load (s)':>12}{'+index (s)':>12}{'frame (MB)':>12}{'RSS delta (MB)':>16}{'peak RSS (MB)':>15}")
+    for r in results:
+        print(f"{r['path']:<13}{r['rows']:>10}{r['load_s']:>12.3f}{r['load_and_index_s']:>12.3f}{r['frame_mb']:>12.1f}"
+              f"{r['rss_delta_mb']:>16.1f}{r['peak_rss_mb']:>15.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Benchmark concurrent face mesh clients with inference inline vs on the worker pool.
+
+For every worker count a fresh uvicorn server runs the segmentation router
+with INFERENCE_WORKERS set to it; 0 runs the landmarker inline on the event
+loop, as the routes did before the pool. N clients then post the same frame
+to /api/process-frame/binary back to back for a fixed time while a probe
+requests a trivial /ping endpoint, standing in for the auth and
+recommendation calls that share the event loop. Reported per worker count:
+frames/s across all clients, frame latency, 503s (pool queue full) and the
+probe's latency, which is what inline inference blocks.
+
+Run from the backend directory:
+
+    python -m benchmarks.inference_pool --workers 0 1 2 4 --clients 8 --output inference.json
+    python -m benchmarks.inference_pool --image face.jpg --mode images
+"""
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+# Executed in a child process per worker count: the segmentation router plus /ping
+SERVER_SCRIPT = r"""
+import sys, logging
+import uvicorn
+from fastapi import FastAPI
+logging.disable(logging.CRITICAL)
+from backend.api.routes.segmentation_routes import router
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]), log_level="error")
+"""
+
+# Seconds between probe requests
+PROBE_INTERVAL = 0.02
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(connection, method, path, body=None, headers=None):
+    """(status, seconds) of one request on a keep-alive connection"""
+    start = time.perf_counter()
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    response.read()
+    return response.status, time.perf_counter() - start
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            if request(connection, "GET", "/ping")[0] == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def percentiles(seconds):
+    if not seconds:
+        return {}
+    p50, p95, p99 = np.percentile(np.asarray(seconds) * 1000, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": max(seconds) * 1000}
+
+
+def run_load(port, frame, path, clients, duration):
+    stop = threading.Event()
+    frames, busy, errors, probes = [], [], [], []
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while not stop.is_set():
+            status, seconds = request(connection, "POST", path, frame, {"Content-Type": "image/jpeg"})
+            (frames if status == 200 else busy if status == 503 else errors).append(seconds)
+
+    def probe():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while not stop.is_set():
+            probes.append(request(connection, "GET", "/ping")[1])
+            time.sleep(PROBE_INTERVAL)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)] + [threading.Thread(target=probe)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": len(frames),
+        "frames_per_s": len(frames) / elapsed,
+        "busy": len(busy),
+        "errors": len(errors),
+        "frame": percentiles(frames),
+        "probe": percentiles(probes),
+    }
+
+
+def run_workers(workers, frame, path, clients, duration, queue_depth):
+    port = free_port()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "INFERENCE_WORKERS": str(workers), "INFERENCE_QUEUE_DEPTH": str(queue_depth),
+           "PYTHONPATH": os.pathsep.join([os.path.dirname(backend_dir), backend_dir])}
+    server = subprocess.Popen([sys.executable, "-c", SERVER_SCRIPT, str(port)], cwd=backend_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # Warm up every worker's landmarker
+        run_load(port, frame, path, max(workers, 1), 1)
+        return {"workers": workers, **run_load(port, frame, path, clients, duration)}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def test_frame(image_path):
+    """JPEG bytes of the frame to post: the given image, or a synthetic 640x480 one"""
+    if image_path:
+        with open(image_path, "rb") as f:
+            return f.read()
+    rng = np.random.default_rng(0)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8), (0, 0), 3)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent face mesh clients by inference worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4],
+                        help="INFERENCE_WORKERS values to compare; 0 runs inference inline on the event loop")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent clients posting frames")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--queue-depth", type=int, default=0,
+                        help="INFERENCE_QUEUE_DEPTH for the servers (default: unbounded, so no frame gets a 503)")
+    parser.add_argument("--image", default=None, help="JPEG to post (default: a synthetic frame without a face)")
+    parser.add_argument("--mode", default="landmarks", choices=["images", "landmarks", "all"],
+                        help="/process-frame mode")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    frame = test_frame(args.image)
+    path = f"/api/process-frame/binary?mode={args.mode}"
+    results = []
+    for workers in args.workers:
+        print(f"Benchmarking {workers} inference workers", file=sys.stderr)
+        results.append(run_workers(workers, frame, path, args.clients, args.duration, args.queue_depth))
+
+    print(f"{'workers':>8}{'frames/s':>10}{'frame p50':>11}{'frame p95':>11}{'503s':>6}"
+          f"{'ping p50':>10}{'ping p95':>10}{'ping max':>10}  (ms)")
+    for r in results:
+        print(f"{r['workers']:>8}{r['frames_per_s']:>10.1f}{r['frame'].get('p50_ms', 0):>11.1f}"
+              f"{r['frame'].get('p95_ms', 0):>11.1f}{r['busy']:>6}{r['probe'].get('p50_ms', 0):>10.1f}"
+              f"{r['probe'].get('p95_ms', 0):>10.1f}{r['probe'].get('max_ms', 0):>10.1f}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "clients": args.clients,
+                "duration_s": args.duration,
+                "mode": args.mode,
+                "image": args.image,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Benchmark the recommendation engine on synthetic catalogs of growing size.
+
+For every catalog size a fresh interpreter loads the catalog and replays the
+same query mix twice: once through the service functions, timed per phase
+(filter, sample, budget-constrained sample, diversity rerank, URL lookup,
+build, serialize), and once end to end through the recommendation router's
+ASGI app, called in-process without a server or HTTP client. Phases run one after the other over all queries, so the peak RSS
+recorded after each phase is that phase's high-water mark.
+
+Run from the backend directory:
+
+    python -m benchmarks.recommendation_engine --sizes 44000 250000 1000000 --output bench.json
+    python -m benchmarks.recommendation_engine --output new.json --compare bench.json
+"""
+import os
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+from benchmarks.synthetic_catalog import write_catalog
+
+DEFAULT_SIZES = [44000, 250000, 1000000]
+PHASES = ["filter", "sample", "budget", "rerank", "url_lookup", "build", "serialize", "asgi"]
+
+# Executed in a child process per catalog size; prints one JSON document
+CHILD_SCRIPT = r"""
+import os, sys, json, time, asyncio, resource
+from urllib.parse import urlencode
+
+styles, images, n_queries, count, seed = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+os.environ["CATALOG_STYLES_PATH"] = styles
+os.environ["CATALOG_IMAGES_PATH"] = images
+os.environ["CATALOG_WATCH_INTERVAL"] = "0"
+
+import logging
+import numpy as np
+logging.disable(logging.CRITICAL)
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def summarize(seconds, **extra):
+    ms = np.asarray(seconds) * 1000
+    summary = {"n": len(ms), "rss_mb": rss_mb(), "peak_rss_mb": peak_rss_mb(), **extra}
+    if len(ms):
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        summary.update({"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "mean_ms": ms.mean(),
+                        "throughput_per_s": len(ms) / ms.sum() * 1000 if ms.sum() else None})
+    return summary
+
+start = time.perf_counter()
+from fastapi import FastAPI
+import api.routes.recommendation_routes_correct as routes
+catalog = routes.catalog_store.current
+load = {"seconds": time.perf_counter() - start, "rows": len(catalog.data), "rss_mb": rss_mb(), "peak_rss_mb": peak_rss_mb()}
+
+from services.recommendation.outfit_generator import build_outfits
+from services.recommendation.price_index import price_segments, split_segments
+from services.recommendation.skin_tone_palette import SKIN_TONE_COLOR_MAPPING, skin_tone_palette
+
+# Query mix: palette and off-palette skin tones, common genders / usages / footwear
+rng = np.random.default_rng(seed)
+tones = list(SKIN_TONE_COLOR_MAPPING) + [f"#{v:06X}" for v in rng.integers(0, 2**24, 8)]
+genders = ["Men", "Women", "Men", "Women", "Unisex"]
+usages = [["Casual"], ["Casual", "Formal"], ["Sports"], ["Ethnic"], ["Formal"]]
+footwear = ["Any", "Casual Shoes", "Sports Shoes", "Formal Shoes", "Heels", "Flats", "Sandals"]
+queries = [(tones[rng.integers(len(tones))], genders[rng.integers(len(genders))],
+            usages[rng.integers(len(usages))], footwear[rng.integers(len(footwear))]) for _ in range(n_queries)]
+
+def timed(fn, items):
+    results, seconds = [], []
+    for item in items:
+        t = time.perf_counter()
+        results.append(fn(item))
+        seconds.append(time.perf_counter() - t)
+    return results, seconds
+
+phases = {}
+pools, seconds = timed(lambda q: catalog.index.outfit_pools(q[1], skin_tone_palette.colors_for(q[0]), q[2], q[3]), queries)
+usable = [p for p in pools if min(len(p.topwear), len(p.bottomwear), len(p.footwear)) > 0]
+phases["filter"] = summarize(seconds, empty_pools=len(pools) - len(usable))
+
+sample_rng = np.random.default_rng(seed)
+triples, seconds = timed(lambda p: catalog.harmony.top_k_triples(p, count, sample_rng)[0], usable)
+phases["sample"] = summarize(seconds)
+
+# Outfits under 120.00 in total, with demo prices of 19.99-79.99 per item
+prices = catalog.data["price"].to_numpy()
+priced = [split_segments(price_segments(p, prices)) for p in usable]
+_, seconds = timed(lambda p: catalog.harmony.top_k_triples(p[0], count, sample_rng, p[1], 12000), priced)
+phases["budget"] = summarize(seconds)
+
+# MMR over the harmony-ranked candidates, with the /recommend default trade-off
+_, seconds = timed(lambda p: catalog.reranker.top_k(p, count, sample_rng, diversity=routes.DEFAULT_DIVERSITY)[0], usable)
+phases["rerank"] = summarize(seconds)
+
+ids = catalog.data["id"].to_numpy()
+_, seconds = timed(lambda t: catalog.image_lookup.get_many(ids[t.ravel()]), triples)
+phases["url_lookup"] = summarize(seconds)
+
+outfits, seconds = timed(lambda t: build_outfits(catalog.data, catalog.image_lookup, t), triples)
+phases["build"] = summarize(seconds)
+
+_, seconds = timed(lambda o: routes.RecommendationResponse(outfits=o).model_dump_json(), outfits)
+phases["serialize"] = summarize(seconds)
+
+app = FastAPI()
+app.include_router(routes.router, prefix="/api")
+
+async def asgi_get(path, query):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(), "headers": [(b"host", b"bench")],
+             "server": ("bench", 80), "client": ("bench", 1)}
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+
+    await app(scope, receive, send)
+    return response["status"]
+
+async def replay():
+    statuses, seconds = [], []
+    for tone, gender, usage, foot in queries:
+        query = urlencode({"skin_tone_hex": tone, "gender": gender, "usage": ",".join(usage),
+                           "footwear_preference": foot, "count": count})
+        t = time.perf_counter()
+        statuses.append(await asgi_get("/api/recommend", query))
+        seconds.append(time.perf_counter() - t)
+    return statuses, seconds
+
+routes.pool_cache.clear()
+statuses, seconds = asyncio.run(replay())
+phases["asgi"] = summarize(seconds, status_counts={str(s): statuses.count(s) for s in sorted(set(statuses))},
+                           cache_hit_rate=routes.pool_cache.stats()["hit_rate"])
+
+print(json.dumps({"rows": load["rows"], "load": load, "phases": phases}))
+"""
+
+
+def run_size(styles, images, queries, count, seed):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, styles, images, str(queries), str(count), str(seed)],
+        cwd=backend_dir, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'rows':>9} {'phase':<11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'ops/s':>10}{'peak RSS (MB)':>15}")
+    for result in results:
+        print(f"{result['rows']:>9} {'load':<11}{result['load']['seconds'] * 1000:>10.1f}{'':>30}{result['load']['peak_rss_mb']:>15.1f}")
+        for phase in PHASES:
+            p = result["phases"][phase]
+            if "p50_ms" not in p:
+                continue
+            print(f"{result['rows']:>9} {phase:<11}{p['p50_ms']:>10.3f}{p['p95_ms']:>10.3f}{p['p99_ms']:>10.3f}"
+                  f"{p['throughput_per_s']:>10.0f}{p['peak_rss_mb']:>15.1f}")
+
+
+def print_comparison(results, baseline):
+    """p50 / p95 change per size and phase against an earlier results file."""
+    previous = {r["rows"]: r for r in baseline["results"]}
+    print(f"\nCompared with {baseline['meta'].get('git_revision') or 'baseline'}:")
+    print(f"{'rows':>9} {'phase':<11}{'p50 change':>12}{'p95 change':>12}")
+    for result in results:
+        old = previous.get(result["rows"])
+        if old is None:
+            continue
+        for phase in PHASES:
+            new_p, old_p = result["phases"].get(phase, {}), old["phases"].get(phase, {})
+            if "p50_ms" not in new_p or "p50_ms" not in old_p:
+                continue
+            changes = [(new_p[k] - old_p[k]) / old_p[k] * 100 if old_p[k] else 0.0 for k in ("p50_ms", "p95_ms")]
+            print(f"{result['rows']:>9} {phase:<11}{changes[0]:>+11.1f}%{changes[1]:>+11.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation latency and memory by catalog size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes in styles")
+    parser.add_argument("--queries", type=int, default=300, help="Queries replayed per phase")
+    parser.add_argument("--count", type=int, default=3, help="Outfits per query")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the catalogs and the query mix")
+    parser.add_argument("--data-dir", default=None,
+                        help="Keep generated catalogs here and reuse them across runs (default: temporary)")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        results = []
+        for size in args.sizes:
+            catalog_dir = os.path.join(data_dir, f"catalog_{size}_{args.seed}")
+            styles, images = os.path.join(catalog_dir, "styles.csv"), os.path.join(catalog_dir, "images.csv")
+            if not (os.path.exists(styles) and os.path.exists(images)):
+                print(f"Generating {size} styles in {catalog_dir}", file=sys.stderr)
+                styles, images = write_catalog(catalog_dir, size, args.seed)
+            print(f"Benchmarking {size} styles", file=sys.stderr)
+            results.append(run_size(styles, images, args.queries, args.count, args.seed))
+
+    import numpy
+    import pandas
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "machine": platform.machine(),
+            "queries": args.queries,
+            "count": args.count,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
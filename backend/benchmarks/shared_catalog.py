@@ -0,0 +1,114 @@
+"""Measure catalog memory per worker: private CSV copies vs the shared snapshot.
+
+Starts N worker processes the way uvicorn --workers does (each one loads the
+catalog itself), waits until all have loaded, and reads their memory from
+/proc/<pid>/smaps_rollup (Linux only). USS is memory only that worker uses;
+PSS splits shared pages evenly between the processes mapping them. A
+"baseline" run with the same imports but no catalog is subtracted, so the
+numbers are the catalog's own cost.
+
+Run from the backend directory:
+
+    python -m benchmarks.shared_catalog api/routes/styles.csv api/routes/images.csv --workers 8
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+MODES = ("baseline", "private", "shared")
+
+# Executed in each worker: load the catalog, report ready, then hold it until stdin closes
+WORKER_SCRIPT = r"""
+import sys, logging
+logging.disable(logging.CRITICAL)
+from services.recommendation.catalog_store import CatalogStore
+
+mode, styles, images = sys.argv[1:4]
+if mode != "baseline":
+    store = CatalogStore(styles, images, publish=mode == "shared")
+    catalog = store.load()
+    # Touch every posting list and code array, as serving requests eventually does
+    for field, postings in catalog.index.postings.items():
+        sum(int(p.sum()) for p in postings) + int(catalog.index.codes[field].sum())
+    for name in ("offsets", "rows", "weights", "impact"):
+        getattr(catalog.search, name).sum()
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {"pss": fields["Pss"], "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def run_mode(mode, styles, images, workers):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    processes = [
+        subprocess.Popen([sys.executable, "-c", WORKER_SCRIPT, mode, styles, images], cwd=backend_dir,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            if process.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"{mode} worker {process.pid} failed to load the catalog")
+        usage = [memory_kb(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate("")
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "total_pss_mb": sum(u["pss"] for u in usage) / 1024,
+        "mean_uss_mb": sum(u["uss"] for u in usage) / len(usage) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker catalog memory, private vs shared snapshot")
+    parser.add_argument("styles", help="Path to styles.csv")
+    parser.add_argument("images", help="Path to images.csv")
+    parser.add_argument("--workers", type=int, default=8, help="Worker processes per mode")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for mode in MODES:
+            # Separate copies per mode, so private workers cannot pick up the shared snapshot
+            mode_dir = os.path.join(tmp, mode)
+            os.makedirs(mode_dir)
+            styles = shutil.copy(args.styles, os.path.join(mode_dir, "styles.csv"))
+            images = shutil.copy(args.images, os.path.join(mode_dir, "images.csv"))
+            if mode == "shared":
+                # Publish up front, as the first worker of a deployment would; workers only map it
+                from services.recommendation.catalog_snapshot import publish_snapshot
+                publish_snapshot(styles, images)
+            results.append(run_mode(mode, styles, images, args.workers))
+
+    baseline = results[0]
+    print(f"{'mode':<10}{'workers':>8}{'total PSS (MB)':>16}{'catalog PSS (MB)':>18}{'catalog USS/worker (MB)':>25}")
+    for r in results:
+        r["catalog_pss_mb"] = r["total_pss_mb"] - baseline["total_pss_mb"]
+        r["catalog_uss_per_worker_mb"] = r["mean_uss_mb"] - baseline["mean_uss_mb"]
+        print(f"{r['mode']:<10}{r['workers']:>8}{r['total_pss_mb']:>16.1f}{r['catalog_pss_mb']:>18.1f}"
+              f"{r['catalog_uss_per_worker_mb']:>25.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
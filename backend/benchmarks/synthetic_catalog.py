@@ -0,0 +1,146 @@
+"""Generate synthetic catalogs in the styles.csv / images.csv schema.
+
+Category, color, gender and usage frequencies roughly follow the real fashion
+dataset, so filter selectivity and pool sizes scale like production when the
+row count grows. A small share of rows is missing usage / baseColour, and a few
+image rows are missing or malformed, as in the real files.
+
+Run from the backend directory:
+
+    python -m benchmarks.synthetic_catalog 250000 --out /tmp/catalog_250k
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# (masterCategory, subCategory, articleType, weight)
+ARTICLES = [
+    ("Apparel", "Topwear", "Tshirts", 7070),
+    ("Apparel", "Topwear", "Shirts", 3217),
+    ("Apparel", "Topwear", "Kurtas", 1844),
+    ("Apparel", "Topwear", "Tops", 1762),
+    ("Apparel", "Topwear", "Sweatshirts", 285),
+    ("Apparel", "Topwear", "Jackets", 258),
+    ("Apparel", "Bottomwear", "Jeans", 609),
+    ("Apparel", "Bottomwear", "Trousers", 530),
+    ("Apparel", "Bottomwear", "Shorts", 547),
+    ("Apparel", "Bottomwear", "Track Pants", 304),
+    ("Apparel", "Bottomwear", "Skirts", 128),
+    ("Apparel", "Bottomwear", "Leggings", 177),
+    ("Apparel", "Innerwear", "Briefs", 849),
+    ("Apparel", "Dress", "Dresses", 464),
+    ("Apparel", "Saree", "Sarees", 427),
+    ("Footwear", "Shoes", "Casual Shoes", 2846),
+    ("Footwear", "Shoes", "Sports Shoes", 2036),
+    ("Footwear", "Shoes", "Heels", 1323),
+    ("Footwear", "Shoes", "Formal Shoes", 637),
+    ("Footwear", "Shoes", "Flats", 500),
+    ("Footwear", "Flip Flops", "Flip Flops", 916),
+    ("Footwear", "Sandal", "Sandals", 897),
+    ("Accessories", "Watches", "Watches", 2542),
+    ("Accessories", "Bags", "Handbags", 1759),
+    ("Accessories", "Eyewear", "Sunglasses", 1073),
+    ("Accessories", "Wallets", "Wallets", 936),
+    ("Accessories", "Belts", "Belts", 813),
+    ("Personal Care", "Fragrance", "Perfume and Body Mist", 614),
+]
+
+GENDERS = {"Men": 22147, "Women": 18631, "Unisex": 2161, "Boys": 830, "Girls": 655}
+
+USAGES = {"Casual": 34406, "Sports": 4025, "Ethnic": 3208, "Formal": 2359,
+          "Smart Casual": 67, "Party": 29, "Travel": 26, "Home": 1}
+
+SEASONS = {"Summer": 21478, "Fall": 11431, "Winter": 8517, "Spring": 2983}
+
+COLOURS = {
+    "Black": 9728, "White": 5538, "Blue": 4921, "Brown": 3494, "Grey": 2742, "Red": 2455,
+    "Green": 2112, "Pink": 1862, "Navy Blue": 1789, "Purple": 1640, "Silver": 1089,
+    "Yellow": 781, "Beige": 749, "Gold": 631, "Maroon": 584, "Orange": 546, "Olive": 410,
+    "Multi": 394, "Cream": 388, "Steel": 315, "Charcoal": 229, "Peach": 189, "Off White": 181,
+    "Skin": 178, "Lavender": 164, "Grey Melange": 146, "Khaki": 139, "Teal": 119, "Magenta": 114,
+    "Tan": 94, "Mustard": 93, "Bronze": 88, "Copper": 75, "Turquoise Blue": 69, "Rust": 64,
+    "Burgundy": 45, "Mauve": 29, "Rose": 27, "Coffee Brown": 25, "Metallic": 18, "Nude": 18,
+    "Sea Green": 22, "Lime Green": 5, "Mushroom Brown": 16, "Taupe": 11, "Fluorescent Green": 4,
+}
+
+BRANDS = ["Nike", "Puma", "Adidas", "Reebok", "Fabindia", "Peter England", "Wrangler",
+          "Levis", "Catwalk", "Fossil", "Titan", "Baggit", "Jealous 21", "Lotto", "ADIDAS"]
+
+IMAGE_URL_PREFIX = "http://assets.myntassets.com/v1/images/style/properties/"
+
+# Share of styles rows missing a required field (dropped on load)
+MISSING_RATE = 0.005
+
+
+def _choice(rng: np.random.Generator, weights: dict, size: int) -> np.ndarray:
+    values = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype=float)
+    return values[rng.choice(len(values), size=size, p=p / p.sum())]
+
+
+def generate_catalog(rows: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(styles, images) frames with `rows` styles."""
+    rng = np.random.default_rng(seed)
+
+    article_weights = np.array([a[3] for a in ARTICLES], dtype=float)
+    article = rng.choice(len(ARTICLES), size=rows, p=article_weights / article_weights.sum())
+    master, sub, article_type = (np.array([a[i] for a in ARTICLES], dtype=object)[article] for i in range(3))
+
+    ids = rng.choice(np.arange(1000, 1000 + rows * 4), size=rows, replace=False)
+    colour = _choice(rng, COLOURS, rows)
+    usage = _choice(rng, USAGES, rows)
+    brand = np.array(BRANDS, dtype=object)[rng.integers(0, len(BRANDS), rows)]
+    gender = _choice(rng, GENDERS, rows)
+
+    styles = pd.DataFrame({
+        "id": ids,
+        "gender": gender,
+        "masterCategory": master,
+        "subCategory": sub,
+        "articleType": article_type,
+        "baseColour": colour,
+        "season": _choice(rng, SEASONS, rows),
+        "year": rng.integers(2007, 2019, rows),
+        "usage": usage,
+        "productDisplayName": brand + " " + gender + " " + colour + " " + article_type,
+    })
+    styles.loc[rng.random(rows) < MISSING_RATE, "usage"] = np.nan
+    styles.loc[rng.random(rows) < MISSING_RATE / 5, "baseColour"] = np.nan
+
+    # Most styles have exactly one image; a few have none, a few rows are junk
+    with_image = ids[rng.random(rows) < 0.99]
+    images = pd.DataFrame({
+        "filename": [f"{i}.jpg" for i in with_image.tolist()],
+        "link": [f"{IMAGE_URL_PREFIX}{i:x}/{i}.jpg" for i in with_image.tolist()],
+    })
+    junk = pd.DataFrame({"filename": ["Thumbs.db", "0012.jpg"], "link": [IMAGE_URL_PREFIX, None]})
+    images = pd.concat([images, junk], ignore_index=True)
+    return styles, images
+
+
+def write_catalog(out_dir: str, rows: int, seed: int = 0) -> Tuple[str, str]:
+    """Write styles.csv and images.csv into `out_dir` and return their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    styles, images = generate_catalog(rows, seed)
+    styles_path = os.path.join(out_dir, "styles.csv")
+    images_path = os.path.join(out_dir, "images.csv")
+    styles.to_csv(styles_path, index=False)
+    images.to_csv(images_path, index=False)
+    return styles_path, images_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic styles.csv / images.csv catalog")
+    parser.add_argument("rows", type=int, help="Number of styles")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    styles_path, images_path = write_catalog(args.out, args.rows, args.seed)
+    print(f"Wrote {args.rows} styles to {styles_path} and {images_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from backend.api.routes.segmentation_routes import router as segmentation_router
 from backend.api.routes.skin_tone_routes import router as skin_tone_router
 from backend.api.routes.body_measurement_routes import router as body_measurement_router
 from backend.api.routes.recommendation_routes_correct import router as recommendation_router
+from backend.api.routes.user_recommendation_routes import router as user_recommendation_router
 from backend.api.auth import router as auth_router
 from backend.api.led_control import router as led_control_router
 import logging
@@ -40,6 +41,7 @@ app.include_router(segmentation_router, prefix="/api", tags=["Segmentation"])
 app.include_router(skin_tone_router, prefix="/api", tags=["Skin Tone"])
 app.include_router(body_measurement_router, prefix="/api", tags=["Body Measurement"])
 app.include_router(recommendation_router, prefix="/api", tags=["Recommendation"])
+app.include_router(user_recommendation_router, prefix="/api", tags=["Recommendation"])
 app.include_router(led_control_router, prefix="/api", tags=["LED Control"])
 
 # Root endpoint for basic API information
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import logging
+from typing import Optional, Union
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Quality of the JPEGs returned to clients (OpenCV's default)
+JPEG_QUALITY = 95
+
+def decode_image(data: Union[bytes, bytearray, memoryview, str]) -> Optional[np.ndarray]:
+    """Decode an encoded frame to a BGR image, or None when it is not one.
+
+    Takes the raw JPEG / WebP / PNG bytes, or a base64 string with or
+    without a data URL prefix. Raw bytes are decoded in place; base64 is
+    validated by the decoder itself instead of a regex over the string.
+    """
+    if isinstance(data, str):
+        if not data:
+            return None
+        # Skip a "data:image/...;base64," prefix without splitting the whole string
+        start = data.find(",", 0, 100) + 1
+        try:
+            data = base64.b64decode(data[start:] if start else data, validate=True)
+        except (binascii.Error, ValueError):
+            logger.error("Invalid base64 frame data")
+            return None
+
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        logger.error("Empty frame data")
+        return None
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        logger.error(f"Could not decode {buffer.size} bytes of frame data as an image")
+    return image
+
+def encode_jpeg(image: np.ndarray, quality: int = JPEG_QUALITY) -> bytes:
+    """JPEG bytes of a BGR image"""
+    success, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        raise ValueError("Could not encode image as JPEG")
+    return buffer.tobytes()
+
+def encode_data_url(image: np.ndarray, quality: int = JPEG_QUALITY) -> str:
+    """JPEG data URL of a BGR image, for the JSON responses"""
+    return "data:image/jpeg;base64," + base64.b64encode(encode_jpeg(image, quality)).decode("ascii")
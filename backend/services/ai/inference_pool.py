@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per model pool, by default one per core up to 4. MediaPipe,
+# OpenCV and TFLite release the GIL while they run, so threads scale across
+# cores; 0 runs inference inline on the event loop, as the routes used to
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Requests that may wait for a busy pool; beyond that they are turned away
+# (503) instead of piling up behind the camera. 0 means no limit
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "8"))
+
+
+class InferencePoolFull(Exception):
+    """Raised by InferencePool.run when the pool's queue is full"""
+
+
+class InferencePool:
+    """A bounded pool of model instances, each owned by one worker thread.
+
+    `factory` is called once on every worker thread, so an instance is
+    created, used and closed by the same thread and never shared. Handlers
+    `await pool.run(fn, *args)`, which calls fn(instance, *args) on the
+    next free worker while the event loop keeps serving other requests.
+    """
+
+    def __init__(self,
+                 name: str,
+                 factory: Callable[[], Any],
+                 workers: int = INFERENCE_WORKERS,
+                 queue_depth: int = INFERENCE_QUEUE_DEPTH):
+        self.name = name
+        self.workers = workers
+        self._jobs = queue.Queue(maxsize=max(queue_depth, 0))
+        self._threads = []
+        self._inline_instance = None
+        if workers <= 0:
+            self._inline_instance = factory()
+            logger.info(f"{name} pool running inline on the event loop")
+            return
+
+        # Wait for every worker's instance, so a model that fails to load fails here, at import
+        ready = threading.Barrier(workers + 1)
+        errors = []
+        for number in range(workers):
+            thread = threading.Thread(target=self._work, args=(factory, ready, errors),
+                                      name=f"{name}-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        ready.wait()
+        if errors:
+            self.close()
+            raise errors[0]
+        logger.info(f"{name} pool started with {workers} workers, queue depth {queue_depth}")
+
+    def _work(self, factory, ready, errors):
+        instance = None
+        try:
+            instance = factory()
+        except Exception as e:
+            errors.append(e)
+        ready.wait()
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, args, future = job
+            # Skipped when the request went away while queued
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(instance, *args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        close = getattr(instance, "close", None)
+        if close is not None:
+            close()
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """fn(instance, *args) on a worker; raises InferencePoolFull when too many requests wait"""
+        if self.workers <= 0:
+            return fn(self._inline_instance, *args)
+        future = Future()
+        try:
+            self._jobs.put_nowait((fn, args, future))
+        except queue.Full:
+            raise InferencePoolFull(f"The {self.name} pool is busy, try again shortly")
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Stop the workers once the queued jobs are done; each closes its instance"""
+        for _ in self._threads:
+            self._jobs.put(None)
+        self._threads = []
@@ -6,6 +6,7 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 import os
 from datetime import datetime
+from typing import NamedTuple
 import sys
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -59,62 +60,188 @@ def get_facial_features():
         "right_eyebrow": right_eyebrow
     }
 
+# Feature colors (BGR)
+FEATURE_COLORS = {
+    "left_eye": (0, 0, 255),
+    "right_eye": (0, 255, 0),
+    "left_eyebrow": (0, 0, 255),
+    "right_eyebrow": (0, 255, 0),
+}
+
+MESH_COLOR = (255, 255, 255)
+MESH_THICKNESS = 1
+FEATURE_THICKNESS = 2
+
+# Weight of the frame when blending the mesh overlay onto it
+MESH_ALPHA = 0.8
+
+# Indices of the face outline, in drawing order
+FACE_OVAL_INDICES = np.array([
+    10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
+    397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
+    172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
+], dtype=np.int32)
+
+class MeshConnections(NamedTuple):
+    """Landmark connections compiled for drawing.
+
+    `edges` holds the (start, end) index pairs. The same directed edges are
+    also chained into trails, stored back to back in `trail_indices` and
+    cut at `trail_starts`: a polyline along a trail draws exactly its
+    edges, so the whole set takes a few polylines instead of one line per
+    edge.
+    """
+    edges: np.ndarray
+    trail_indices: np.ndarray
+    trail_starts: np.ndarray
+
+def chain_trails(edges):
+    """Split directed edges into as few trails as possible.
+
+    Every node with more outgoing than incoming edges is joined from a
+    virtual node, and every node with more incoming edges joined to it, so
+    the graph has an Euler circuit (Hierholzer); cutting the circuit at the
+    virtual node leaves the trails.
+    """
+    virtual = -1
+    outgoing = {}
+    surplus = {}
+    for start, end in edges.tolist():
+        outgoing.setdefault(start, []).append(end)
+        surplus[start] = surplus.get(start, 0) + 1
+        surplus[end] = surplus.get(end, 0) - 1
+    for node, extra in sorted(surplus.items()):
+        if extra > 0:
+            outgoing.setdefault(virtual, []).extend([node] * extra)
+        elif extra < 0:
+            outgoing.setdefault(node, []).extend([virtual] * -extra)
+
+    trails = []
+    for start in [virtual] + sorted(outgoing):
+        if not outgoing.get(start):
+            continue
+        stack, circuit = [start], []
+        while stack:
+            targets = outgoing.get(stack[-1])
+            if targets:
+                stack.append(targets.pop())
+            else:
+                circuit.append(stack.pop())
+        circuit.reverse()
+
+        trail = []
+        for node in circuit:
+            if node == virtual:
+                if len(trail) > 1:
+                    trails.append(trail)
+                trail = []
+            else:
+                trail.append(node)
+        if len(trail) > 1:
+            trails.append(trail)
+    return trails
+
+def compile_connections(connections):
+    """MeshConnections of a set of landmark index pairs"""
+    edges = np.array(sorted(connections), dtype=np.int32).reshape(-1, 2)
+    trails = chain_trails(edges)
+    lengths = np.array([len(trail) for trail in trails], dtype=np.int64)
+    trail_indices = np.array([node for trail in trails for node in trail], dtype=np.int32)
+    return MeshConnections(edges, trail_indices, np.cumsum(lengths)[:-1])
+
+def compile_facial_features(facial_features):
+    """A list of (color, (n, 2) index pairs), one per feature, in drawing order"""
+    return [(FEATURE_COLORS[name], np.array(connections, dtype=np.int32).reshape(-1, 2))
+            for name, connections in facial_features.items()]
+
+# Compiled once; get_triangulation() and get_facial_features() rebuild them on every call
+TESSELATION = compile_connections(get_triangulation())
+FACIAL_FEATURE_EDGES = compile_facial_features(get_facial_features())
+
+def landmark_pixels(landmarks, width, height):
+    """(n, 2) int32 pixel coordinates of normalized landmarks.
+
+    Takes MediaPipe landmarks or an (n, 2+) array of normalized x, y; like
+    int(), coordinates are truncated toward zero.
+    """
+    if isinstance(landmarks, np.ndarray):
+        normalized = landmarks[:, :2].astype(np.float64)
+    else:
+        normalized = np.array([(landmark.x, landmark.y) for landmark in landmarks], dtype=np.float64).reshape(-1, 2)
+    return (normalized * (width, height)).astype(np.int32)
+
+def landmark_array(landmarks):
+    """(n, 3) float32 normalized x, y, z of MediaPipe landmarks.
+
+    The model outputs float32, so nothing is lost; draw_mesh and
+    create_face_mask take the array in place of the landmarks.
+    """
+    return np.array([(landmark.x, landmark.y, landmark.z) for landmark in landmarks], dtype=np.float32).reshape(-1, 3)
+
+def landmark_bounding_box(landmarks):
+    """Normalized {x, y, width, height} box around (n, 2+) landmarks, clipped to the frame"""
+    x0, y0 = np.clip(landmarks[:, :2].min(axis=0), 0, 1).tolist()
+    x1, y1 = np.clip(landmarks[:, :2].max(axis=0), 0, 1).tolist()
+    return {"x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0}
+
+def _segments(points, edges):
+    """(n, 2, 2) line segments for the edges whose landmarks exist"""
+    if edges.size and edges.max() >= len(points):
+        edges = edges[(edges < len(points)).all(axis=1)]
+    return points[edges]
+
+def _polylines(points, connections):
+    """Point lists for cv2.polylines drawing every connection"""
+    if len(connections.trail_indices) and connections.trail_indices.max() < len(points):
+        return np.split(points[connections.trail_indices], connections.trail_starts)
+    # Missing landmarks break the trails; fall back to one segment per edge
+    return list(_segments(points, connections.edges))
+
 # Draw the face mesh with triangulation
-def draw_mesh(frame, landmarks, triangulation, facial_features=None):
+def draw_mesh(frame, landmarks, triangulation=TESSELATION, facial_features=FACIAL_FEATURE_EDGES):
+    """The frame with the face mesh and highlighted features blended over it.
+
+    The mesh is drawn as a few polylines along its precompiled trails and
+    each feature with one cv2.polylines call, on an overlay covering only
+    the face's bounding box; the rest of the frame is just scaled by
+    MESH_ALPHA, as blending with an empty overlay would. `triangulation`
+    and `facial_features` also take the connection sets of
+    get_triangulation() / get_facial_features(), compiled on the fly.
+    The frame itself is not modified.
+    """
     height, width, _ = frame.shape
-    
-    # Create a transparent overlay for the mesh
-    mesh_overlay = np.zeros_like(frame, dtype=np.uint8)
-    
+    if not isinstance(triangulation, MeshConnections):
+        triangulation = compile_connections(triangulation)
+    if isinstance(facial_features, dict):
+        facial_features = compile_facial_features(facial_features)
+
     # Convert landmarks to pixel coordinates
-    points = []
-    for landmark in landmarks:
-        x = int(landmark.x * width)
-        y = int(landmark.y * height)
-        points.append((x, y))
-    
-    # Draw triangulation (main mesh)
-    for connection in triangulation:
-        # Check if these indices exist in our landmarks
-        if connection[0] < len(points) and connection[1] < len(points):
-            pt1 = points[connection[0]]
-            pt2 = points[connection[1]]
-            cv2.line(mesh_overlay, pt1, pt2, (255, 255, 255), 1)
-    
-    # Draw colored facial features
-    if facial_features:
-        # Left eye (red)
-        for connection in facial_features["left_eye"]:
-            if connection[0] < len(points) and connection[1] < len(points):
-                pt1 = points[connection[0]]
-                pt2 = points[connection[1]]
-                cv2.line(mesh_overlay, pt1, pt2, (0, 0, 255), 2)
-        
-        # Right eye (green)
-        for connection in facial_features["right_eye"]:
-            if connection[0] < len(points) and connection[1] < len(points):
-                pt1 = points[connection[0]]
-                pt2 = points[connection[1]]
-                cv2.line(mesh_overlay, pt1, pt2, (0, 255, 0), 2)
-        
-        # Left eyebrow (red)
-        for connection in facial_features["left_eyebrow"]:
-            if connection[0] < len(points) and connection[1] < len(points):
-                pt1 = points[connection[0]]
-                pt2 = points[connection[1]]
-                cv2.line(mesh_overlay, pt1, pt2, (0, 0, 255), 2)
-        
-        # Right eyebrow (green)
-        for connection in facial_features["right_eyebrow"]:
-            if connection[0] < len(points) and connection[1] < len(points):
-                pt1 = points[connection[0]]
-                pt2 = points[connection[1]]
-                cv2.line(mesh_overlay, pt1, pt2, (0, 255, 0), 2)
-    
+    points = landmark_pixels(landmarks, width, height)
+    mesh_visualization = cv2.convertScaleAbs(frame, alpha=MESH_ALPHA)
+    if len(points) == 0:
+        return mesh_visualization
+
+    # Bounding box of everything drawn, padded for the line thickness and clipped to the frame
+    pad = FEATURE_THICKNESS
+    x0, y0 = np.maximum(points.min(axis=0) - pad, 0)
+    x1, y1 = np.minimum(points.max(axis=0) + pad + 1, (width, height))
+    if x0 >= x1 or y0 >= y1:
+        return mesh_visualization
+    shifted = points - (x0, y0)
+    mesh_overlay = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+
+    # Draw triangulation (main mesh), then the colored facial features
+    mesh_lines = _polylines(shifted, triangulation)
+    if mesh_lines:
+        cv2.polylines(mesh_overlay, mesh_lines, False, MESH_COLOR, MESH_THICKNESS)
+    for color, edges in facial_features or []:
+        segments = _segments(shifted, edges)
+        if len(segments):
+            cv2.polylines(mesh_overlay, segments, False, color, FEATURE_THICKNESS)
+
     # Blend the mesh overlay with the original frame
-    alpha = 0.8 # Transparency level
-    mesh_visualization = cv2.addWeighted(frame, alpha, mesh_overlay, 1-alpha, 0)
-    
+    roi = (slice(y0, y1), slice(x0, x1))
+    mesh_visualization[roi] = cv2.addWeighted(frame[roi], MESH_ALPHA, mesh_overlay, 1 - MESH_ALPHA, 0)
     return mesh_visualization
 
 # Create a face mask from landmarks (your existing code)
@@ -122,31 +249,12 @@ def create_face_mask(frame, face_landmarks):
     height, width, _ = frame.shape
     mask = np.zeros((height, width), dtype=np.uint8)
     
-    # Extract face oval points
-    face_oval_points = []
-
-    # Convert the landmarks to pixel coordinates
-    for landmark in face_landmarks:
-        x = int(landmark.x * width)
-        y = int(landmark.y * height)
-        face_oval_points.append((x, y))
-    
-    # Get indices for face oval - using common face outline points
-    face_oval_indices = [
-        10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
-        397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
-        172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
-    ]
-    
-    # Extract face oval points
-    oval_points = [face_oval_points[i] for i in face_oval_indices if i < len(face_oval_points)]
+    # Convert the landmarks to pixel coordinates and extract the face oval
+    points = landmark_pixels(face_landmarks, width, height)
+    oval_points = points[FACE_OVAL_INDICES[FACE_OVAL_INDICES < len(points)]]
     
     if len(oval_points) > 0:
-        # Convert points to numpy array
-        oval_points_array = np.array(oval_points, dtype=np.int32)
-        
         # Fill the polygon to create a mask
-        cv2.fillPoly(mask, [oval_points_array], 255)
+        cv2.fillPoly(mask, [oval_points], 255)
     
     return mask
-
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Columns of styles.csv that the recommendation filters look at
+INDEXED_FIELDS = ("gender", "masterCategory", "subCategory", "articleType", "baseColour", "usage")
+
+EMPTY_POSTINGS = np.empty(0, dtype=np.int32)
+
+
+class OutfitPools(NamedTuple):
+    topwear: np.ndarray
+    bottomwear: np.ndarray
+    footwear: np.ndarray
+
+
+class CatalogIndex:
+    """Inverted index over the catalog DataFrame.
+
+    Every (field, value) pair maps to a sorted array of row positions. A filter
+    walks the shortest matching posting lists and checks the remaining fields
+    against per-row value codes, so no request ever scans the whole catalog.
+    Item ids resolve to row positions by binary search over their sort order.
+    """
+
+    def __init__(self, data: pd.DataFrame, fields: Iterable[str] = INDEXED_FIELDS):
+        self.size = len(data)
+        self.codes: Dict[str, np.ndarray] = {}
+        self.vocab: Dict[str, Dict[str, int]] = {}
+        self.postings: Dict[str, List[np.ndarray]] = {}
+        ids = data["id"].to_numpy() if "id" in data.columns else np.empty(0, dtype=np.int64)
+        self.ids, self.id_order = ids, self.sort_ids(ids)
+
+        for field in fields:
+            if field not in data.columns:
+                logger.warning(f"Column '{field}' missing from catalog, skipping index")
+                continue
+            self._index_column(field, data[field])
+
+        logger.info(f"Catalog index built over {self.size} rows, {len(self.postings)} fields")
+
+    @classmethod
+    def from_arrays(cls,
+                    size: int,
+                    fields: Dict[str, Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]],
+                    ids: np.ndarray,
+                    id_order: np.ndarray) -> "CatalogIndex":
+        """Index over precomputed (codes, categories, order, boundaries) per field.
+
+        Used for snapshot-backed catalogs: the arrays stay memory-mapped, so
+        every worker process shares one physical copy.
+        """
+        index = cls.__new__(cls)
+        index.size = size
+        index.codes, index.vocab, index.postings = {}, {}, {}
+        index.ids, index.id_order = ids, id_order
+        for field, (codes, uniques, order, boundaries) in fields.items():
+            index._set_field(field, codes, uniques, order, boundaries)
+        logger.info(f"Catalog index attached over {size} rows, {len(index.postings)} fields")
+        return index
+
+    @staticmethod
+    def sort_codes(codes: np.ndarray, n_categories: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(order, boundaries): row positions grouped by code, and where each code's group starts."""
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        boundaries = np.searchsorted(codes[order], np.arange(n_categories + 1))
+        return order, boundaries
+
+    @staticmethod
+    def sort_ids(ids: np.ndarray) -> np.ndarray:
+        """Row positions in ascending id order; duplicate ids keep catalog order."""
+        return np.argsort(ids, kind="stable").astype(np.int32)
+
+    def positions_of(self, item_ids: Iterable[int]) -> np.ndarray:
+        """Row position of each item id, -1 where the id is not in the catalog."""
+        query = np.asarray(list(item_ids), dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(query), -1, dtype=np.int64)
+        # `sorter` searches the ids in sorted order without materializing them
+        slots = np.minimum(np.searchsorted(self.ids, query, sorter=self.id_order), len(self.ids) - 1)
+        positions = self.id_order[slots].astype(np.int64)
+        positions[self.ids[positions] != query] = -1
+        return positions
+
+    def _index_column(self, field: str, column: pd.Series) -> None:
+        # Categorical columns already carry their codes; both give NaN the code
+        # -1, which is never matched by the filters
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes, uniques = column.array.codes, column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column, sort=False)
+            codes = codes.astype(np.int32)
+        order, boundaries = self.sort_codes(codes, len(uniques))
+        self._set_field(field, codes, uniques, order, boundaries)
+
+    def _set_field(self, field: str, codes: np.ndarray, uniques, order: np.ndarray, boundaries: np.ndarray) -> None:
+        # Postings are views into `order`, never copies
+        self.codes[field] = codes
+        self.vocab[field] = {value: code for code, value in enumerate(uniques)}
+        self.postings[field] = [order[boundaries[c]:boundaries[c + 1]] for c in range(len(uniques))]
+
+    def _value_codes(self, field: str, values: Iterable[str]) -> List[int]:
+        vocab = self.vocab.get(field, {})
+        return [vocab[v] for v in set(values) if v in vocab]
+
+    def lookup(self, field: str, values: Iterable[str]) -> np.ndarray:
+        """Row positions where `field` equals any of `values` (like Series.isin)."""
+        return self._lookup_codes(field, self._value_codes(field, values))
+
+    def _lookup_codes(self, field: str, codes: List[int]) -> np.ndarray:
+        matches = [self.postings[field][c] for c in codes]
+
+        if not matches:
+            return EMPTY_POSTINGS
+        if len(matches) == 1:
+            return matches[0]
+        # Postings of one field are disjoint, so a sort is enough for the union
+        return np.sort(np.concatenate(matches))
+
+    def restrict(self, positions: np.ndarray, field: str, values: Iterable[str]) -> np.ndarray:
+        """Keep the positions whose `field` is one of `values`, preserving order."""
+        return positions[self.matches(positions, field, values)]
+
+    def matches(self, positions: np.ndarray, field: str, values: Iterable[str]) -> np.ndarray:
+        """Boolean mask: which of `positions` have `field` equal to one of `values`."""
+        return self._match_codes(positions, field, self._value_codes(field, values))
+
+    def _restrict_codes(self, positions: np.ndarray, field: str, codes: List[int]) -> np.ndarray:
+        return positions[self._match_codes(positions, field, codes)]
+
+    def _match_codes(self, positions: np.ndarray, field: str, codes: List[int]) -> np.ndarray:
+        allowed = np.zeros(len(self.vocab.get(field, {})) + 1, dtype=bool)
+        allowed[codes] = True
+        # Code -1 (missing value) indexes the trailing False slot
+        return allowed[self.codes[field][positions]]
+
+    def candidates(self, **filters: Iterable[str]) -> np.ndarray:
+        """Row positions matching every `field=values` filter, in ascending order."""
+        return self._candidates_by_code({field: self._value_codes(field, values) for field, values in filters.items()})
+
+    def _candidates_by_code(self, filters: Dict[str, List[int]]) -> np.ndarray:
+        if not filters:
+            return np.arange(self.size, dtype=np.int32)
+
+        filters = dict(filters)
+
+        # Drive from the field with the fewest matching rows, check the rest by code
+        def match_count(field):
+            return sum(len(self.postings[field][c]) for c in filters[field])
+
+        driver = min(filters, key=match_count)
+        result = self._lookup_codes(driver, filters.pop(driver))
+        for field, codes in filters.items():
+            if len(result) == 0:
+                break
+            result = self._restrict_codes(result, field, codes)
+        return result
+
+    def outfit_pools(self,
+                     gender: str,
+                     colors: List[str],
+                     usage: List[str],
+                     footwear_preference: Optional[str]) -> OutfitPools:
+        """Candidate row positions for each outfit slot.
+
+        Mirrors the filters of the /recommend routes: gender and colour apply to
+        every slot, usage to topwear and bottomwear only, and the footwear
+        preference narrows footwear unless it is empty or "Any".
+        """
+        # Translate the request values to codes once and reuse them for every slot
+        common = {"gender": self._value_codes("gender", [gender]), "baseColour": self._value_codes("baseColour", colors)}
+        usage_codes = self._value_codes("usage", usage)
+
+        topwear = self._candidates_by_code(
+            {**common, "usage": usage_codes, "subCategory": self._value_codes("subCategory", ["Topwear"])})
+        bottomwear = self._candidates_by_code(
+            {**common, "usage": usage_codes, "subCategory": self._value_codes("subCategory", ["Bottomwear"])})
+
+        footwear_filters = {**common, "masterCategory": self._value_codes("masterCategory", ["Footwear"])}
+        if footwear_preference and footwear_preference != "Any":
+            footwear_filters["articleType"] = self._value_codes("articleType", [footwear_preference])
+        footwear = self._candidates_by_code(footwear_filters)
+
+        return OutfitPools(topwear, bottomwear, footwear)
@@ -0,0 +1,290 @@
+"""Compile styles.csv / images.csv into a binary columnar catalog snapshot.
+
+A snapshot is a directory of uncompressed .npy arrays plus a manifest.json:
+string columns are stored as integer codes with a string dictionary, numeric
+columns as typed arrays, and images as the sorted id / packed-link arrays used
+by ImageLookup, plus the sorted posting arrays and id order of the catalog
+index and the postings of the text search index. Arrays are memory-mapped
+read-only on load, so a worker boots without parsing any CSV and all workers
+on a host share one physical copy of the catalog through the page cache. Only
+the process that builds a snapshot writes it; its files are made read-only
+before it is published.
+
+Build it with (from the backend directory):
+
+    python -m services.recommendation.catalog_snapshot api/routes/styles.csv api/routes/images.csv
+"""
+import os
+import sys
+import json
+import stat
+import shutil
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+from services.recommendation.catalog_index import INDEXED_FIELDS, CatalogIndex
+from services.recommendation.image_lookup import ImageLookup
+from services.recommendation.price_index import with_prices
+from services.recommendation.text_search import TextSearchIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent publishers are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 5
+SNAPSHOT_DIRNAME = "catalog_snapshot"
+MANIFEST_FILENAME = "manifest.json"
+
+# Rows without these fields are dropped before anything is recommended
+REQUIRED_COLUMNS = ["baseColour", "season", "usage", "productDisplayName"]
+
+# Low-cardinality string columns, held as integer codes plus a category dictionary
+CATEGORICAL_COLUMNS = ["gender", "masterCategory", "subCategory", "articleType", "baseColour", "season", "usage"]
+
+
+def read_catalog_csv(styles_path: str, images_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load and clean the raw catalog CSVs; every item gets a price (see with_prices)."""
+    data = pd.read_csv(styles_path, on_bad_lines="skip", dtype={c: "category" for c in CATEGORICAL_COLUMNS})
+    images = pd.read_csv(images_path, on_bad_lines="skip")
+    data = with_prices(data.dropna(subset=REQUIRED_COLUMNS))
+    return data, images
+
+
+def source_signature(path: str) -> Dict[str, int]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _smallest_code_dtype(n_categories: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def build_snapshot(styles_path: str, images_path: str, snapshot_dir: Optional[str] = None) -> str:
+    """Compile the CSVs into `snapshot_dir` (default: next to styles.csv)."""
+    if snapshot_dir is None:
+        snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(styles_path)), SNAPSHOT_DIRNAME)
+
+    data, images = read_catalog_csv(styles_path, images_path)
+    lookup = ImageLookup.from_frame(images)
+
+    # Write into a temporary directory and rename, so readers never see half a snapshot
+    tmp_dir = f"{snapshot_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    dictionaries = {}
+    index_fields = []
+    for name in data.columns:
+        column = data[name]
+        if pd.api.types.is_integer_dtype(column) or pd.api.types.is_float_dtype(column):
+            np.save(os.path.join(tmp_dir, f"styles.{name}.npy"), column.to_numpy())
+            columns.append({"name": name, "kind": "numeric"})
+        else:
+            codes, uniques = pd.factorize(column.astype(object), sort=True)
+            codes = codes.astype(_smallest_code_dtype(len(uniques)))
+            np.save(os.path.join(tmp_dir, f"styles.{name}.npy"), codes)
+            dictionaries[name] = [str(v) for v in uniques]
+            columns.append({"name": name, "kind": "categorical"})
+
+            # The index codes are the column codes; only the posting order is extra
+            if name in INDEXED_FIELDS:
+                order, boundaries = CatalogIndex.sort_codes(codes, len(uniques))
+                np.save(os.path.join(tmp_dir, f"index.{name}.order.npy"), order)
+                np.save(os.path.join(tmp_dir, f"index.{name}.boundaries.npy"), boundaries)
+                index_fields.append(name)
+
+    np.save(os.path.join(tmp_dir, "index.id_order.npy"), CatalogIndex.sort_ids(data["id"].to_numpy()))
+
+    search = TextSearchIndex.from_catalog(data)
+    for name in ("offsets", "rows", "weights", "impact"):
+        np.save(os.path.join(tmp_dir, f"search.{name}.npy"), getattr(search, name))
+
+    np.save(os.path.join(tmp_dir, "images.ids.npy"), lookup.ids)
+    np.save(os.path.join(tmp_dir, "images.offsets.npy"), lookup.offsets)
+    np.save(os.path.join(tmp_dir, "images.blob.npy"), np.frombuffer(lookup.blob, dtype=np.uint8))
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "rows": len(data),
+        "columns": columns,
+        "dictionaries": dictionaries,
+        "index_fields": index_fields,
+        "search_terms": list(search.vocab),
+        "image_prefix": lookup.prefix,
+        "sources": {
+            "styles": source_signature(styles_path),
+            "images": source_signature(images_path),
+        },
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f)
+
+    # Readers map the files read-only; make sure nothing else can write them either
+    for filename in os.listdir(tmp_dir):
+        os.chmod(os.path.join(tmp_dir, filename), stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+    if os.path.exists(snapshot_dir):
+        old_dir = f"{snapshot_dir}.old-{os.getpid()}"
+        os.rename(snapshot_dir, old_dir)
+        os.rename(tmp_dir, snapshot_dir)
+        for filename in os.listdir(old_dir):
+            os.unlink(os.path.join(old_dir, filename))
+        os.rmdir(old_dir)
+    else:
+        os.rename(tmp_dir, snapshot_dir)
+
+    logger.info(f"Catalog snapshot written to {snapshot_dir}: {len(data)} styles, {len(lookup)} images")
+    return snapshot_dir
+
+
+def publish_snapshot(styles_path: str, images_path: str, snapshot_dir: Optional[str] = None) -> bool:
+    """Build the snapshot unless a fresh one exists; True when it is usable afterwards.
+
+    Workers starting together take an exclusive file lock, so exactly one of
+    them builds and the others wait for it and then map its files.
+    """
+    if snapshot_dir is None:
+        snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(styles_path)), SNAPSHOT_DIRNAME)
+    if is_snapshot_fresh(snapshot_dir, styles_path, images_path):
+        return True
+    if not (os.path.exists(styles_path) and os.path.exists(images_path)):
+        return False
+
+    with open(f"{snapshot_dir}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            # Another worker may have published it while we waited for the lock
+            if not is_snapshot_fresh(snapshot_dir, styles_path, images_path):
+                build_snapshot(styles_path, images_path, snapshot_dir)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    return True
+
+
+def read_manifest(snapshot_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_snapshot_fresh(snapshot_dir: str, styles_path: str, images_path: str) -> bool:
+    """True when the snapshot exists and was built from the current CSVs.
+
+    A missing CSV does not make the snapshot stale: deployments may ship the
+    snapshot alone.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None or manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return False
+
+    for key, path in (("styles", styles_path), ("images", images_path)):
+        if os.path.exists(path) and manifest["sources"].get(key) != source_signature(path):
+            return False
+    return True
+
+
+def load_snapshot(snapshot_dir: str, mmap: bool = True) -> Tuple[pd.DataFrame, ImageLookup]:
+    """Load a snapshot as a DataFrame of categorical columns plus an ImageLookup."""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No catalog snapshot in {snapshot_dir}")
+
+    mmap_mode = "r" if mmap else None
+
+    def array(filename):
+        return np.load(os.path.join(snapshot_dir, filename), mmap_mode=mmap_mode)
+
+    columns = {}
+    for column in manifest["columns"]:
+        name = column["name"]
+        values = array(f"styles.{name}.npy")
+        if column["kind"] == "categorical":
+            columns[name] = pd.Categorical.from_codes(values, categories=manifest["dictionaries"][name])
+        else:
+            columns[name] = values
+    # copy=False keeps every column a view of its memory-mapped file
+    data = pd.DataFrame(columns, copy=False)
+
+    lookup = ImageLookup(
+        ids=array("images.ids.npy"),
+        prefix=manifest["image_prefix"],
+        offsets=array("images.offsets.npy"),
+        blob=array("images.blob.npy"),
+    )
+    return data, lookup
+
+
+def load_snapshot_index(snapshot_dir: str, data: pd.DataFrame, mmap: bool = True) -> CatalogIndex:
+    """CatalogIndex over a DataFrame from load_snapshot, attached to the stored posting arrays."""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No catalog snapshot in {snapshot_dir}")
+
+    mmap_mode = "r" if mmap else None
+    fields = {}
+    for name in manifest["index_fields"]:
+        order = np.load(os.path.join(snapshot_dir, f"index.{name}.order.npy"), mmap_mode=mmap_mode)
+        boundaries = np.load(os.path.join(snapshot_dir, f"index.{name}.boundaries.npy"), mmap_mode=mmap_mode)
+        fields[name] = (data[name].array.codes, manifest["dictionaries"][name], order, boundaries)
+    id_order = np.load(os.path.join(snapshot_dir, "index.id_order.npy"), mmap_mode=mmap_mode)
+    return CatalogIndex.from_arrays(len(data), fields, data["id"].to_numpy(), id_order)
+
+
+def load_snapshot_search(snapshot_dir: str, mmap: bool = True) -> TextSearchIndex:
+    """TextSearchIndex attached to the postings stored in a snapshot."""
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No catalog snapshot in {snapshot_dir}")
+
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(snapshot_dir, f"search.{name}.npy"), mmap_mode=mmap_mode)
+              for name in ("offsets", "rows", "weights", "impact")}
+    vocab = {term: i for i, term in enumerate(manifest["search_terms"])}
+    return TextSearchIndex(vocab, **arrays)
+
+
+def load_catalog(styles_path: str,
+                 images_path: str,
+                 snapshot_dir: Optional[str] = None) -> Tuple[pd.DataFrame, ImageLookup]:
+    """Load the catalog from its snapshot, or from the CSVs when the snapshot is stale."""
+    if snapshot_dir is None:
+        snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(styles_path)), SNAPSHOT_DIRNAME)
+
+    if is_snapshot_fresh(snapshot_dir, styles_path, images_path):
+        logger.info(f"Loading catalog snapshot from {snapshot_dir}")
+        return load_snapshot(snapshot_dir)
+
+    logger.warning(f"Catalog snapshot at {snapshot_dir} is missing or stale, loading CSVs. "
+                   f"Rebuild it with: python -m services.recommendation.catalog_snapshot {styles_path} {images_path}")
+    data, images = read_catalog_csv(styles_path, images_path)
+    return data, ImageLookup.from_frame(images)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Compile the catalog CSVs into a binary snapshot")
+    parser.add_argument("styles", help="Path to styles.csv")
+    parser.add_argument("images", help="Path to images.csv")
+    parser.add_argument("--out", default=None, help=f"Snapshot directory (default: <styles dir>/{SNAPSHOT_DIRNAME})")
+    args = parser.parse_args()
+
+    try:
+        build_snapshot(args.styles, args.images, args.out)
+    except Exception as e:
+        logger.error(f"Failed to build catalog snapshot: {e}")
+        sys.exit(1)
@@ -0,0 +1,305 @@
+"""Hot-swappable catalog: data, image lookup and indexes behind one reference.
+
+A request reads `store.current` once and keeps using that Catalog, so a reload
+never changes the data under a running request. By default the store publishes
+the binary snapshot before loading, so every worker maps the same read-only
+files and the catalog and its index are held in memory once per host. Reloads build the next Catalog
+on a background thread and then replace the reference in a single assignment;
+the previous Catalog is freed as soon as the last request holding it returns.
+
+Delta files let the catalog change without a full rebuild. They are CSVs in
+`delta_dir`, applied in filename order on top of styles.csv / images.csv.
+Every row has an `op` ("add" or "remove") and an `id`; "add" rows carry the
+styles.csv columns plus an optional `price` and image `link`. Adding an
+existing id replaces that item.
+"""
+import os
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.catalog_snapshot import (
+    MANIFEST_FILENAME, REQUIRED_COLUMNS, SNAPSHOT_DIRNAME, load_catalog, load_snapshot, load_snapshot_index,
+    load_snapshot_search, publish_snapshot, source_signature,
+)
+from services.recommendation.color_harmony import ColorHarmony
+from services.recommendation.complete_the_look import LookIndex
+from services.recommendation.diversity import OutfitReranker
+from services.recommendation.facet_counts import FacetIndex
+from services.recommendation.image_lookup import ImageLookup
+from services.recommendation.price_index import with_prices
+from services.recommendation.similar_items import SimilarItemIndex
+from services.recommendation.text_search import TextSearchIndex
+
+logger = logging.getLogger(__name__)
+
+DELTA_SUFFIX = ".csv"
+
+
+class Catalog(NamedTuple):
+    version: int
+    data: pd.DataFrame
+    image_lookup: ImageLookup
+    index: CatalogIndex
+    harmony: ColorHarmony
+    search: TextSearchIndex
+    similar: SimilarItemIndex
+    looks: LookIndex
+    facets: FacetIndex
+    reranker: OutfitReranker
+
+
+def build_catalog(data: pd.DataFrame,
+                  image_lookup: ImageLookup,
+                  version: int,
+                  index: Optional[CatalogIndex] = None,
+                  search: Optional[TextSearchIndex] = None,
+                  previous: Optional[Catalog] = None) -> Catalog:
+    """Catalog with its color harmony matrix, similar item index, look lists,
+    facet bitsets and outfit reranker, and its inverted and text indexes
+    unless given. Look lists whose candidates did not change since
+    `previous` are reused."""
+    if index is None:
+        index = CatalogIndex(data)
+    if search is None:
+        search = TextSearchIndex.from_catalog(data)
+    harmony = ColorHarmony.from_catalog(data)
+    looks = LookIndex.from_catalog(data, index, harmony, previous.looks if previous is not None else None)
+    return Catalog(version, data, image_lookup, index, harmony, search, SimilarItemIndex.from_catalog(data), looks,
+                   FacetIndex.from_index(index), OutfitReranker.from_catalog(data, index, harmony))
+
+
+def read_delta(path: str) -> pd.DataFrame:
+    delta = pd.read_csv(path, on_bad_lines="skip")
+    missing = {"op", "id"} - set(delta.columns)
+    if missing:
+        raise ValueError(f"Delta file {path} is missing columns {sorted(missing)}")
+    delta["op"] = delta["op"].astype(str).str.strip().str.lower()
+    return delta
+
+
+def apply_delta(data: pd.DataFrame,
+                image_lookup: ImageLookup,
+                delta: pd.DataFrame) -> Tuple[pd.DataFrame, ImageLookup]:
+    """New (data, image_lookup) with the delta's removals and additions applied."""
+    touched = delta["id"].astype(np.int64).to_numpy()
+    kept = data[~np.isin(data["id"].to_numpy(), touched)]
+
+    added = delta[delta["op"] == "add"]
+    added = added.dropna(subset=[c for c in REQUIRED_COLUMNS if c in added.columns])
+    rows = added.reindex(columns=data.columns)
+    if len(rows):
+        rows = with_prices(rows)
+        kept, rows = _align_categories(kept, rows)
+        data = pd.concat([kept, rows], ignore_index=True)
+    else:
+        data = kept.reset_index(drop=True)
+
+    if "link" in added.columns:
+        links = added[added["link"].notna()]
+        if len(links):
+            image_lookup = image_lookup.with_links(links["id"].astype(np.int64).to_numpy(), links["link"].astype(str))
+    return data, image_lookup
+
+
+def _align_categories(data: pd.DataFrame, rows: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Give `rows` the categorical dtypes of `data`, adding new categories where needed.
+
+    pd.concat only keeps a categorical column when both sides share the exact
+    same categories; otherwise the column silently falls back to strings.
+    """
+    data, rows = data.copy(deep=False), rows.copy()
+    for name in data.columns:
+        if not isinstance(data[name].dtype, pd.CategoricalDtype):
+            continue
+        new = pd.Index(rows[name].dropna().unique()).difference(data[name].cat.categories)
+        if len(new):
+            data[name] = data[name].cat.add_categories(new)
+        rows[name] = rows[name].astype(data[name].dtype)
+    return data, rows
+
+
+class CatalogStore:
+    """Holds the live Catalog and rebuilds it in the background on demand.
+
+    Only one rebuild runs at a time. Listeners registered with `on_swap` are
+    called with the new Catalog right after each swap, e.g. to drop caches
+    that hold row positions of the old one.
+    """
+
+    def __init__(self,
+                 styles_path: str,
+                 images_path: str,
+                 snapshot_dir: Optional[str] = None,
+                 delta_dir: Optional[str] = None,
+                 publish: bool = True):
+        self.styles_path = styles_path
+        self.images_path = images_path
+        self.snapshot_dir = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(styles_path)), SNAPSHOT_DIRNAME)
+        self.delta_dir = delta_dir
+        self.publish = publish
+        self.current: Optional[Catalog] = None
+        self.last_error: Optional[str] = None
+        self.last_reload_s: Optional[float] = None
+        self._listeners: List[Callable[[Catalog], None]] = []
+        self._build_lock = threading.Lock()
+        self._base_signature: Dict[str, Optional[Dict[str, int]]] = {}
+        self._applied_deltas: Dict[str, Dict[str, int]] = {}
+        self._watcher: Optional[threading.Thread] = None
+
+    def on_swap(self, listener: Callable[[Catalog], None]) -> None:
+        self._listeners.append(listener)
+
+    def load(self) -> Catalog:
+        """Build the catalog synchronously (startup) and make it current."""
+        with self._build_lock:
+            return self._full_rebuild()
+
+    def reload(self, full: bool = True) -> bool:
+        """Start a background rebuild; False when one is already running.
+
+        `full` reloads the base catalog and every delta file; otherwise only
+        delta files that were not applied yet are added to the current one.
+        """
+        if not self._build_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                if full:
+                    self._full_rebuild()
+                else:
+                    self._apply_new_deltas()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"[ERROR] Catalog reload failed, keeping version {self.version}: {e}")
+            finally:
+                self._build_lock.release()
+
+        threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+        return True
+
+    @property
+    def version(self) -> int:
+        return self.current.version if self.current is not None else 0
+
+    def _swap(self, catalog: Catalog, started: float) -> Catalog:
+        self.current = catalog
+        self.last_error = None
+        self.last_reload_s = time.perf_counter() - started
+        logger.info(f"Catalog version {catalog.version} live: {len(catalog.data)} styles, "
+                    f"{len(catalog.image_lookup)} images, built in {self.last_reload_s:.3f}s")
+        for listener in self._listeners:
+            listener(catalog)
+        return catalog
+
+    def _full_rebuild(self) -> Catalog:
+        started = time.perf_counter()
+        data, image_lookup, index, search = self._load_base()
+        base_signature = self._signature_of_base()
+
+        deltas = self._delta_files()
+        for name, path in deltas.items():
+            data, image_lookup = apply_delta(data, image_lookup, read_delta(path))
+        if deltas:
+            # Patched rows live in this process only, and so do their indexes
+            index = search = None
+
+        catalog = build_catalog(data, image_lookup, self.version + 1, index, search, previous=self.current)
+        self._base_signature = base_signature
+        self._applied_deltas = {name: source_signature(path) for name, path in deltas.items()}
+        return self._swap(catalog, started)
+
+    def _apply_new_deltas(self) -> Optional[Catalog]:
+        current = self.current
+        new = {name: path for name, path in self._delta_files().items() if name not in self._applied_deltas}
+        if current is None or not new:
+            return current
+
+        started = time.perf_counter()
+        data, image_lookup = current.data, current.image_lookup
+        for name, path in new.items():
+            data, image_lookup = apply_delta(data, image_lookup, read_delta(path))
+            logger.info(f"Applied catalog delta {name}")
+
+        catalog = build_catalog(data, image_lookup, current.version + 1, previous=current)
+        self._applied_deltas.update({name: source_signature(path) for name, path in new.items()})
+        return self._swap(catalog, started)
+
+    def _load_base(self) -> Tuple[pd.DataFrame, ImageLookup, Optional[CatalogIndex], Optional[TextSearchIndex]]:
+        if self.publish:
+            try:
+                if publish_snapshot(self.styles_path, self.images_path, self.snapshot_dir):
+                    data, image_lookup = load_snapshot(self.snapshot_dir)
+                    return (data, image_lookup, load_snapshot_index(self.snapshot_dir, data),
+                            load_snapshot_search(self.snapshot_dir))
+            except OSError as e:
+                logger.warning(f"Could not publish catalog snapshot to {self.snapshot_dir}, loading privately: {e}")
+        data, image_lookup = load_catalog(self.styles_path, self.images_path, self.snapshot_dir)
+        return data, image_lookup, None, None
+
+    def _signature_of_base(self) -> Dict[str, Optional[Dict[str, int]]]:
+        paths = {
+            "styles": self.styles_path,
+            "images": self.images_path,
+            "snapshot": os.path.join(self.snapshot_dir, MANIFEST_FILENAME),
+        }
+        return {key: source_signature(path) if os.path.exists(path) else None for key, path in paths.items()}
+
+    def _delta_files(self) -> Dict[str, str]:
+        if not self.delta_dir or not os.path.isdir(self.delta_dir):
+            return {}
+        names = sorted(name for name in os.listdir(self.delta_dir) if name.endswith(DELTA_SUFFIX))
+        return {name: os.path.join(self.delta_dir, name) for name in names}
+
+    def pending_change(self) -> Optional[str]:
+        """Kind of reload the files on disk call for: "full", "delta" or None.
+
+        Changed base files, or a changed or deleted delta that was already
+        applied, need a full rebuild; new delta files can be added on top.
+        """
+        if self._signature_of_base() != self._base_signature:
+            return "full"
+        deltas = self._delta_files()
+        for name, signature in self._applied_deltas.items():
+            if name not in deltas or source_signature(deltas[name]) != signature:
+                return "full"
+        if any(name not in self._applied_deltas for name in deltas):
+            return "delta"
+        return None
+
+    def watch(self, interval_seconds: float) -> None:
+        """Poll the catalog files every `interval_seconds` and reload when they change."""
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    change = self.pending_change()
+                except OSError as e:
+                    logger.warning(f"Catalog watch failed: {e}")
+                    continue
+                if change is not None:
+                    logger.info(f"Catalog files changed, starting {change} reload")
+                    self.reload(full=change == "full")
+
+        self._watcher = threading.Thread(target=run, name="catalog-watch", daemon=True)
+        self._watcher.start()
+
+    def stats(self) -> Dict[str, object]:
+        current = self.current
+        return {
+            "version": self.version,
+            "rows": len(current.data) if current is not None else 0,
+            "images": len(current.image_lookup) if current is not None else 0,
+            "applied_deltas": sorted(self._applied_deltas),
+            "reloading": self._build_lock.locked(),
+            "last_reload_s": self.last_reload_s,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,352 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.recommendation.catalog_index import OutfitPools
+from services.recommendation.outfit_generator import sample_unique_triples
+from services.recommendation.price_index import affordable, count_within_budget, sample_within_budget
+
+logger = logging.getLogger(__name__)
+
+# Color harmony maps
+COMPLEMENTARY_MAP = {
+    "Navy Blue": ["Orange", "Copper"],
+    "Blue": ["Orange", "Gold"],
+    "Silver": ["Black", "Charcoal"],
+    "Black": ["White", "Beige"],
+    "Grey": ["Maroon", "Burgundy"],
+    "Green": ["Red", "Maroon"],
+    "Purple": ["Yellow", "Gold"],
+    "White": ["Black", "Navy Blue"],
+    "Beige": ["Brown", "Burgundy"],
+    "Brown": ["Beige", "Cream"],
+    "Bronze": ["Turquoise Blue", "Teal"],
+    "Teal": ["Orange", "Copper"],
+    "Copper": ["Blue", "Teal"],
+    "Pink": ["Green", "Olive"],
+    "Off White": ["Charcoal", "Navy Blue"],
+    "Maroon": ["Grey", "Teal"],
+    "Red": ["Green", "Teal"],
+    "Khaki": ["Brown", "Olive"],
+    "Orange": ["Blue", "Teal"],
+    "Yellow": ["Purple", "Lavender"],
+    "Charcoal": ["Off White", "Beige"],
+    "Gold": ["Blue", "Navy Blue"],
+    "Steel": ["Rust", "Copper"],
+    "Tan": ["Brown", "Burgundy"],
+    "Multi": ["Depends on context"],
+    "Magenta": ["Lime Green", "Sea Green"],
+    "Lavender": ["Peach", "Pink"],
+    "Sea Green": ["Magenta", "Maroon"],
+    "Cream": ["Burgundy", "Coffee Brown"],
+    "Peach": ["Lavender", "Turquoise Blue"],
+    "Olive": ["Pink", "Beige"],
+    "Skin": ["Nude", "Beige"],
+    "Burgundy": ["Cream", "Olive"],
+    "Coffee Brown": ["Cream", "Beige"],
+    "Grey Melange": ["Rust", "Steel"],
+    "Rust": ["Steel", "Turquoise Blue"],
+    "Rose": ["Olive", "Sea Green"],
+    "Lime Green": ["Magenta", "Lavender"],
+    "Mauve": ["Peach", "Turquoise Blue"],
+    "Turquoise Blue": ["Bronze", "Rust"],
+    "Metallic": ["Depends on shade"],
+    "Mustard": ["Navy Blue", "Teal"],
+    "Taupe": ["Grey", "Charcoal"],
+    "Nude": ["Beige", "Cream"],
+    "Mushroom Brown": ["Beige", "Tan"],
+    "Fluorescent Green": ["Magenta", "Pink"],
+}
+
+# Analogous color relationships
+ANALOGOUS_MAP = {
+    "Navy Blue": ["Blue", "Steel", "Charcoal"],
+    "Blue": ["Navy Blue", "Teal", "Turquoise Blue"],
+    "Silver": ["Grey", "White", "Steel"],
+    "Black": ["Charcoal", "Grey", "Steel"],
+    "Grey": ["Silver", "Charcoal", "Steel"],
+    "Green": ["Sea Green", "Olive", "Teal"],
+    "Purple": ["Magenta", "Lavender", "Mauve"],
+    "White": ["Off White", "Cream", "Silver"],
+    "Beige": ["Tan", "Cream", "Nude"],
+    "Brown": ["Burgundy", "Coffee Brown", "Khaki"],
+    "Bronze": ["Copper", "Gold", "Rust"],
+    "Teal": ["Turquoise Blue", "Green", "Sea Green"],
+    "Copper": ["Bronze", "Rust", "Steel"],
+    "Pink": ["Rose", "Lavender", "Mauve"],
+    "Off White": ["Cream", "White", "Beige"],
+    "Maroon": ["Burgundy", "Rust", "Brown"],
+    "Red": ["Maroon", "Rust", "Burgundy"],
+    "Khaki": ["Olive", "Tan", "Brown"],
+    "Orange": ["Mustard", "Rust", "Copper"],
+    "Yellow": ["Mustard", "Gold", "Peach"],
+    "Charcoal": ["Grey", "Black", "Steel"],
+    "Gold": ["Mustard", "Bronze", "Copper"],
+    "Steel": ["Silver", "Charcoal", "Grey"],
+    "Tan": ["Beige", "Cream", "Brown"],
+    "Multi": ["Depends on the dominant colors"],
+    "Magenta": ["Purple", "Lavender", "Mauve"],
+    "Lavender": ["Pink", "Peach", "Mauve"],
+    "Sea Green": ["Teal", "Green", "Turquoise Blue"],
+    "Cream": ["Beige", "Off White", "Nude"],
+    "Peach": ["Orange", "Lavender", "Pink"],
+    "Olive": ["Khaki", "Green", "Brown"],
+    "Skin": ["Nude", "Beige", "Cream"],
+    "Burgundy": ["Maroon", "Brown", "Rust"],
+    "Coffee Brown": ["Brown", "Beige", "Burgundy"],
+    "Grey Melange": ["Grey", "Silver", "Steel"],
+    "Rust": ["Copper", "Orange", "Bronze"],
+    "Rose": ["Pink", "Mauve", "Lavender"],
+    "Lime Green": ["Fluorescent Green", "Yellow", "Sea Green"],
+    "Mauve": ["Lavender", "Pink", "Peach"],
+    "Turquoise Blue": ["Teal", "Sea Green", "Blue"],
+    "Metallic": ["Depends on shade"],
+    "Mustard": ["Gold", "Yellow", "Khaki"],
+    "Taupe": ["Grey", "Charcoal", "Brown"],
+    "Nude": ["Beige", "Skin", "Cream"],
+    "Mushroom Brown": ["Beige", "Tan", "Brown"],
+    "Fluorescent Green": ["Lime Green", "Sea Green", "Teal"],
+}
+
+NEUTRALS = {"Black", "White", "Beige", "Cream", "Off White", "Grey", "Charcoal", "Steel", "Taupe", "Mushroom Brown"}
+
+# Representative sRGB value per color name, for measuring how close two colors look.
+# Mixed or shade-dependent names ("Multi", "Metallic") have none
+COLOR_HEX = {
+    "Beige": "#D8C8A8", "Black": "#111111", "Blue": "#2A5DB0", "Bronze": "#A7702F",
+    "Brown": "#6B4226", "Burgundy": "#7A1F35", "Charcoal": "#36454F", "Coffee Brown": "#4B3621",
+    "Copper": "#B87333", "Cream": "#F3E9D2", "Fluorescent Green": "#39FF14", "Gold": "#D4AF37",
+    "Green": "#2E8B3D", "Grey": "#8C8C8C", "Grey Melange": "#A3A3A3", "Khaki": "#BDB07A",
+    "Lavender": "#B9A7D9", "Light Blue": "#A7C7E7", "Lime Green": "#7FD13B", "Magenta": "#C2185B",
+    "Maroon": "#6E1423", "Mauve": "#B784A7", "Mushroom Brown": "#A3917B", "Mustard": "#D4A017",
+    "Navy Blue": "#1B2A4A", "Nude": "#E3BC9A", "Off White": "#F4F1E8", "Olive": "#6B6B2F",
+    "Orange": "#F28C28", "Peach": "#F6B89A", "Pink": "#F08CAE", "Purple": "#6A3D9A",
+    "Red": "#C62828", "Rose": "#D9737F", "Rust": "#A94B26", "Sea Green": "#2E9E7A",
+    "Silver": "#C0C0C0", "Skin": "#E1B899", "Steel": "#71797E", "Tan": "#C8A27A",
+    "Taupe": "#8B7D6B", "Teal": "#1F7A7A", "Turquoise Blue": "#30B5C8", "White": "#FAFAFA",
+    "Yellow": "#F5D33A",
+}
+
+# Pairwise scores; a pair takes the best relationship found in either direction
+COMPLEMENTARY_SCORE = 1.0
+ANALOGOUS_SCORE = 0.75
+NEUTRAL_SCORE = 0.5
+SAME_COLOR_SCORE = 0.5
+
+
+class ColorHarmony:
+    """Color names compiled into integer ids and a pairwise compatibility matrix.
+
+    The last id is reserved for colors the maps do not know about; it scores
+    zero against everything. Outfits are scored on color ids, so ranking cost
+    depends on the number of distinct colors per slot, not on the pool sizes.
+    """
+
+    def __init__(self, extra_colors: Iterable[str] = ()):
+        names = set(COMPLEMENTARY_MAP) | set(ANALOGOUS_MAP) | NEUTRALS | {c for c in extra_colors if isinstance(c, str)}
+        self.colors: List[str] = sorted(names)
+        self.color_id: Dict[str, int] = {name: i for i, name in enumerate(self.colors)}
+        self.unknown_id = len(self.colors)
+        self.matrix = self._build_matrix()
+        # Color id per catalog baseColour code, and the per-row codes; filled
+        # in by from_catalog. The codes are the catalog's own array, not a copy
+        self.code_color_ids = np.array([self.unknown_id], dtype=np.int16)
+        self.row_codes = np.empty(0, dtype=np.int8)
+
+    @classmethod
+    def from_catalog(cls, data: pd.DataFrame) -> "ColorHarmony":
+        colors = data["baseColour"]
+        if not isinstance(colors.dtype, pd.CategoricalDtype):
+            colors = colors.astype("category")
+        harmony = cls(colors.cat.categories)
+        # Code -1 (missing color) indexes the trailing unknown id
+        harmony.code_color_ids = np.append(harmony.ids_for(colors.cat.categories), np.int16(harmony.unknown_id))
+        harmony.row_codes = colors.array.codes
+        logger.info(f"Color harmony matrix built for {len(harmony.colors)} colors")
+        return harmony
+
+    def row_color_ids(self, positions: np.ndarray) -> np.ndarray:
+        """Color ids of the catalog rows at `positions`."""
+        return self.code_color_ids[self.row_codes[positions]]
+
+    def _build_matrix(self) -> np.ndarray:
+        size = len(self.colors) + 1
+        matrix = np.zeros((size, size), dtype=np.float32)
+
+        def relate(pairs_map, score):
+            for color, related in pairs_map.items():
+                for other in related:
+                    # Skip placeholder entries such as "Depends on context"
+                    if color in self.color_id and other in self.color_id:
+                        i, j = self.color_id[color], self.color_id[other]
+                        matrix[i, j] = matrix[j, i] = max(matrix[i, j], score)
+
+        relate(ANALOGOUS_MAP, ANALOGOUS_SCORE)
+        relate(COMPLEMENTARY_MAP, COMPLEMENTARY_SCORE)
+
+        neutral_ids = [self.color_id[c] for c in NEUTRALS]
+        known = slice(0, len(self.colors))
+        matrix[neutral_ids, known] = np.maximum(matrix[neutral_ids, known], NEUTRAL_SCORE)
+        matrix[known, neutral_ids] = np.maximum(matrix[known, neutral_ids], NEUTRAL_SCORE)
+
+        diagonal = np.arange(len(self.colors))
+        matrix[diagonal, diagonal] = np.maximum(matrix[diagonal, diagonal], SAME_COLOR_SCORE)
+        return matrix
+
+    def ids_for(self, colors: Iterable[str]) -> np.ndarray:
+        """Color ids for a sequence of color names (unknown names get `unknown_id`)."""
+        return np.fromiter((self.color_id.get(c, self.unknown_id) for c in colors), dtype=np.int16)
+
+    def triple_scores(self, top_ids: np.ndarray, bottom_ids: np.ndarray, foot_ids: np.ndarray) -> np.ndarray:
+        """Score of every (top, bottom, foot) color combination, shape (T, B, F)."""
+        m = self.matrix
+        return (m[np.ix_(top_ids, bottom_ids)][:, :, None]
+                + m[np.ix_(top_ids, foot_ids)][:, None, :]
+                + m[np.ix_(bottom_ids, foot_ids)][None, :, :])
+
+    def top_k_triples(self,
+                      pools: OutfitPools,
+                      k: int,
+                      rng: np.random.Generator,
+                      prices: Optional[OutfitPools] = None,
+                      budget: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The `k` most harmonious distinct outfits from the candidate pools.
+
+        Returns (triples, scores): catalog row positions of shape (k, 3) sorted
+        by descending score. Ties are spread round-robin over color
+        combinations in random order, so repeated calls stay varied.
+
+        With a `budget` (in cents) only outfits whose total price fits are
+        returned; `prices` then holds every pool's prices in cents, with each
+        pool sorted by price (see PriceSegment).
+        """
+        # Group every slot's candidates by color id; the stable sort keeps each group sorted by price
+        groups = []
+        for slot, pool in enumerate(pools):
+            ids = self.row_color_ids(pool)
+            order = np.argsort(ids, kind="stable")
+            unique_ids, counts = np.unique(ids[order], return_counts=True)
+            bounds = np.concatenate(([0], np.cumsum(counts)))
+            groups.append((pool[order], unique_ids, counts, bounds, prices[slot][order] if budget is not None else None))
+
+        (_, top_ids, top_n, _, _), (_, bottom_ids, bottom_n, _, _), (_, foot_ids, foot_n, _, _) = groups
+        scores = self.triple_scores(top_ids, bottom_ids, foot_ids).ravel()
+        capacity = (top_n[:, None, None] * bottom_n[None, :, None] * foot_n[None, None, :]).ravel()
+        shape = (len(top_ids), len(bottom_ids), len(foot_ids))
+
+        # Random order first, then a stable sort by score keeps ties shuffled
+        order = rng.permutation(len(scores))
+        order = order[np.argsort(-scores[order], kind="stable")]
+        budget_tops = {}
+        if budget is not None:
+            budget_tops = self._budget_capacity(groups, shape, capacity, order, scores[order], budget, k, rng)
+        allocation = self._allocate(scores[order], capacity[order], k)
+
+        triples, triple_scores = [], []
+        for flat, wanted in zip(order[allocation > 0], allocation[allocation > 0]):
+            slot_groups = np.unravel_index(flat, shape)
+            if flat in budget_tops:
+                sizes, tops = budget_tops[flat]
+                segments = [(positions[bounds[g]:bounds[g] + size], cents[bounds[g]:bounds[g] + size])
+                            for (positions, _, _, bounds, cents), g, size in zip(groups, slot_groups, sizes)]
+                picks = sample_within_budget(*(cents for _, cents in segments), budget, tops, int(wanted), rng)
+                triples.append(np.column_stack([positions[i] for (positions, _), i in zip(segments, picks)]))
+            else:
+                sub_pools = OutfitPools(*[
+                    positions[bounds[g]:bounds[g + 1]]
+                    for (positions, _, _, bounds, _), g in zip(groups, slot_groups)
+                ])
+                triples.append(sample_unique_triples(sub_pools, int(wanted), rng))
+            triple_scores.append(np.full(int(wanted), scores[flat], dtype=np.float32))
+
+        if not triples:
+            return np.empty((0, 3), dtype=np.int64), np.empty(0, dtype=np.float32)
+        return np.concatenate(triples), np.concatenate(triple_scores)
+
+    @staticmethod
+    def _budget_capacity(groups,
+                         shape: Tuple[int, int, int],
+                         capacity: np.ndarray,
+                         order: np.ndarray,
+                         sorted_scores: np.ndarray,
+                         budget: int,
+                         k: int,
+                         rng: np.random.Generator) -> Dict:
+        """Cut `capacity` down to the outfits each color combination has within `budget`.
+
+        Combinations whose cheapest outfit is over budget get nothing, and
+        those whose dearest one fits keep their full capacity. The rest are
+        counted (up to `k` each) a score level at a time, best first, only
+        until the levels seen so far hold `k` outfits; lower levels are never
+        allocated from after that, so they are left at zero. Returns, for the
+        counted combinations, the affordable prefix length of every slot and
+        the tops the count covered.
+        """
+        mins, maxs = [], []
+        for _, _, _, bounds, cents in groups:
+            mins.append(cents[bounds[:-1]])
+            maxs.append(cents[bounds[1:] - 1])
+        cheapest = (mins[0][:, None, None] + mins[1][None, :, None] + mins[2][None, None, :]).ravel()
+        dearest = (maxs[0][:, None, None] + maxs[1][None, :, None] + maxs[2][None, None, :]).ravel()
+        capacity[cheapest > budget] = 0
+        partial = (cheapest <= budget) & (dearest > budget)
+
+        budget_tops = {}
+        found = 0
+        levels = np.flatnonzero(np.diff(sorted_scores, prepend=np.inf))
+        bounds = np.append(levels, len(sorted_scores))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            level = order[start:end]
+            if found >= k:
+                capacity[level] = 0
+                continue
+            for flat in level[partial[level]]:
+                slot_cents = [cents[group_bounds[g]:group_bounds[g + 1]]
+                              for (_, _, _, group_bounds, cents), g in zip(groups, np.unravel_index(flat, shape))]
+                sizes = affordable(*slot_cents, budget)
+                slot_cents = [cents[:size] for cents, size in zip(slot_cents, sizes)]
+                tops, count = count_within_budget(*slot_cents, budget, k, rng)
+                capacity[flat] = count
+                budget_tops[int(flat)] = (sizes, tops)
+            found += int(capacity[level].sum())
+        return budget_tops
+
+    @staticmethod
+    def _allocate(sorted_scores: np.ndarray, capacity: np.ndarray, k: int) -> np.ndarray:
+        """How many outfits to take from each color combination (already sorted by score).
+
+        Higher scores are exhausted first; within one score level outfits are
+        handed out one per combination per round.
+        """
+        allocation = np.zeros(len(capacity), dtype=np.int64)
+        remaining = k
+        levels = np.flatnonzero(np.diff(sorted_scores, prepend=np.inf))
+        bounds = np.append(levels, len(sorted_scores))
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if remaining <= 0:
+                break
+            level_capacity = capacity[start:end]
+            if level_capacity.sum() <= remaining:
+                allocation[start:end] = level_capacity
+                remaining -= int(level_capacity.sum())
+                continue
+
+            # Smallest number of full rounds that covers what is still needed
+            lo, hi = 0, int(level_capacity.max())
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if np.minimum(level_capacity, mid).sum() >= remaining:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            taken = np.minimum(level_capacity, lo - 1)
+            leftover = remaining - int(taken.sum())
+            # The last, partial round goes to the first combinations that still have room
+            extra = np.flatnonzero(level_capacity >= lo)[:leftover]
+            taken[extra] += 1
+            allocation[start:end] = taken
+            remaining = 0
+
+        return allocation
@@ -0,0 +1,159 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.color_harmony import ColorHarmony
+
+logger = logging.getLogger(__name__)
+
+# Ranked matches kept per look and slot
+LOOK_SIZE = 20
+
+SLOTS = ("bottomwear", "footwear")
+
+LookKey = Tuple[str, str, str]
+
+
+class LookIndex:
+    """Precomputed "complete the look" matches for every topwear item.
+
+    A topwear item's matches depend only on its gender, usage and color, its
+    "look": bottomwear of the same gender and usage and footwear of the same
+    gender (the /recommend filters), ranked by color harmony with the top.
+    Lists are computed once per look rather than per item and stored per slot
+    as CSR arrays of item ids and scores, so a lookup is a dict hit and a
+    slice. Ids rather than row positions keep the lists valid across catalog
+    versions.
+
+    Within one harmony score, items are taken round-robin across colors in
+    catalog order, so a list is not twenty items of one shade; only the first
+    LOOK_SIZE items of each color can ever be ranked, which keeps building
+    cheap. Each list is keyed by a digest of those candidates, so a rebuild
+    after a catalog change recomputes only the lists whose candidates changed.
+    """
+
+    def __init__(self,
+                 looks: Dict[LookKey, int],
+                 offsets: Dict[str, np.ndarray],
+                 ids: Dict[str, np.ndarray],
+                 scores: Dict[str, np.ndarray],
+                 digests: Dict[str, List[bytes]]):
+        self.looks = looks
+        self.offsets = offsets
+        self.ids = ids
+        self.scores = scores
+        self.digests = digests
+
+    @classmethod
+    def from_catalog(cls,
+                     data: pd.DataFrame,
+                     index: CatalogIndex,
+                     harmony: ColorHarmony,
+                     previous: Optional["LookIndex"] = None) -> "LookIndex":
+        item_ids = data["id"].to_numpy()
+        gender_codes, usage_codes, color_codes = (index.codes[f] for f in ("gender", "usage", "baseColour"))
+        genders, usages, colors = (list(index.vocab[f]) for f in ("gender", "usage", "baseColour"))
+        # Harmony id per color code; code -1 (missing color) indexes the trailing unknown id
+        code_color_ids = np.append(harmony.ids_for(colors), np.int16(harmony.unknown_id))
+        palette = hashlib.blake2b("\n".join(harmony.colors).encode(), digest_size=16).digest()
+
+        # One look per distinct (gender, usage, color) among topwear
+        tops = index.candidates(subCategory=["Topwear"])
+        tops = tops[(gender_codes[tops] >= 0) & (usage_codes[tops] >= 0)]
+        # The key space is small, so a dense count finds the looks in one pass
+        n_colors = len(colors) + 1
+        keys = (gender_codes[tops].astype(np.int64) * len(usages) + usage_codes[tops]) * n_colors + color_codes[tops] + 1
+        present = np.flatnonzero(np.bincount(keys, minlength=len(genders) * len(usages) * n_colors))
+        pairs, look_colors = np.divmod(present, n_colors)
+        look_codes = zip(*np.divmod(pairs, len(usages)), look_colors - 1)
+
+        # Candidate pools per slot: bottomwear by (gender, usage), footwear by gender
+        bottoms = index.candidates(subCategory=["Bottomwear"])
+        bottoms = bottoms[(gender_codes[bottoms] >= 0) & (usage_codes[bottoms] >= 0)]
+        feet = index.candidates(masterCategory=["Footwear"])
+        feet = feet[gender_codes[feet] >= 0]
+        pools = {
+            "bottomwear": cls._group(bottoms, gender_codes[bottoms].astype(np.int64) * len(usages) + usage_codes[bottoms]),
+            "footwear": cls._group(feet, gender_codes[feet]),
+        }
+        prepared = {slot: {} for slot in SLOTS}
+
+        reused = computed = 0
+        looks: Dict[LookKey, int] = {}
+        lists = {slot: [] for slot in SLOTS}
+        digests = {slot: [] for slot in SLOTS}
+        previous_lists = previous.list_digests() if previous is not None else {}
+
+        for gender, usage, color in look_codes:
+            looks[(str(genders[gender]), str(usages[usage]), str(colors[color]) if color >= 0 else "")] = len(looks)
+            top_color_id = code_color_ids[color]
+            for slot, pool_key in (("bottomwear", int(gender * len(usages) + usage)), ("footwear", int(gender))):
+                if pool_key not in prepared[slot]:
+                    rows = pools[slot].get(pool_key, np.empty(0, dtype=np.int32))
+                    prepared[slot][pool_key] = cls._candidates(rows, item_ids, code_color_ids[color_codes[rows]], palette)
+                candidate_ids, candidate_colors, candidate_rank, pool_digest = prepared[slot][pool_key]
+
+                digest = pool_digest + int(top_color_id).to_bytes(2, "little")
+                if digest in previous_lists.get(slot, {}):
+                    ranked = previous_lists[slot][digest]
+                    reused += 1
+                else:
+                    score = harmony.matrix[top_color_id, candidate_colors]
+                    order = np.lexsort((candidate_colors, candidate_rank, -score))[:LOOK_SIZE]
+                    ranked = (candidate_ids[order], score[order])
+                    computed += 1
+                lists[slot].append(ranked)
+                digests[slot].append(digest)
+
+        offsets, ids, scores = {}, {}, {}
+        for slot in SLOTS:
+            lengths = [len(slot_ids) for slot_ids, _ in lists[slot]]
+            offsets[slot] = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+            ids[slot] = np.concatenate([slot_ids for slot_ids, _ in lists[slot]] or [np.empty(0, dtype=np.int64)])
+            scores[slot] = np.concatenate([s for _, s in lists[slot]] or [np.empty(0, dtype=np.float32)])
+
+        logger.info(f"Complete-the-look lists for {len(looks)} topwear looks: {computed} computed, {reused} reused")
+        return cls(looks, offsets, ids, scores, digests)
+
+    @staticmethod
+    def _group(rows: np.ndarray, keys: np.ndarray) -> Dict[int, np.ndarray]:
+        """Rows split by key, each part still in catalog order."""
+        order = np.argsort(keys, kind="stable")
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        return {int(key): rows[order[bounds[i]:bounds[i + 1]]] for i, key in enumerate(unique_keys)}
+
+    @staticmethod
+    def _candidates(rows: np.ndarray, item_ids: np.ndarray, color_ids: np.ndarray, palette: bytes):
+        """(ids, color ids, rank within color, digest) of the first LOOK_SIZE items of each color in a pool."""
+        order = np.argsort(color_ids, kind="stable")
+        sorted_colors = color_ids[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_colors, sorted_colors)
+        keep = rank < LOOK_SIZE
+        ids, colors, rank = item_ids[rows[order][keep]], sorted_colors[keep], rank[keep]
+        digest = hashlib.blake2b(palette + ids.tobytes() + colors.tobytes(), digest_size=16).digest()
+        return ids, colors, rank, digest
+
+    def list_digests(self) -> Dict[str, Dict[bytes, Tuple[np.ndarray, np.ndarray]]]:
+        """Per slot, each list's digest mapped to its (ids, scores), for reuse by the next build."""
+        return {
+            slot: {digest: self._slice(slot, i) for i, digest in enumerate(self.digests[slot])}
+            for slot in SLOTS
+        }
+
+    def _slice(self, slot: str, look: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.offsets[slot][look], self.offsets[slot][look + 1]
+        return self.ids[slot][start:end], self.scores[slot][start:end]
+
+    def matches(self, gender: str, usage: str, color: str, slot: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(item ids, harmony scores) of the ranked `slot` matches for a topwear look; empty if unknown."""
+        look = self.looks.get((gender, usage, color))
+        if look is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self._slice(slot, look)
+
+    def stats(self) -> Dict[str, int]:
+        return {"looks": len(self.looks), **{f"{slot}_ids": len(self.ids[slot]) for slot in SLOTS}}
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Optional, Tuple
+
+from services.recommendation.catalog_index import CatalogIndex, OutfitPools
+from services.recommendation.color_harmony import COLOR_HEX, ColorHarmony
+from services.recommendation.skin_tone_palette import parse_hex, rgb_to_lab
+
+logger = logging.getLogger(__name__)
+
+# Harmony-ranked outfits the reranker picks from: CANDIDATES_PER_OUTFIT per
+# outfit asked for, up to RERANK_CANDIDATES for a session's worth. Drawing the
+# candidates costs more than the rerank, so a 3-outfit request only draws 150
+RERANK_CANDIDATES = 2000
+CANDIDATES_PER_OUTFIT = 50
+
+# CIELAB distance (delta E) at which two colors stop counting as similar at all
+COLOR_SIMILARITY_RANGE = 50.0
+
+# Similarity of two different article types of the same family (subCategory)
+SAME_FAMILY_SIMILARITY = 0.5
+
+# Share of an item's similarity that comes from its color; the rest is its article type
+COLOR_SHARE = 0.5
+
+
+class OutfitReranker:
+    """Maximal marginal relevance (MMR) reranking of outfit candidates.
+
+    Two items are similar by color (closeness in CIELAB, over the harmony
+    color ids) and by article type (same type, or same family); an outfit's
+    similarity to another is the mean over its three slots, so repeating a
+    top counts as much as repeating a color. Each pick keeps the running
+    maximum similarity of every candidate to the picks so far, so selecting
+    k of n outfits is k vectorized passes of a few table lookups over n.
+    """
+
+    def __init__(self,
+                 harmony: ColorHarmony,
+                 color_similarity: np.ndarray,
+                 row_types: np.ndarray,
+                 type_similarity: np.ndarray):
+        self.harmony = harmony
+        self.color_similarity = color_similarity
+        self.row_types = row_types
+        self.type_similarity = type_similarity
+
+    @classmethod
+    def from_catalog(cls, data: pd.DataFrame, index: CatalogIndex, harmony: ColorHarmony) -> "OutfitReranker":
+        # One row per harmony color id; names without a shade (and the unknown id) only match themselves
+        lab = np.array([rgb_to_lab(parse_hex(COLOR_HEX[name])) if name in COLOR_HEX else (np.nan,) * 3
+                        for name in harmony.colors] + [(np.nan,) * 3])
+        distance = np.sqrt(((lab[:, None, :] - lab[None, :, :]) ** 2).sum(axis=-1))
+        color_similarity = np.nan_to_num(np.clip(1 - distance / COLOR_SIMILARITY_RANGE, 0, 1)).astype(np.float32)
+        np.fill_diagonal(color_similarity, 1)
+
+        # Family of every article type, from its first row; code -1 (missing type) is the trailing entry
+        type_codes = index.codes["articleType"]
+        n_types = len(index.vocab["articleType"])
+        _, first_rows = np.unique(type_codes, return_index=True)
+        families = np.full(n_types + 1, -1, dtype=np.int64)
+        families[type_codes[first_rows]] = index.codes["subCategory"][first_rows]
+        families[n_types] = -1
+        same_family = (families[:, None] == families[None, :]) & (families[:, None] >= 0)
+        type_similarity = np.where(same_family, SAME_FAMILY_SIMILARITY, 0).astype(np.float32)
+        np.fill_diagonal(type_similarity, 1)
+
+        logger.info(f"Outfit reranker built for {len(harmony.colors)} colors and {n_types} article types")
+        return cls(harmony, color_similarity, type_codes, type_similarity)
+
+    def rerank(self, triples: np.ndarray, relevance: np.ndarray, k: int, diversity: float) -> np.ndarray:
+        """Indices into `triples` of `k` outfits picked by MMR, in pick order.
+
+        Every pick maximizes (1 - diversity) * relevance - diversity * (its
+        highest similarity to an earlier pick), with relevance scaled to
+        [0, 1]; a `diversity` of 0 keeps the relevance order and 1 ignores it.
+        """
+        n = len(triples)
+        k = min(k, n)
+        if k <= 0:
+            # No candidates (e.g. none fits the budget) or nothing asked for
+            return np.empty(0, dtype=np.int64)
+        if diversity <= 0:
+            return np.argsort(-relevance, kind="stable")[:k]
+
+        # Candidates only differ in (color, article type) per slot: compile each slot into a few
+        # "kinds" with a small kind-to-kind similarity table, pre-weighted so a pick's similarity
+        # to every candidate is one 1-D lookup per slot
+        colors = self.harmony.row_color_ids(triples).astype(np.int64)
+        # Type code -1 (missing) wraps to the trailing entry
+        types = self.row_types[triples].astype(np.int64) % len(self.type_similarity)
+        kinds, kind_similarity = [], []
+        for slot in range(3):
+            keys, inverse = np.unique(colors[:, slot] * len(self.type_similarity) + types[:, slot], return_inverse=True)
+            kind_colors, kind_types = np.divmod(keys, len(self.type_similarity))
+            kind_similarity.append(np.float32(COLOR_SHARE / 3) * self.color_similarity[np.ix_(kind_colors, kind_colors)]
+                                   + np.float32((1 - COLOR_SHARE) / 3) * self.type_similarity[np.ix_(kind_types, kind_types)])
+            kinds.append(inverse.astype(np.intp).ravel())
+
+        spread = relevance.max() - relevance.min()
+        scaled = (relevance - relevance.min()) / spread if spread > 0 else np.zeros(n)
+        gain = ((1 - diversity) * scaled).astype(np.float32)
+
+        # score = gain - diversity * (highest similarity to a pick so far), lowered after every pick
+        score = gain.copy()
+        similarity = np.empty(n, dtype=np.float32)
+        picked = np.empty(k, dtype=np.int64)
+        for step in range(k):
+            pick = int(np.argmax(score))
+            picked[step] = pick
+            kind_similarity[0][kinds[0][pick]].take(kinds[0], out=similarity)
+            similarity += kind_similarity[1][kinds[1][pick]].take(kinds[1])
+            similarity += kind_similarity[2][kinds[2][pick]].take(kinds[2])
+            similarity *= np.float32(-diversity)
+            similarity += gain
+            np.minimum(score, similarity, out=score)
+            # Picked outfits never win again
+            score[pick] = -np.inf
+        return picked
+
+    def top_k(self,
+              pools: OutfitPools,
+              k: int,
+              rng: np.random.Generator,
+              prices: Optional[OutfitPools] = None,
+              budget: Optional[int] = None,
+              diversity: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Like ColorHarmony.top_k_triples, but `k` outfits reranked for
+        `diversity` out of the CANDIDATES_PER_OUTFIT * k (at most
+        RERANK_CANDIDATES) most harmonious ones."""
+        if diversity <= 0:
+            return self.harmony.top_k_triples(pools, k, rng, prices, budget)
+        n_candidates = max(k, min(RERANK_CANDIDATES, CANDIDATES_PER_OUTFIT * k))
+        triples, scores = self.harmony.top_k_triples(pools, n_candidates, rng, prices, budget)
+        if len(triples) == 0 or k <= 0:
+            return triples[:0], scores[:0]
+        picked = self.rerank(triples, scores, k, diversity)
+        return triples[picked], scores[picked]
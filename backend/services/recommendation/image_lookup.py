@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+import logging
+from typing import Iterable, List, Union
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_IMAGE_URL = "https://via.placeholder.com/200"
+
+
+class ImageLookup:
+    """Item id -> image URL map built from images.csv.
+
+    Ids are kept in a sorted int64 array and resolved by binary search. Links
+    share one common prefix; the per-id suffixes are packed into a single
+    UTF-8 blob addressed by an offsets array instead of one string per row.
+    """
+
+    def __init__(self,
+                 ids: np.ndarray,
+                 prefix: str,
+                 offsets: np.ndarray,
+                 blob: Union[bytes, np.ndarray],
+                 placeholder: str = PLACEHOLDER_IMAGE_URL):
+        self.ids = ids
+        self.prefix = prefix
+        self.offsets = offsets
+        self.blob = blob
+        self.placeholder = placeholder
+
+    @classmethod
+    def from_frame(cls, images: pd.DataFrame, placeholder: str = PLACEHOLDER_IMAGE_URL) -> "ImageLookup":
+        # Only "<id>.jpg" filenames can match a lookup, which formats the id the same way
+        stems = images["filename"].astype(str).str.removesuffix(".jpg")
+        valid = stems.str.fullmatch(r"0|[1-9][0-9]*") & images["link"].notna()
+        ids = stems[valid].astype(np.int64).to_numpy()
+        links = images["link"][valid].astype(str).to_numpy()
+
+        # Keep the first row for duplicated ids, as the old DataFrame scan did
+        order = np.argsort(ids, kind="stable")
+        ids, first = np.unique(ids[order], return_index=True)
+        links = links[order[first]]
+
+        prefix = os.path.commonprefix(list(links)) if len(links) else ""
+        suffixes = [link[len(prefix):].encode("utf-8") for link in links]
+        offsets = np.zeros(len(suffixes) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in suffixes], out=offsets[1:])
+
+        logger.info(f"Image lookup built for {len(ids)} ids, shared prefix '{prefix}'")
+        return cls(ids, prefix, offsets, b"".join(suffixes), placeholder)
+
+    def with_links(self, item_ids: Iterable, links: Iterable[str]) -> "ImageLookup":
+        """Copy of this lookup with the given id -> link pairs added or replaced."""
+        item_ids = np.asarray(list(item_ids), dtype=np.int64)
+        kept = np.flatnonzero(~np.isin(self.ids, item_ids))
+        images = pd.DataFrame({
+            "filename": [f"{i}.jpg" for i in item_ids.tolist() + np.asarray(self.ids)[kept].tolist()],
+            "link": list(links) + [self._url(slot) for slot in kept.tolist()],
+        })
+        return ImageLookup.from_frame(images, self.placeholder)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _url(self, slot: int) -> str:
+        # bytes() accepts both the in-memory blob and a memory-mapped uint8 array
+        return self.prefix + bytes(self.blob[self.offsets[slot]:self.offsets[slot + 1]]).decode("utf-8")
+
+    def get(self, item_id) -> str:
+        """Image URL for one item id, or the placeholder when it has none."""
+        return self.get_many([item_id])[0]
+
+    def get_many(self, item_ids: Iterable) -> List[str]:
+        """Image URLs for many item ids in one vectorized search."""
+        query = np.asarray(list(item_ids), dtype=np.int64)
+        if len(self.ids) == 0:
+            return [self.placeholder] * len(query)
+
+        slots = np.searchsorted(self.ids, query)
+        slots[slots == len(self.ids)] = 0
+        found = self.ids[slots] == query
+
+        missing = query[~found]
+        if len(missing):
+            logger.debug(f"[DEBUG] Image not found for {missing.tolist()}")
+
+        return [self._url(slot) if hit else self.placeholder for slot, hit in zip(slots.tolist(), found.tolist())]
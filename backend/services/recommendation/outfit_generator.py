@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, List, Optional
+
+from services.recommendation.catalog_index import OutfitPools
+from services.recommendation.image_lookup import ImageLookup
+
+logger = logging.getLogger(__name__)
+
+SLOT_TYPES = ("Topwear", "Bottomwear", "Footwear")
+
+# Columns copied from the catalog into each OutfitItem
+ITEM_COLUMNS = ["id", "productDisplayName", "baseColour", "price"]
+
+# Upper bound on the outfits a single request may ask for
+MAX_OUTFITS_PER_REQUEST = 100
+
+
+def make_rng(seed: Optional[int] = None) -> np.random.Generator:
+    """Numpy Generator for one request; pass a seed to make the result reproducible."""
+    return np.random.default_rng(seed)
+
+
+def sample_unique_triples(pools: OutfitPools, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw up to `count` distinct (top, bottom, foot) combinations in one shot.
+
+    Combinations are numbered 0..T*B*F-1 and sampled without replacement, then
+    unravelled into one row per outfit of catalog row positions, one column
+    per slot. Fewer rows come back only when fewer combinations exist.
+    """
+    sizes = tuple(len(pool) for pool in pools)
+    total = sizes[0] * sizes[1] * sizes[2]
+    count = min(count, total)
+    if count <= 0:
+        return np.empty((0, len(SLOT_TYPES)), dtype=np.int64)
+
+    flat = rng.choice(total, size=count, replace=False)
+    slots = np.unravel_index(flat, sizes)
+    return np.column_stack([pool[slot] for pool, slot in zip(pools, slots)])
+
+
+def build_outfits(data: pd.DataFrame,
+                  image_lookup: ImageLookup,
+                  triples: np.ndarray,
+                  first_id: int = 1) -> List[Dict]:
+    """Outfit dicts for each row of `triples`, gathered with one take per column.
+
+    The dicts match the Outfit / OutfitItem models, so the whole list can be
+    validated in a single RecommendationResponse call.
+    """
+    positions = triples.ravel()
+    # Take per column so categorical columns only decode the rows that are used
+    ids, names, colors, prices = (data[column].array.take(positions) for column in ITEM_COLUMNS)
+
+    ids = np.asarray(ids, dtype=np.int64).tolist()
+    names = [str(name) for name in names]
+    colors = [str(color) for color in colors]
+    urls = image_lookup.get_many(ids)
+    prices = np.round(np.asarray(prices, dtype=np.float64), 2).tolist()
+
+    outfits = []
+    for row in range(len(triples)):
+        outfit = {"id": first_id + row}
+        for col, slot_type in enumerate(SLOT_TYPES):
+            i = row * len(SLOT_TYPES) + col
+            outfit[slot_type.lower()] = {
+                "id": ids[i],
+                "type": slot_type,
+                "display_name": names[i],
+                "color": colors[i],
+                "image_url": urls[i],
+                "price": prices[i],
+            }
+        outfits.append(outfit)
+    return outfits
+
+
+def generate_outfits(data: pd.DataFrame,
+                     image_lookup: ImageLookup,
+                     pools: OutfitPools,
+                     count: int,
+                     rng: np.random.Generator,
+                     harmony=None,
+                     prices: Optional[OutfitPools] = None,
+                     budget: Optional[int] = None,
+                     reranker=None,
+                     diversity: float = 0.0) -> List[Dict]:
+    """Pick `count` unique outfits from the candidate pools and build them in bulk.
+
+    With a ColorHarmony the most harmonious outfits come first; without one
+    the combinations are sampled uniformly. A `budget` in cents (which needs
+    the harmony ranking and the pools' sorted `prices`) caps each outfit's
+    total price. An OutfitReranker trades some harmony for `diversity`
+    between the outfits.
+    """
+    if reranker is not None:
+        triples, _ = reranker.top_k(pools, count, rng, prices, budget, diversity)
+    elif harmony is not None:
+        triples, _ = harmony.top_k_triples(pools, count, rng, prices, budget)
+    elif budget is not None:
+        raise ValueError("An outfit budget needs the color harmony ranking")
+    else:
+        triples = sample_unique_triples(pools, count, rng)
+    logger.debug(f"[DEBUG] Sampled {len(triples)} unique outfit combinations")
+    return build_outfits(data, image_lookup, triples)
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def pool_cache_key(palette: Iterable[str],
+                   gender: str,
+                   usage: Iterable[str],
+                   footwear_preference: Optional[str]) -> Tuple:
+    """Normalized cache key for one recommendation query.
+
+    Skin tones are keyed by their resolved palette, usage is order- and
+    duplicate-insensitive, and an empty footwear preference means "Any".
+    """
+    footwear = footwear_preference if footwear_preference and footwear_preference != "Any" else "Any"
+    return tuple(palette), gender, frozenset(usage), footwear
+
+
+class PoolCache:
+    """Thread-safe LRU + TTL cache of candidate pools with request coalescing.
+
+    Only the filtered pools are cached, so every hit still samples fresh
+    outfits. When several callers miss on the same key at once, the first one
+    computes and the others wait for its result instead of recomputing.
+    Threads wait with get_or_compute; handlers on the event loop use
+    get_or_compute_async, which awaits the shared result without blocking
+    the loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        value, future, owner = self._claim(key)
+        if future is None:
+            return value
+        if owner:
+            return self._compute(key, future, compute)
+        return future.result()
+
+    async def get_or_compute_async(self, key: Hashable, compute: Callable[[], object]):
+        value, future, owner = self._claim(key)
+        if future is None:
+            return value
+        if owner:
+            return self._compute(key, future, compute)
+        return await asyncio.wrap_future(future)
+
+    def _claim(self, key: Hashable) -> Tuple[object, Optional[Future], bool]:
+        """(value, future, owner): the cached value with no future on a hit, else the
+        key's in-flight future and whether this caller computes it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, None, False
+                del self._entries[key]
+                self.expirations += 1
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            return None, future, True
+
+    def _compute(self, key: Hashable, future: Future, compute: Callable[[], object]):
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import NamedTuple, Optional, Tuple
+
+from services.recommendation.catalog_index import OutfitPools
+
+logger = logging.getLogger(__name__)
+
+# Price range of the demo prices given to catalogs without a price column
+PRICE_RANGE = (19.99, 79.99)
+
+# Tops whose feasible (bottom, foot) pairs are counted per vectorized step
+BUDGET_CHUNK = 16
+
+
+def demo_prices(ids: np.ndarray) -> np.ndarray:
+    """Stable demo prices in PRICE_RANGE, derived from the item ids alone.
+
+    The same id always gets the same price, in every process and on every
+    rebuild, so prices can be stored, filtered on and shown consistently.
+    """
+    # splitmix64 finalizer: well spread, cheap and identical on every platform
+    x = np.asarray(ids, dtype=np.int64).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    unit = (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    low, high = PRICE_RANGE
+    return np.round(low + unit * (high - low), 2)
+
+
+def with_prices(data: pd.DataFrame) -> pd.DataFrame:
+    """`data` with a float `price` column; missing prices get their demo price."""
+    if "price" in data.columns:
+        prices = pd.to_numeric(data["price"], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        prices = np.full(len(data), np.nan)
+    missing = np.isnan(prices)
+    if missing.any():
+        prices = prices.copy()
+        prices[missing] = demo_prices(data["id"].to_numpy()[missing])
+    return data.assign(price=prices)
+
+
+def to_cents(price: float) -> int:
+    return int(round(price * 100))
+
+
+class PriceSegment(NamedTuple):
+    """A candidate pool sorted by price: row positions and their prices in cents.
+
+    Prices are integers so outfit totals compare exactly against a budget.
+    """
+    positions: np.ndarray
+    cents: np.ndarray
+
+    @classmethod
+    def from_pool(cls, positions: np.ndarray, prices: np.ndarray) -> "PriceSegment":
+        cents = np.rint(prices[positions] * 100).astype(np.int64)
+        order = np.argsort(cents, kind="stable")
+        return cls(positions[order], cents[order])
+
+    def within(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> "PriceSegment":
+        """The items priced between `min_price` and `max_price` (inclusive), by binary search."""
+        start = np.searchsorted(self.cents, to_cents(min_price), side="left") if min_price is not None else 0
+        end = np.searchsorted(self.cents, to_cents(max_price), side="right") if max_price is not None else len(self.cents)
+        return PriceSegment(self.positions[start:end], self.cents[start:end])
+
+
+def price_segments(pools: OutfitPools, prices: np.ndarray) -> OutfitPools:
+    """Every slot's pool as a PriceSegment."""
+    return OutfitPools(*[PriceSegment.from_pool(pool, prices) for pool in pools])
+
+
+def split_segments(segments: OutfitPools) -> Tuple[OutfitPools, OutfitPools]:
+    """(positions per slot, cents per slot) of price segments."""
+    return (OutfitPools(*[segment.positions for segment in segments]),
+            OutfitPools(*[segment.cents for segment in segments]))
+
+
+def _pair_counts(top_cents: np.ndarray, bottom_cents: np.ndarray, foot_cents: np.ndarray, budget: int) -> np.ndarray:
+    """For each (top, bottom), how many of the cheapest feet keep the outfit within `budget`."""
+    return np.searchsorted(foot_cents, budget - top_cents[:, None] - bottom_cents[None, :], side="right")
+
+
+def affordable(top_cents: np.ndarray, bottom_cents: np.ndarray, foot_cents: np.ndarray, budget: int):
+    """Lengths of the cheapest prefix of each sorted slot that can be part of an outfit within `budget`."""
+    if not (len(top_cents) and len(bottom_cents) and len(foot_cents)):
+        return 0, 0, 0
+    t0, b0, f0 = top_cents[0], bottom_cents[0], foot_cents[0]
+    return (int(np.searchsorted(top_cents, budget - b0 - f0, side="right")),
+            int(np.searchsorted(bottom_cents, budget - t0 - f0, side="right")),
+            int(np.searchsorted(foot_cents, budget - t0 - b0, side="right")))
+
+
+def count_within_budget(top_cents: np.ndarray,
+                        bottom_cents: np.ndarray,
+                        foot_cents: np.ndarray,
+                        budget: int,
+                        cap: int,
+                        rng: np.random.Generator) -> Tuple[np.ndarray, int]:
+    """(tops, count): tops in random order and the outfits within `budget` they form.
+
+    All three slots must be sorted by price. Tops are counted a chunk at a
+    time, each (top, bottom) pair by one binary search over the feet, until
+    at least `cap` outfits are found; sampling from those tops only keeps
+    the work bounded while still drawing from across the whole price range.
+    """
+    tops = rng.permutation(len(top_cents))
+    total = 0
+    for start in range(0, len(tops), BUDGET_CHUNK):
+        total += int(_pair_counts(top_cents[tops[start:start + BUDGET_CHUNK]], bottom_cents, foot_cents, budget).sum())
+        if total >= cap:
+            return tops[:start + BUDGET_CHUNK], total
+    return tops, total
+
+
+def sample_within_budget(top_cents: np.ndarray,
+                         bottom_cents: np.ndarray,
+                         foot_cents: np.ndarray,
+                         budget: int,
+                         tops: np.ndarray,
+                         count: int,
+                         rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(top, bottom, foot) indices of `count` distinct outfits within `budget`, using only `tops`.
+
+    The outfits are numbered through the cumulative pair counts and drawn
+    without replacement, so every draw is a valid outfit; nothing is
+    rejected and redrawn.
+    """
+    per_pair = _pair_counts(top_cents[tops], bottom_cents, foot_cents, budget).ravel()
+    ends = np.cumsum(per_pair)
+    picks = rng.choice(int(ends[-1]), size=count, replace=False)
+    pairs = np.searchsorted(ends, picks, side="right")
+    feet = picks - (ends[pairs] - per_pair[pairs])
+    return tops[pairs // len(bottom_cents)], pairs % len(bottom_cents), feet
@@ -0,0 +1,107 @@
+import time
+import secrets
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Outfits ranked up front for one session; later pages are slices of this list
+MAX_SESSION_OUTFITS = 200
+
+
+class RecommendationSession:
+    __slots__ = ("triples", "catalog_version", "expires_at")
+
+    def __init__(self, triples: np.ndarray, catalog_version: int, expires_at: float):
+        # Row positions (top, bottom, foot) in the order they will be served
+        self.triples = triples
+        self.catalog_version = catalog_version
+        self.expires_at = expires_at
+
+
+class RecommendationSessions:
+    """Bounded, expiring store of pre-ranked outfit lists for "load more" paging.
+
+    A session is created with its whole outfit order already fixed, so a page
+    is just a slice and never repeats an outfit. Cursors have the form
+    "<session id>:<offset>". Sessions expire `ttl_seconds` after their last
+    use, and the least recently used one is dropped beyond `maxsize`. Row
+    positions only mean something in the catalog they came from, so a session
+    is also gone once the catalog version changes.
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl_seconds: float = 900.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._sessions: "OrderedDict[str, RecommendationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, triples: np.ndarray, catalog_version: int = 0) -> str:
+        """Store a ranked outfit list and return the id of its new session."""
+        session_id = secrets.token_urlsafe(12)
+        # int32 positions halve the footprint of a stored session
+        triples = np.ascontiguousarray(triples, dtype=np.int32)
+        session = RecommendationSession(triples, catalog_version, self.clock() + self.ttl_seconds)
+        with self._lock:
+            self._purge_expired()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def page(self, cursor: str, count: int, catalog_version: int = 0) -> Tuple[np.ndarray, int, Optional[str]]:
+        """(triples, offset, next cursor) for the page at `cursor`.
+
+        Raises KeyError when the cursor is malformed, unknown, expired or from
+        another catalog version. The next cursor is None once the session has
+        no outfits left.
+        """
+        session_id, offset = parse_cursor(cursor)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if (session is None or session.expires_at <= self.clock()
+                    or session.catalog_version != catalog_version):
+                self._sessions.pop(session_id, None)
+                raise KeyError(cursor)
+            session.expires_at = self.clock() + self.ttl_seconds
+            self._sessions.move_to_end(session_id)
+
+        triples = session.triples[offset:offset + count]
+        end = offset + len(triples)
+        next_cursor = make_cursor(session_id, end) if end < len(session.triples) else None
+        return triples, offset, next_cursor
+
+    def _purge_expired(self) -> None:
+        now = self.clock()
+        expired = [sid for sid, session in self._sessions.items() if session.expires_at <= now]
+        for sid in expired:
+            del self._sessions[sid]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "stored_bytes": sum(s.triples.nbytes for s in self._sessions.values()),
+            }
+
+
+def make_cursor(session_id: str, offset: int) -> str:
+    return f"{session_id}:{offset}"
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    session_id, _, offset = cursor.rpartition(":")
+    if not session_id or not offset.isdigit():
+        raise KeyError(cursor)
+    return session_id, int(offset)
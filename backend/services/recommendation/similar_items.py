@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Tuple
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.color_harmony import COLOR_HEX
+from services.recommendation.skin_tone_palette import parse_hex, rgb_to_lab
+
+logger = logging.getLogger(__name__)
+
+# Squared distance two items pay for differing in an attribute. Article type
+# and its family (subCategory) dominate, so substitutes stay the same kind
+ATTRIBUTE_WEIGHTS = {
+    "masterCategory": 4.0,
+    "subCategory": 2.0,
+    "articleType": 4.0,
+    "gender": 3.0,
+    "usage": 1.0,
+    "season": 0.5,
+}
+
+# Squared distance between two colors a full CIELAB lightness range apart
+# (delta E 100, black vs white); closer colors pay quadratically less
+COLOR_WEIGHT = 2.0
+
+# Lab coordinates used for missing colors and names without a known shade
+NEUTRAL_LAB = (50.0, 0.0, 0.0)
+
+# Profiles scored per matrix product, bounding the temporary score matrix
+PROFILE_BLOCK = 8192
+
+
+class SimilarItemIndex:
+    """Exact nearest-neighbour index over item attribute vectors.
+
+    Every item is embedded as one-hot blocks for its categorical attributes,
+    scaled so a mismatch costs ATTRIBUTE_WEIGHTS[field] in squared Euclidean
+    distance, plus its color's CIELAB coordinates. Items with identical
+    attributes share a vector, so only the distinct "profiles" are stored
+    (tens of thousands even for a million-item catalog) and a query is one
+    blocked matrix product against them. Rows are grouped by profile like
+    CatalogIndex postings, so the nearest profiles expand to items directly.
+    """
+
+    def __init__(self,
+                 vectors: np.ndarray,
+                 row_profiles: np.ndarray,
+                 profile_order: np.ndarray,
+                 profile_bounds: np.ndarray):
+        self.vectors = vectors
+        self.half_norms = 0.5 * np.einsum("ij,ij->i", vectors, vectors)
+        self.row_profiles = row_profiles
+        self.profile_order = profile_order
+        self.profile_bounds = profile_bounds
+
+    @classmethod
+    def from_catalog(cls, data: pd.DataFrame) -> "SimilarItemIndex":
+        fields = [field for field in ATTRIBUTE_WEIGHTS if field in data.columns]
+        columns = {field: data[field] for field in fields + ["baseColour"] if field in data.columns}
+        codes, categories = {}, {}
+        for field, column in columns.items():
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes[field], categories[field] = column.array.codes, column.cat.categories
+            else:
+                codes[field], categories[field] = pd.factorize(column)
+
+        # Mixed-radix key over all attribute codes (missing = -1 shifted to 0)
+        key = np.zeros(len(data), dtype=np.int64)
+        for field in columns:
+            key = key * (len(categories[field]) + 1) + (codes[field].astype(np.int64) + 1)
+        _, first_rows, row_profiles = np.unique(key, return_index=True, return_inverse=True)
+        row_profiles = row_profiles.astype(np.int32)
+        n_profiles = len(first_rows)
+
+        blocks = []
+        for field in fields:
+            block = np.zeros((n_profiles, len(categories[field])), dtype=np.float32)
+            profile_codes = codes[field][first_rows]
+            known = profile_codes >= 0
+            block[np.flatnonzero(known), profile_codes[known]] = np.sqrt(ATTRIBUTE_WEIGHTS[field] / 2)
+            blocks.append(block)
+        if "baseColour" in columns:
+            color_lab = np.array([rgb_to_lab(parse_hex(COLOR_HEX[name])) if name in COLOR_HEX else NEUTRAL_LAB
+                                  for name in categories["baseColour"]] + [NEUTRAL_LAB], dtype=np.float32)
+            # Code -1 (missing color) indexes the trailing neutral entry
+            blocks.append(color_lab[codes["baseColour"][first_rows]] * np.float32(np.sqrt(COLOR_WEIGHT) / 100))
+        vectors = np.ascontiguousarray(np.hstack(blocks)) if blocks else np.zeros((n_profiles, 0), dtype=np.float32)
+
+        order, bounds = CatalogIndex.sort_codes(row_profiles, n_profiles)
+        logger.info(f"Similar item index built: {n_profiles} attribute profiles of {vectors.shape[1]} dimensions "
+                    f"over {len(data)} rows")
+        return cls(vectors, row_profiles, order, bounds)
+
+    def nearest_profiles(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(profile ids, squared distances) of the `k` nearest profiles to each query vector, nearest first."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self.vectors))
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+        # ||q - v||^2 = ||q||^2 - 2 (q.v - ||v||^2 / 2): rank by the bracket, highest first
+        for start in range(0, len(self.vectors), PROFILE_BLOCK):
+            block = slice(start, start + PROFILE_BLOCK)
+            scores = queries @ self.vectors[block].T - self.half_norms[block]
+            ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            scores = np.concatenate((best_scores, scores), axis=1)
+            ids = np.concatenate((best_ids, ids), axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores, ids = np.take_along_axis(scores, top, axis=1), np.take_along_axis(ids, top, axis=1)
+            best_scores, best_ids = scores, ids
+
+        # Nearest first; equally distant profiles by id, so results are deterministic
+        order = np.lexsort((best_ids, -best_scores), axis=-1)
+        best_ids, best_scores = np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+        distances = np.maximum(np.einsum("ij,ij->i", queries, queries)[:, None] - 2 * best_scores, 0)
+        return best_ids, distances
+
+    def similar(self, position: int, limit: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, squared distances) of the `limit` items closest to the item at `position`.
+
+        Items with the same attributes come first, in catalog order. The item
+        itself is never returned.
+        """
+        # Every profile holds at least one row, so limit + 1 profiles are always enough
+        profile = self.row_profiles[position]
+        profiles, distances = self.nearest_profiles(self.vectors[profile], limit + 1)
+        rows = [self.profile_order[self.profile_bounds[p]:self.profile_bounds[p + 1]][:limit + 1] for p in profiles[0]]
+        counts = np.array([len(r) for r in rows])
+        rows = np.concatenate(rows)
+        distances = np.repeat(distances[0], counts)
+
+        keep = rows != position
+        return rows[keep][:limit], distances[keep][:limit]
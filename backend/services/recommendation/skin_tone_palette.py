@@ -0,0 +1,124 @@
+import re
+import numpy as np
+import logging
+from functools import lru_cache
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Skin tone to color mapping, keyed by the palette hexes that stone reports
+SKIN_TONE_COLOR_MAPPING = {
+    "#373028": ["Navy Blue", "Black", "Charcoal", "Burgundy", "Maroon", "Olive", "Rust", "Gold", "Cream", "Peach"],
+    "#422811": ["Navy Blue", "Brown", "Khaki", "Olive", "Maroon", "Mustard", "Teal", "Tan", "Rust", "Burgundy"],
+    "#513B2E": ["Cream", "Beige", "Olive", "Burgundy", "Red", "Orange", "Mustard", "Bronze", "Teal", "Peach"],
+    "#6F503C": ["Beige", "Brown", "Green", "Khaki", "Cream", "Peach", "Lime Green", "Olive", "Maroon", "Rust", "Mustard"],
+    "#81654F": ["Beige", "Off White", "Sea Green", "Cream", "Lavender", "Mauve", "Burgundy", "Yellow", "Lime Green"],
+    "#9D7A54": ["Olive", "Khaki", "Yellow", "Sea Green", "Turquoise Blue", "White", "Gold", "Peach"],
+    "#BEA07E": ["Sea Green", "Turquoise Blue", "Pink", "Lavender", "Rose", "White", "Peach", "Teal", "Fluorescent Green"],
+    "#E5C8A6": ["Turquoise Blue", "Peach", "Teal", "Pink", "Red", "Rose", "Off White", "White", "Cream", "Gold", "Yellow"],
+    "#E7C1B8": ["Pink", "Rose", "Peach", "White", "Off White", "Beige", "Lavender", "Teal", "Fluorescent Green"],
+    "#F3DAD6": ["White", "Cream", "Peach", "Pink", "Rose", "Lavender", "Mustard", "Lime Green", "Light Blue", "Fluorescent Green"],
+    "#FBF2F3": ["Peach", "Lavender", "Pink", "White", "Off White", "Rose", "Light Blue", "Sea Green", "Fluorescent Green", "Silver", "Cream", "Tan"]
+}
+
+# Palette used when the input is not a parseable hex color
+DEFAULT_SKIN_TONE = "#422811"
+
+# Two palettes closer than this (CIE76 delta E, roughly one just-noticeable
+# difference) are indistinguishable for the input, so their colors are blended
+BLEND_DELTA_E = 2.3
+
+# Low bits dropped per RGB channel before caching, i.e. 64 levels per channel
+QUANTIZE_SHIFT = 2
+
+HEX_PATTERN = re.compile(r"^#?([0-9a-fA-F]{6}|[0-9a-fA-F]{3})$")
+
+# sRGB (D65) -> XYZ
+RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def parse_hex(value: str) -> Tuple[int, int, int]:
+    """(r, g, b) for '#RRGGBB' / 'RRGGBB' / '#RGB'; raises ValueError otherwise."""
+    match = HEX_PATTERN.match(value.strip()) if isinstance(value, str) else None
+    if not match:
+        raise ValueError(f"Not a hex color: {value!r}")
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = "".join(d * 2 for d in digits)
+    return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert an (..., 3) array of 0-255 sRGB values to CIELAB."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ RGB_TO_XYZ.T / D65_WHITE
+
+    epsilon, kappa = 216 / 24389, 24389 / 27
+    f = np.where(xyz > epsilon, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+class SkinTonePalette:
+    """Resolve any skin tone hex to the nearest mapped palette in CIELAB.
+
+    The palette hexes are converted to Lab once. A lookup is a dict hit for
+    an exact palette hex, otherwise one vectorized distance against the 11
+    palette colors, cached on the quantized RGB value.
+    """
+
+    def __init__(self,
+                 mapping=SKIN_TONE_COLOR_MAPPING,
+                 default: str = DEFAULT_SKIN_TONE,
+                 blend_delta_e: float = BLEND_DELTA_E,
+                 cache_size: int = 4096):
+        self.mapping = {key.upper(): colors for key, colors in mapping.items()}
+        self.keys = list(self.mapping)
+        self.default = default.upper()
+        self.blend_delta_e = blend_delta_e
+        self.palette_lab = rgb_to_lab(np.array([parse_hex(key) for key in self.keys]))
+        self._nearest = lru_cache(maxsize=cache_size)(self._nearest_uncached)
+
+    def _nearest_uncached(self, quantized: Tuple[int, int, int]) -> Tuple[str, ...]:
+        # Use the centre of the quantization bucket
+        half_step = (1 << QUANTIZE_SHIFT) // 2
+        rgb = np.array([(q << QUANTIZE_SHIFT) + half_step for q in quantized])
+        distances = np.linalg.norm(self.palette_lab - rgb_to_lab(rgb), axis=1)
+
+        first, second = np.argsort(distances)[:2]
+        if distances[second] - distances[first] < self.blend_delta_e:
+            return self.keys[first], self.keys[second]
+        return (self.keys[first],)
+
+    def nearest(self, skin_tone_hex: str) -> Tuple[str, ...]:
+        """Palette keys matching the hex: the nearest one, or the two nearest when they tie."""
+        try:
+            r, g, b = parse_hex(skin_tone_hex)
+        except ValueError:
+            logger.debug(f"[DEBUG] Invalid skin tone hex {skin_tone_hex!r}, using {self.default}")
+            return (self.default,)
+
+        exact = f"#{r:02X}{g:02X}{b:02X}"
+        if exact in self.mapping:
+            return (exact,)
+        return self._nearest((r >> QUANTIZE_SHIFT, g >> QUANTIZE_SHIFT, b >> QUANTIZE_SHIFT))
+
+    def colors_for(self, skin_tone_hex: str) -> List[str]:
+        """Recommended clothing colors for any skin tone hex (nearest palette first)."""
+        keys = self.nearest(skin_tone_hex)
+        colors = list(self.mapping[keys[0]])
+        for key in keys[1:]:
+            colors.extend(c for c in self.mapping[key] if c not in colors)
+        return colors
+
+
+skin_tone_palette = SkinTonePalette()
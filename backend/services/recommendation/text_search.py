@@ -0,0 +1,191 @@
+import re
+import numpy as np
+import pandas as pd
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Columns whose words are searchable
+SEARCH_FIELDS = ("productDisplayName", "articleType", "baseColour")
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Multi-word queries whose terms have at most this many postings in total are
+# scored exhaustively; longer lists go through the threshold-pruned scan
+EXHAUSTIVE_POSTINGS = 50_000
+
+# Best-weighted postings per list read to seed the top-k threshold
+SEED_POSTINGS = 1024
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def stem(token: str) -> str:
+    """Fold simple English plurals so "shirt" finds "Shirts" and "dress" finds "Dresses"."""
+    if len(token) <= 3 or token.endswith("ss"):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in TOKEN_PATTERN.findall(str(text).lower())]
+
+
+class TextSearchIndex:
+    """BM25 inverted index over the catalog's name, article type and color.
+
+    Postings are stored as one CSR structure: for term t, rows[offsets[t]:
+    offsets[t + 1]] are the matching catalog row positions (ascending) and
+    weights[...] their precomputed BM25 term weights. `impact` lists the same
+    postings per term by descending weight. Short queries are scored
+    exhaustively; for long posting lists the best-weighted postings seed a
+    top-k threshold, which usually settles single broad words like "men"
+    outright and otherwise lets whole lists be skipped as candidate sources.
+    """
+
+    def __init__(self,
+                 vocab: Dict[str, int],
+                 offsets: np.ndarray,
+                 rows: np.ndarray,
+                 weights: np.ndarray,
+                 impact: np.ndarray):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.impact = impact
+
+    @classmethod
+    def from_catalog(cls, data: pd.DataFrame, fields: Iterable[str] = SEARCH_FIELDS) -> "TextSearchIndex":
+        size = len(data)
+        vocab: Dict[str, int] = {}
+        row_parts, term_parts = [], []
+
+        for field in fields:
+            if field not in data.columns:
+                logger.warning(f"Column '{field}' missing from catalog, not searchable")
+                continue
+            column = data[field]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                codes, uniques = column.array.codes, column.cat.categories
+            else:
+                codes, uniques = pd.factorize(column)
+
+            # Tokenize each distinct value once, then expand to rows by code
+            value_terms = [[vocab.setdefault(t, len(vocab)) for t in tokenize(v)] for v in uniques]
+            counts = np.array([len(terms) for terms in value_terms] + [0], dtype=np.int64)
+            starts = np.concatenate(([0], np.cumsum(counts[:-1])))
+            flat_terms = np.fromiter((t for terms in value_terms for t in terms), dtype=np.int64, count=int(counts.sum()))
+
+            row_counts = counts[codes]  # code -1 (missing) hits the trailing 0
+            row_ids = np.repeat(np.arange(size, dtype=np.int64), row_counts)
+            within = np.arange(len(row_ids)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+            row_parts.append(row_ids)
+            term_parts.append(flat_terms[np.repeat(starts[np.maximum(codes, 0)], row_counts) + within])
+
+        rows = np.concatenate(row_parts) if row_parts else np.empty(0, dtype=np.int64)
+        terms = np.concatenate(term_parts) if term_parts else np.empty(0, dtype=np.int64)
+
+        # One posting per (term, row); repeated words become its term frequency
+        keys, tf = np.unique(terms * max(size, 1) + rows, return_counts=True)
+        terms, rows = np.divmod(keys, max(size, 1))
+        offsets = np.searchsorted(terms, np.arange(len(vocab) + 1)).astype(np.int64)
+
+        doc_length = np.bincount(rows, weights=tf, minlength=size)
+        avg_length = doc_length.mean() if size else 1.0
+        df = np.diff(offsets)
+        idf = np.log1p((size - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length[rows] / avg_length)
+        weights = (idf[terms] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        # Per term, by descending weight; the stable sort keeps catalog order among ties
+        impact = np.lexsort((-weights, terms)).astype(np.int32)
+
+        logger.info(f"Text search index built: {len(vocab)} terms, {len(rows)} postings")
+        return cls(vocab, offsets, rows.astype(np.int32), weights, impact)
+
+    def search(self,
+               query: str,
+               limit: int = 20,
+               keep: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row positions, scores) of the best `limit` rows, highest score first.
+
+        Any query word may match (OR); rows matching more and rarer words
+        score higher. `keep` maps candidate row positions to a boolean mask,
+        e.g. to apply gender/usage filters before ranking.
+        """
+        term_ids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not term_ids or limit <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        lists = [(int(self.offsets[t]), int(self.offsets[t + 1])) for t in term_ids]
+        if len(lists) > 1 and sum(end - start for start, end in lists) <= EXHAUSTIVE_POSTINGS:
+            return self._search_all(lists, limit, keep)
+
+        # Seed with the best-weighted postings of every list
+        depth = max(16 * limit, SEED_POSTINGS)
+        seeds = np.unique(np.concatenate([self.rows[self.impact[start:min(start + depth, end)]]
+                                          for start, end in lists]))
+        rows, scores = self._top(seeds, self._score(seeds, lists), limit, keep)
+        threshold = scores[-1] if len(rows) == limit else 0.0
+
+        # No unread posting can reach the current top: done (threshold algorithm)
+        bound = sum(float(self.weights[self.impact[start + depth]]) for start, end in lists if start + depth < end)
+        if len(rows) == limit and threshold >= bound:
+            return rows, scores
+
+        # Skip the longest lists whose best weights together stay below the
+        # threshold: a row found only in those cannot make the top (MaxScore)
+        essential, skipped_bound = [], 0.0
+        for start, end in sorted(lists, key=lambda span: span[0] - span[1]):
+            upper = float(self.weights[self.impact[start]])
+            if skipped_bound + upper < threshold:
+                skipped_bound += upper
+            else:
+                essential.append((start, end))
+        candidates = np.concatenate([self.rows[start:end] for start, end in essential])
+        if len(essential) > 1:
+            # Stable sort merges the already sorted lists in linear time
+            candidates = np.sort(candidates, kind="stable")
+            candidates = candidates[np.concatenate(([True], candidates[1:] != candidates[:-1]))]
+        return self._top(candidates, self._score(candidates, lists), limit, keep)
+
+    def _search_all(self, lists, limit, keep):
+        """Score every posting of the query terms; cheapest when the lists are short."""
+        rows = np.concatenate([self.rows[start:end] for start, end in lists])
+        weights = np.concatenate([self.weights[start:end] for start, end in lists])
+        # Sum the weights of each row: sort by row, then add up each run
+        order = np.argsort(rows, kind="stable")
+        rows, weights = rows[order], weights[order]
+        first = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+        return self._top(rows[first], np.add.reduceat(weights, first), limit, keep)
+
+    def _score(self, candidates: np.ndarray, lists) -> np.ndarray:
+        """Full BM25 score of each (sorted) candidate row, by binary search into every list."""
+        scores = np.zeros(len(candidates), dtype=np.float32)
+        for start, end in lists:
+            rows = self.rows[start:end]
+            slots = np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)
+            hit = rows[slots] == candidates
+            scores[hit] += self.weights[start:end][slots[hit]]
+        return scores
+
+    @staticmethod
+    def _top(rows, scores, limit, keep):
+        if keep is not None and len(rows):
+            mask = keep(rows)
+            rows, scores = rows[mask], scores[mask]
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            rows, scores = rows[top], scores[top]
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
@@ -0,0 +1,36 @@
+"""Test setup: import paths and a small synthetic catalog for the recommendation routes.
+
+The route modules load their catalog when imported, from the paths in
+CATALOG_STYLES_PATH / CATALOG_IMAGES_PATH, so those are pointed at a
+generated catalog before any test imports them. The user database is a
+SQLite file next to it.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Routes import `services...` (backend directory) and `backend.api...` (repository root)
+sys.path[:0] = [BACKEND_DIR, os.path.dirname(BACKEND_DIR)]
+
+from benchmarks.synthetic_catalog import generate_catalog, write_catalog
+
+CATALOG_ROWS = 3000
+
+_catalog_dir = tempfile.mkdtemp(prefix="test_catalog_")
+_styles, _images = write_catalog(_catalog_dir, CATALOG_ROWS, seed=0)
+os.environ["CATALOG_STYLES_PATH"] = _styles
+os.environ["CATALOG_IMAGES_PATH"] = _images
+os.environ["CATALOG_PUBLISH_SNAPSHOT"] = "0"
+os.environ["CATALOG_WATCH_INTERVAL"] = "0"
+# models.database creates its engine and tables on import
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_catalog_dir, 'users.db')}"
+
+
+@pytest.fixture(scope="session")
+def styles():
+    """A synthetic styles table with demo prices, for the service tests"""
+    from services.recommendation.price_index import with_prices
+    return with_prices(generate_catalog(CATALOG_ROWS, seed=1)[0])
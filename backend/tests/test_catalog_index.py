@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from services.recommendation.catalog_index import CatalogIndex
+
+
+def test_lookup_matches_isin(styles):
+    index = CatalogIndex(styles)
+    for field, values in [("gender", ["Men"]), ("baseColour", ["Black", "Navy Blue"]), ("usage", ["Nope"])]:
+        expected = np.flatnonzero(styles[field].isin(values))
+        assert np.array_equal(index.lookup(field, values), expected)
+
+
+def test_candidates_match_every_filter(styles):
+    index = CatalogIndex(styles)
+    filters = {"gender": ["Women"], "subCategory": ["Topwear"], "usage": ["Casual", "Sports"]}
+    expected = np.flatnonzero(np.logical_and.reduce([styles[f].isin(v) for f, v in filters.items()]))
+    assert np.array_equal(index.candidates(**filters), expected)
+    assert len(index.candidates()) == len(styles)
+    assert len(index.candidates(gender=["Men"], usage=[])) == 0
+
+
+def test_missing_values_never_match():
+    data = pd.DataFrame({"id": [1, 2, 3], "usage": ["Casual", None, "Casual"]})
+    index = CatalogIndex(data, fields=["usage"])
+    assert index.lookup("usage", ["Casual"]).tolist() == [0, 2]
+    assert index.restrict(np.array([2, 1, 0]), "usage", ["Casual"]).tolist() == [2, 0]
+
+
+def test_outfit_pools_follow_the_route_filters(styles):
+    index = CatalogIndex(styles)
+    pools = index.outfit_pools("Men", ["Black", "White", "Blue"], ["Casual"], "Casual Shoes")
+    colors = styles["baseColour"].isin(["Black", "White", "Blue"]) & (styles["gender"] == "Men")
+    casual = styles["usage"] == "Casual"
+    assert np.array_equal(pools.topwear, np.flatnonzero(colors & casual & (styles["subCategory"] == "Topwear")))
+    assert np.array_equal(pools.bottomwear, np.flatnonzero(colors & casual & (styles["subCategory"] == "Bottomwear")))
+    # Usage does not apply to footwear
+    assert np.array_equal(pools.footwear, np.flatnonzero(colors & (styles["articleType"] == "Casual Shoes")))
+    any_footwear = index.outfit_pools("Men", ["Black"], ["Casual"], "Any").footwear
+    assert np.array_equal(any_footwear, np.flatnonzero((styles["gender"] == "Men") & (styles["baseColour"] == "Black")
+                                                       & (styles["masterCategory"] == "Footwear")))
+
+
+def test_positions_of(styles):
+    index = CatalogIndex(styles)
+    ids = styles["id"].to_numpy()
+    assert index.positions_of([ids[5], -1, ids[0]]).tolist() == [5, -1, 0]
+    assert CatalogIndex(styles.drop(columns="id")).positions_of([1]).tolist() == [-1]
+
+
+def test_categorical_columns_index_like_strings(styles):
+    categorical = styles.astype({field: "category" for field in ["gender", "subCategory", "baseColour", "usage"]})
+    by_strings, by_codes = CatalogIndex(styles), CatalogIndex(categorical)
+    filters = {"gender": ["Men", "Boys"], "subCategory": ["Topwear"], "baseColour": ["Blue", "Grey"]}
+    assert np.array_equal(by_codes.candidates(**filters), by_strings.candidates(**filters))
+    for a, b in zip(by_codes.outfit_pools("Women", ["Black", "Red"], ["Casual"], "Heels"),
+                    by_strings.outfit_pools("Women", ["Black", "Red"], ["Casual"], "Heels")):
+        assert np.array_equal(a, b)
@@ -0,0 +1,107 @@
+import os
+import stat
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_catalog import write_catalog
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.catalog_snapshot import (
+    CATEGORICAL_COLUMNS, MANIFEST_FILENAME, SNAPSHOT_DIRNAME, build_snapshot, is_snapshot_fresh, load_catalog,
+    load_snapshot, load_snapshot_index, publish_snapshot, read_catalog_csv,
+)
+
+
+@pytest.fixture
+def csvs(tmp_path):
+    return write_catalog(str(tmp_path), 500, seed=2)
+
+
+def test_snapshot_round_trip(csvs, tmp_path):
+    snapshot_dir = build_snapshot(*csvs, str(tmp_path / "snapshot"))
+    data, images = read_catalog_csv(*csvs)
+    loaded, lookup = load_snapshot(snapshot_dir)
+
+    assert list(loaded.columns) == list(data.columns)
+    for name in data.columns:
+        assert loaded[name].astype(object).tolist() == data[name].astype(object).tolist(), name
+    ids = data["id"].tolist()
+    assert lookup.get_many(ids) == load_catalog(*csvs, snapshot_dir=str(tmp_path / "none"))[1].get_many(ids)
+
+
+def test_snapshot_goes_stale_when_a_csv_changes(csvs, tmp_path):
+    styles, images = csvs
+    snapshot_dir = build_snapshot(styles, images, str(tmp_path / "snapshot"))
+    assert is_snapshot_fresh(snapshot_dir, styles, images)
+
+    rows = len(load_snapshot(snapshot_dir)[0])
+    with open(styles) as f:
+        lines = f.readlines()
+    with open(styles, "w") as f:
+        f.writelines(lines[:-1])
+    assert not is_snapshot_fresh(snapshot_dir, styles, images)
+    # A stale snapshot is not used; the catalog comes from the CSVs
+    data, _ = load_catalog(styles, images, snapshot_dir)
+    assert len(data) == len(read_catalog_csv(styles, images)[0]) < rows
+
+
+def test_snapshot_without_its_csvs_is_still_fresh(csvs, tmp_path):
+    styles, images = csvs
+    snapshot_dir = build_snapshot(styles, images, str(tmp_path / "snapshot"))
+    os.remove(styles)
+    os.remove(images)
+    assert is_snapshot_fresh(snapshot_dir, styles, images)
+    assert len(load_catalog(styles, images, snapshot_dir)[0]) > 0
+
+
+def test_missing_snapshot_is_not_fresh(csvs, tmp_path):
+    assert not is_snapshot_fresh(str(tmp_path / "missing"), *csvs)
+    with pytest.raises(FileNotFoundError):
+        load_snapshot(str(tmp_path / "missing"))
+
+
+def test_attribute_columns_are_categorical(csvs, tmp_path):
+    from_csv, _ = read_catalog_csv(*csvs)
+    from_snapshot, _ = load_snapshot(build_snapshot(*csvs, str(tmp_path / "snapshot")))
+    for data in (from_csv, from_snapshot):
+        for name in CATEGORICAL_COLUMNS:
+            assert isinstance(data[name].dtype, pd.CategoricalDtype), name
+    # Snapshot codes use the smallest integer type that fits
+    assert from_snapshot["gender"].array.codes.dtype == np.int8
+
+
+def test_publish_builds_only_when_stale(csvs):
+    styles, images = csvs
+    snapshot_dir = os.path.join(os.path.dirname(styles), SNAPSHOT_DIRNAME)
+    manifest = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    assert publish_snapshot(styles, images)
+    built = os.stat(manifest).st_mtime_ns
+    assert publish_snapshot(styles, images)
+    assert os.stat(manifest).st_mtime_ns == built
+
+    with open(styles) as f:
+        lines = f.readlines()
+    with open(styles, "w") as f:
+        f.writelines(lines[:-1])
+    assert publish_snapshot(styles, images)
+    assert is_snapshot_fresh(snapshot_dir, styles, images)
+    # Published files are read-only
+    assert not any(os.stat(os.path.join(snapshot_dir, name)).st_mode & stat.S_IWUSR for name in os.listdir(snapshot_dir))
+
+
+def test_publish_without_csvs_fails(tmp_path):
+    assert not publish_snapshot(str(tmp_path / "styles.csv"), str(tmp_path / "images.csv"))
+
+
+def test_snapshot_index_is_shared_and_matches_a_built_one(csvs, tmp_path):
+    snapshot_dir = build_snapshot(*csvs, str(tmp_path / "snapshot"))
+    data, _ = load_snapshot(snapshot_dir)
+    attached, built = load_snapshot_index(snapshot_dir, data), CatalogIndex(data)
+
+    posting = attached.postings["usage"][0]
+    assert isinstance(posting.base, np.memmap) and not posting.flags.writeable
+    filters = {"gender": ["Men"], "subCategory": ["Topwear", "Bottomwear"], "usage": ["Casual"]}
+    assert np.array_equal(attached.candidates(**filters), built.candidates(**filters))
+    ids = data["id"].to_numpy()[[3, 0, 7]].tolist()
+    assert attached.positions_of(ids + [-5]).tolist() == built.positions_of(ids + [-5]).tolist() == [3, 0, 7, -1]
@@ -0,0 +1,110 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_catalog import write_catalog
+from services.recommendation.catalog_store import CatalogStore
+
+DELTA_COLUMNS = ["op", "id", "gender", "masterCategory", "subCategory", "articleType", "baseColour", "season",
+                 "year", "usage", "productDisplayName", "price", "link"]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    styles, images = write_catalog(str(tmp_path), 400, seed=3)
+    delta_dir = tmp_path / "deltas"
+    delta_dir.mkdir()
+    return styles, images, str(delta_dir)
+
+
+def write_delta(delta_dir, name, rows):
+    path = os.path.join(delta_dir, name)
+    pd.DataFrame(rows, columns=DELTA_COLUMNS).to_csv(path, index=False)
+    return path
+
+
+def added(item_id, colour="Teal", link=None):
+    return ["add", item_id, "Men", "Apparel", "Topwear", "Shirts", colour, "Summer", 2020, "Casual",
+            f"Test Men {colour} Shirts", 24.5, link]
+
+
+def wait_for_reload(store, started):
+    assert started
+    deadline = time.monotonic() + 30
+    while store.stats()["reloading"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.last_error is None
+
+
+def test_delta_reload_adds_replaces_and_removes_items(paths):
+    styles, images, delta_dir = paths
+    store = CatalogStore(styles, images, delta_dir=delta_dir, publish=False)
+    first = store.load()
+    existing = int(first.data["id"].iloc[0])
+    removed = int(first.data["id"].iloc[1])
+    assert store.pending_change() is None
+
+    write_delta(delta_dir, "001.csv", [added(9_000_001, link="http://img.test/new.jpg"), added(existing, "Mauve"),
+                                       ["remove", removed] + [None] * (len(DELTA_COLUMNS) - 2)])
+    assert store.pending_change() == "delta"
+    wait_for_reload(store, store.reload(full=False))
+
+    catalog = store.current
+    assert catalog.version == first.version + 1
+    assert len(catalog.data) == len(first.data)
+    assert catalog.index.positions_of([removed]).tolist() == [-1]
+    new_row, replaced_row = catalog.index.positions_of([9_000_001, existing]).tolist()
+    assert catalog.data["price"].array[new_row] == 24.5
+    assert catalog.data["baseColour"].array[replaced_row] == "Mauve"
+    assert isinstance(catalog.data["baseColour"].dtype, pd.CategoricalDtype)
+    assert catalog.image_lookup.get(9_000_001) == "http://img.test/new.jpg"
+    # The indexes are rebuilt with the new items
+    assert new_row in catalog.index.candidates(baseColour=["Teal"], subCategory=["Topwear"]).tolist()
+    assert store.stats()["applied_deltas"] == ["001.csv"]
+    assert store.pending_change() is None
+    # The previous catalog is left untouched for requests still holding it
+    assert first.index.positions_of([removed]).tolist() == [1]
+
+
+def test_changed_files_need_a_full_reload(paths):
+    styles, images, delta_dir = paths
+    store = CatalogStore(styles, images, delta_dir=delta_dir, publish=False)
+    store.load()
+    delta = write_delta(delta_dir, "001.csv", [added(9_000_001)])
+    wait_for_reload(store, store.reload(full=False))
+
+    os.remove(delta)
+    assert store.pending_change() == "full"
+    wait_for_reload(store, store.reload(full=True))
+    assert store.current.index.positions_of([9_000_001]).tolist() == [-1]
+    assert store.pending_change() is None
+
+    with open(styles, "a") as f:
+        f.write("\n")
+    assert store.pending_change() == "full"
+
+
+def test_swap_listeners_and_versions(paths):
+    styles, images, delta_dir = paths
+    store = CatalogStore(styles, images, delta_dir=delta_dir, publish=False)
+    swapped = []
+    store.on_swap(lambda catalog: swapped.append(catalog.version))
+    store.load()
+    wait_for_reload(store, store.reload())
+    assert swapped == [1, 2] and store.version == 2
+
+
+def test_failed_reload_keeps_the_current_catalog(paths):
+    styles, images, delta_dir = paths
+    store = CatalogStore(styles, images, delta_dir=delta_dir, publish=False)
+    current = store.load()
+    with open(os.path.join(delta_dir, "001.csv"), "w") as f:
+        f.write("id,gender\n1,Men\n")
+    assert store.reload(full=False)
+    deadline = time.monotonic() + 30
+    while store.stats()["reloading"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.current is current
+    assert "missing columns" in store.last_error
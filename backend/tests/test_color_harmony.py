@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.color_harmony import (
+    ANALOGOUS_SCORE, COMPLEMENTARY_SCORE, NEUTRAL_SCORE, SAME_COLOR_SCORE, ColorHarmony,
+)
+from services.recommendation.price_index import price_segments, split_segments
+
+COLORS = ["Black", "White", "Blue", "Grey", "Navy Blue"]
+
+
+@pytest.fixture(scope="module")
+def harmony(styles):
+    return ColorHarmony.from_catalog(styles)
+
+
+@pytest.fixture(scope="module")
+def pools(styles):
+    return CatalogIndex(styles).outfit_pools("Men", COLORS, ["Casual"], "Any")
+
+
+@pytest.fixture(scope="module")
+def priced_pools(styles, pools):
+    """(pools sorted by price, their prices in cents)"""
+    return split_segments(price_segments(pools, styles["price"].to_numpy()))
+
+
+def scores_of(harmony, triples):
+    ids = [harmony.row_color_ids(triples[:, slot]) for slot in range(3)]
+    m = harmony.matrix
+    return m[ids[0], ids[1]] + m[ids[0], ids[2]] + m[ids[1], ids[2]]
+
+
+def test_matrix_follows_the_maps():
+    harmony = ColorHarmony()
+    score = lambda a, b: harmony.matrix[harmony.color_id[a], harmony.color_id[b]]
+    assert score("Blue", "Orange") == score("Orange", "Blue") == COMPLEMENTARY_SCORE
+    assert score("Blue", "Navy Blue") == ANALOGOUS_SCORE
+    assert score("Black", "Pink") == NEUTRAL_SCORE
+    assert score("Pink", "Pink") >= SAME_COLOR_SCORE
+    assert np.array_equal(harmony.matrix, harmony.matrix.T)
+
+
+def test_unknown_colors_score_zero():
+    harmony = ColorHarmony()
+    assert harmony.ids_for(["Not a colour"]).tolist() == [harmony.unknown_id]
+    assert not harmony.matrix[harmony.unknown_id].any()
+
+
+def test_top_k_triples_are_distinct_and_best_first(harmony, pools):
+    triples, scores = harmony.top_k_triples(pools, 50, np.random.default_rng(0))
+    assert triples.shape == (50, 3) and scores.shape == (50,)
+    assert len({tuple(t) for t in triples.tolist()}) == 50
+    assert np.all(np.diff(scores) <= 0)
+    for slot, pool in enumerate(pools):
+        assert np.isin(triples[:, slot], pool).all()
+    assert np.allclose(scores, scores_of(harmony, triples))
+    # The best combination of the pools' colors comes first
+    all_scores = harmony.triple_scores(*[np.unique(harmony.row_color_ids(pool)) for pool in pools])
+    assert scores[0] == pytest.approx(all_scores.max())
+
+
+def test_top_k_triples_stops_at_the_pool_size(harmony, pools):
+    small = pools._replace(topwear=pools.topwear[:2], bottomwear=pools.bottomwear[:2], footwear=pools.footwear[:3])
+    triples, _ = harmony.top_k_triples(small, 100, np.random.default_rng(0))
+    assert len({tuple(t) for t in triples.tolist()}) == len(triples) == 12
+
+
+def test_top_k_triples_respects_the_budget(harmony, priced_pools):
+    pools, prices = priced_pools
+    cheapest = sum(int(cents[0]) for cents in prices)
+    budget = cheapest + 1500
+    triples, scores = harmony.top_k_triples(pools, 20, np.random.default_rng(0), prices, budget)
+    assert 0 < len(triples) <= 20
+    assert len({tuple(t) for t in triples.tolist()}) == len(triples)
+    assert np.all(np.diff(scores) <= 0)
+    cents = {}
+    for pool, pool_cents in zip(pools, prices):
+        cents.update(zip(pool.tolist(), pool_cents.tolist()))
+    assert all(sum(cents[p] for p in t) <= budget for t in triples.tolist())
+
+
+def test_top_k_triples_is_empty_when_nothing_fits(harmony, priced_pools):
+    pools, prices = priced_pools
+    cheapest = sum(int(cents[0]) for cents in prices)
+    triples, scores = harmony.top_k_triples(pools, 10, np.random.default_rng(0), prices, cheapest - 1)
+    assert triples.shape == (0, 3) and scores.shape == (0,)
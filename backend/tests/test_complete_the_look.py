@@ -0,0 +1,54 @@
+import numpy as np
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.color_harmony import ColorHarmony
+from services.recommendation.complete_the_look import LOOK_SIZE, LookIndex
+
+
+def build(data, previous=None):
+    index = CatalogIndex(data)
+    harmony = ColorHarmony.from_catalog(data)
+    return LookIndex.from_catalog(data, index, harmony, previous), harmony
+
+
+def test_matches_are_the_best_harmony_of_the_slot_pool(styles):
+    looks, harmony = build(styles)
+    assert looks.looks
+    for gender, usage, color in list(looks.looks)[:25]:
+        top_color = harmony.ids_for([color])[0]
+        for slot, pool in (("bottomwear", (styles["subCategory"] == "Bottomwear") & (styles["usage"] == usage)),
+                           ("footwear", styles["masterCategory"] == "Footwear")):
+            candidates = styles[pool & (styles["gender"] == gender)]
+            ids, scores = looks.matches(gender, usage, color, slot)
+            assert len(ids) == min(LOOK_SIZE, len(candidates))
+            assert set(ids) <= set(candidates["id"])
+            assert np.all(np.diff(scores) <= 0)
+            expected = harmony.matrix[top_color, harmony.ids_for(candidates["baseColour"])]
+            assert np.allclose(scores, np.sort(expected)[::-1][:len(ids)])
+
+
+def test_unknown_looks_have_no_matches(styles):
+    looks, _ = build(styles)
+    ids, scores = looks.matches("Men", "Casual", "No Such Colour", "bottomwear")
+    assert len(ids) == len(scores) == 0
+
+
+def test_rebuild_reuses_only_unchanged_lists(styles):
+    previous, _ = build(styles)
+    # Mark every previous score: reused lists keep the mark, recomputed ones lose it
+    for slot in previous.scores:
+        previous.scores[slot] = previous.scores[slot] + 100
+
+    removed = styles[styles["subCategory"] == "Bottomwear"].iloc[0]
+    data = styles[styles["id"] != removed["id"]].reset_index(drop=True)
+    rebuilt, _ = build(data, previous)
+    fresh, _ = build(data)
+
+    for look in fresh.looks:
+        gender, usage, _ = look
+        for slot in ("bottomwear", "footwear"):
+            fresh_ids, fresh_scores = fresh.matches(*look, slot)
+            ids, scores = rebuilt.matches(*look, slot)
+            assert np.array_equal(ids, fresh_ids)
+            touched = slot == "bottomwear" and (gender, usage) == (removed["gender"], removed["usage"])
+            assert np.allclose(scores, fresh_scores if touched else fresh_scores + 100)
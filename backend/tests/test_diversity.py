@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.color_harmony import ColorHarmony
+from services.recommendation.diversity import CANDIDATES_PER_OUTFIT, RERANK_CANDIDATES, OutfitReranker
+
+
+@pytest.fixture(scope="module")
+def catalog(styles):
+    index = CatalogIndex(styles)
+    harmony = ColorHarmony.from_catalog(styles)
+    reranker = OutfitReranker.from_catalog(styles, index, harmony)
+    pools = index.outfit_pools("Women", ["Black", "White", "Pink", "Blue", "Red"], ["Casual"], "Any")
+    return reranker, pools
+
+
+@pytest.fixture(scope="module")
+def candidates(catalog):
+    reranker, pools = catalog
+    return reranker.harmony.top_k_triples(pools, 300, np.random.default_rng(0))
+
+
+def test_no_diversity_keeps_the_relevance_order(catalog, candidates):
+    reranker, _ = catalog
+    triples, scores = candidates
+    relevance = scores[::-1].copy()
+    assert np.array_equal(reranker.rerank(triples, relevance, 10, 0), np.argsort(-relevance, kind="stable")[:10])
+
+
+@pytest.mark.parametrize("diversity", [0.3, 0.7, 1])
+def test_picks_are_unique(catalog, candidates, diversity):
+    reranker, _ = catalog
+    triples, scores = candidates
+    picked = reranker.rerank(triples, scores, 40, diversity)
+    assert len(picked) == 40 and len(set(picked.tolist())) == 40
+    # The first pick is the most relevant outfit unless relevance is ignored
+    if diversity < 1:
+        assert scores[picked[0]] == scores.max()
+
+
+def test_diversity_spreads_the_colors(catalog, candidates):
+    reranker, _ = catalog
+    triples, scores = candidates
+
+    def distinct_colors(picked):
+        return len({tuple(c) for c in reranker.harmony.row_color_ids(triples[picked]).tolist()})
+
+    assert distinct_colors(reranker.rerank(triples, scores, 10, 0.8)) >= distinct_colors(reranker.rerank(triples, scores, 10, 0))
+
+
+def test_rerank_of_nothing_is_empty(catalog, candidates):
+    reranker, _ = catalog
+    triples, scores = candidates
+    assert reranker.rerank(triples[:0], scores[:0], 5, 0.5).shape == (0,)
+    assert reranker.rerank(triples, scores, 0, 0.5).shape == (0,)
+    assert len(reranker.rerank(triples[:3], scores[:3], 10, 0.5)) == 3
+
+
+def test_top_k_without_candidates_is_empty(catalog):
+    reranker, pools = catalog
+    no_tops = pools._replace(topwear=pools.topwear[:0])
+    triples, scores = reranker.top_k(no_tops, 5, np.random.default_rng(0), diversity=0.5)
+    assert triples.shape == (0, 3) and scores.shape == (0,)
+
+
+@pytest.mark.parametrize("k, drawn", [(3, 3 * CANDIDATES_PER_OUTFIT), (200, RERANK_CANDIDATES),
+                                      (RERANK_CANDIDATES + 1, RERANK_CANDIDATES + 1)])
+def test_candidates_scale_with_k(catalog, monkeypatch, k, drawn):
+    reranker, pools = catalog
+    asked = []
+    top_k_triples = reranker.harmony.top_k_triples
+
+    def record(pools, n, *args):
+        asked.append(n)
+        return top_k_triples(pools, n, *args)
+
+    monkeypatch.setattr(reranker.harmony, "top_k_triples", record)
+    reranker.top_k(pools, k, np.random.default_rng(0), diversity=0.3)
+    assert asked == [drawn]
@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+pytest.importorskip("mediapipe")
+from backend.api.routes import segmentation_routes as routes
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    return TestClient(app)
+
+
+def jpeg(seed=0):
+    image = np.random.default_rng(seed).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def test_stream_answers_every_frame(client):
+    with client.websocket_connect("/api/ws/face-mesh") as ws:
+        ws.send_bytes(jpeg())
+        assert ws.receive_json() == {"type": "result", "hasFace": False, "fps": 0.0, "droppedFrames": 0, "images": []}
+        ws.send_bytes(b"not an image")
+        assert ws.receive_json() == {"type": "error", "detail": "Invalid image data"}
+    assert not routes.active_streams
+
+
+def test_streams_beyond_the_cap_are_closed_with_1013(client, monkeypatch):
+    monkeypatch.setattr(routes, "MAX_FACE_MESH_STREAMS", 1)
+    with client.websocket_connect("/api/ws/face-mesh") as first:
+        first.send_bytes(jpeg())
+        first.receive_json()
+        with client.websocket_connect("/api/ws/face-mesh") as second:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                second.receive_json()
+            assert closed.value.code == 1013
+    # The slot is free again once the first stream is gone
+    with client.websocket_connect("/api/ws/face-mesh") as third:
+        third.send_bytes(jpeg())
+        assert third.receive_json()["type"] == "result"
+
+
+def test_failed_landmarker_creation_closes_and_releases_the_stream(client, monkeypatch):
+    def fail(options):
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(routes.FaceLandmarker, "create_from_options", fail)
+    with client.websocket_connect("/api/ws/face-mesh") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 1011
+    assert not routes.active_streams
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from services.recommendation.catalog_index import CatalogIndex
+from services.recommendation.facet_counts import FACET_FIELDS, FacetIndex, popcount_rows
+
+
+def expected_counts(data, filters, field):
+    mask = np.ones(len(data), dtype=bool)
+    for name, values in filters.items():
+        if values and name != field:
+            mask &= data[name].isin(values).to_numpy()
+    return data.loc[mask, field].value_counts().to_dict()
+
+
+def test_counts_match_pandas(styles):
+    facets = FacetIndex.from_index(CatalogIndex(styles))
+    for filters in [{}, {"gender": ["Men"]}, {"gender": ["Women"], "baseColour": ["Black", "Blue"], "usage": ["Casual"]},
+                    {"subCategory": ["Topwear"], "usage": []}]:
+        total, counts = facets.counts(filters)
+        mask = np.logical_and.reduce([styles[f].isin(v) for f, v in filters.items() if v] + [np.ones(len(styles), bool)])
+        assert total == int(mask.sum())
+        assert set(counts) == set(FACET_FIELDS)
+        for field in FACET_FIELDS:
+            nonzero = {value: n for value, n in counts[field].items() if n}
+            assert nonzero == expected_counts(styles, filters, field)
+
+
+def test_a_fields_own_filter_does_not_narrow_its_counts(styles):
+    facets = FacetIndex.from_index(CatalogIndex(styles))
+    _, unfiltered = facets.counts({})
+    total, counts = facets.counts({"baseColour": ["Black"]})
+    assert counts["baseColour"] == unfiltered["baseColour"]
+    assert total == unfiltered["baseColour"]["Black"]
+
+
+def test_unknown_values_match_nothing_and_tail_bits_stay_clear():
+    # 70 rows: the second word only has 6 valid bits
+    data = pd.DataFrame({"id": np.arange(70), "gender": ["Men", "Women"] * 35, "usage": ["Casual"] * 70})
+    facets = FacetIndex.from_index(CatalogIndex(data, fields=["gender", "usage"]))
+    assert int(popcount_rows(facets.all_rows)) == 70
+    assert facets.counts({})[0] == 70
+    total, counts = facets.counts({"gender": ["Nope"]}, fields=["usage", "gender", "missing"])
+    assert total == 0
+    assert counts == {"usage": {"Casual": 0}, "gender": {"Men": 35, "Women": 35}}
@@ -0,0 +1,46 @@
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from services.ai.frame_codec import decode_image, encode_data_url, encode_jpeg
+
+
+@pytest.fixture
+def image():
+    # Smooth, so JPEG round trips stay close to the original
+    gradient = np.linspace(0, 255, 64, dtype=np.uint8)
+    return np.dstack([np.tile(gradient, (48, 1))] * 3)
+
+
+def test_decodes_raw_jpeg_bytes(image):
+    decoded = decode_image(encode_jpeg(image))
+    assert decoded.shape == image.shape
+    assert np.abs(decoded.astype(int) - image).max() < 8
+
+
+def test_decodes_png_losslessly(image):
+    png = cv2.imencode(".png", image)[1].tobytes()
+    assert np.array_equal(decode_image(png), image)
+    assert np.array_equal(decode_image(bytearray(png)), image)
+    assert np.array_equal(decode_image(memoryview(png)), image)
+
+
+def test_decodes_base64_with_and_without_data_url_prefix(image):
+    png = cv2.imencode(".png", image)[1].tobytes()
+    encoded = base64.b64encode(png).decode("ascii")
+    assert np.array_equal(decode_image(encoded), image)
+    assert np.array_equal(decode_image("data:image/png;base64," + encoded), image)
+
+
+@pytest.mark.parametrize("data", [b"", "", b"not an image", "data:image/jpeg;base64,!!!", "bm90IGFuIGltYWdl"])
+def test_invalid_data_is_none(data):
+    assert decode_image(data) is None
+
+
+def test_data_url_holds_the_jpeg(image):
+    url = encode_data_url(image, quality=80)
+    assert url.startswith("data:image/jpeg;base64,")
+    assert base64.b64decode(url.split(",", 1)[1]) == encode_jpeg(image, quality=80)
+    assert decode_image(url).shape == image.shape
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from services.recommendation.image_lookup import PLACEHOLDER_IMAGE_URL, ImageLookup
+
+IMAGES = pd.DataFrame({
+    "filename": ["15970.jpg", "39386.jpg", "59263.jpg", "21379.jpg", "bad.jpg", "00012.jpg", "15970.jpg", "53759.jpg"],
+    "link": ["http://img.test/a/15970.jpg", "http://img.test/a/39386.jpg", "http://img.test/b/59263.jpg",
+             "http://img.test/a/21379.jpg", "http://img.test/a/bad.jpg", "http://img.test/a/12.jpg",
+             "http://img.test/a/duplicate.jpg", None],
+})
+
+
+def test_get_many_resolves_in_request_order():
+    lookup = ImageLookup.from_frame(IMAGES)
+    assert lookup.get_many([59263, 15970, 39386]) == [
+        "http://img.test/b/59263.jpg", "http://img.test/a/15970.jpg", "http://img.test/a/39386.jpg"]
+    assert lookup.get("21379") == "http://img.test/a/21379.jpg"
+    assert lookup.get_many([]) == []
+
+
+def test_first_row_wins_for_duplicated_ids():
+    assert ImageLookup.from_frame(IMAGES).get(15970) == "http://img.test/a/15970.jpg"
+
+
+def test_unknown_and_malformed_rows_get_the_placeholder():
+    lookup = ImageLookup.from_frame(IMAGES)
+    # "00012.jpg" is not how an id is formatted, and 53759 has no link
+    assert len(lookup) == 4
+    assert lookup.get_many([12, 53759, 1, 99999999]) == [PLACEHOLDER_IMAGE_URL] * 4
+    assert ImageLookup.from_frame(IMAGES, placeholder="none.png").get(7) == "none.png"
+
+
+def test_empty_lookup():
+    lookup = ImageLookup.from_frame(IMAGES.iloc[:0])
+    assert lookup.get_many([1, 2]) == [PLACEHOLDER_IMAGE_URL] * 2
+
+
+def test_with_links_adds_and_replaces():
+    lookup = ImageLookup.from_frame(IMAGES).with_links([39386, 5], ["http://img.test/new/39386.jpg", "http://img.test/5.jpg"])
+    assert lookup.get_many([39386, 5, 59263]) == [
+        "http://img.test/new/39386.jpg", "http://img.test/5.jpg", "http://img.test/b/59263.jpg"]
+    assert len(lookup) == 5
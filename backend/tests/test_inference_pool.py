@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.ai.inference_pool import InferencePool, InferencePoolFull
+
+
+class Model:
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_every_worker_uses_its_own_instance():
+    models = []
+
+    def factory():
+        models.append(Model())
+        return models[-1]
+
+    pool = InferencePool("test", factory, workers=3, queue_depth=0)
+    assert len(models) == 3
+
+    async def main():
+        return await asyncio.gather(*[pool.run(lambda model: (model, threading.current_thread())) for _ in range(30)])
+
+    for model, thread in asyncio.run(main()):
+        assert model.thread is thread is not threading.main_thread()
+    pool.close()
+
+
+def test_full_queue_is_turned_away():
+    release = threading.Event()
+    pool = InferencePool("busy", Model, workers=1, queue_depth=1)
+
+    async def main():
+        running = asyncio.ensure_future(pool.run(lambda model: release.wait(5)))
+        await asyncio.sleep(0.05)  # taken by the worker
+        queued = asyncio.ensure_future(pool.run(lambda model: "queued"))
+        await asyncio.sleep(0)  # holds the one queue slot
+        with pytest.raises(InferencePoolFull, match="busy pool is busy"):
+            await pool.run(lambda model: "turned away")
+        release.set()
+        return await running, await queued
+
+    assert asyncio.run(main()) == (True, "queued")
+    pool.close()
+
+
+def test_factory_errors_fail_at_construction():
+    def factory():
+        raise RuntimeError("no model file")
+
+    with pytest.raises(RuntimeError, match="no model file"):
+        InferencePool("broken", factory, workers=2)
+
+
+def test_inline_pool_runs_on_the_caller():
+    pool = InferencePool("inline", Model, workers=0)
+    model = asyncio.run(pool.run(lambda model: model))
+    assert model.thread is threading.current_thread()
@@ -0,0 +1,148 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.recommendation.pool_cache import PoolCache, pool_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_ignores_usage_order_and_blank_footwear():
+    assert pool_cache_key(["Navy Blue"], "Men", ["Formal", "Casual"], None) == \
+        pool_cache_key(["Navy Blue"], "Men", ["Casual", "Formal", "Casual"], "Any")
+
+
+def test_hits_skip_compute():
+    cache = PoolCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: calls.append(1) or "pools") == "pools"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PoolCache(maxsize=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.get_or_compute("a", lambda: "recomputed") == 1
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PoolCache(ttl_seconds=10, clock=clock)
+    cache.get_or_compute("k", lambda: "old")
+    clock.now = 11
+    assert cache.get_or_compute("k", lambda: "new") == "new"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_failed_compute_is_not_cached():
+    cache = PoolCache()
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        cache.get_or_compute("k", fail)
+    except ValueError:
+        pass
+    assert cache.get_or_compute("k", lambda: "pools") == "pools"
+
+
+def slow_compute_in_background(cache, key, result="slow"):
+    """(thread, release): a thread stuck computing `key` until `release` is set"""
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def run():
+        try:
+            cache.get_or_compute(key, slow)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait(5)
+    return thread, release
+
+
+def wait_for_waiters(cache, count):
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_compute():
+    cache = PoolCache()
+    background, release = slow_compute_in_background(cache, "k")
+    waiter = ThreadPoolExecutor(1).submit(cache.get_or_compute, "k", lambda: "recomputed")
+    wait_for_waiters(cache, 1)
+    release.set()
+    assert waiter.result(5) == "slow"
+    background.join()
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["coalesced"] == 1 and stats["hit_rate"] == 0.5
+
+
+def test_async_miss_awaits_the_compute_without_blocking_the_loop():
+    cache = PoolCache()
+    background, release = slow_compute_in_background(cache, "k")
+
+    async def main():
+        waiting = asyncio.ensure_future(cache.get_or_compute_async("k", lambda: "recomputed"))
+        await asyncio.sleep(0.05)
+        # The loop kept running while the other thread computed
+        assert not waiting.done()
+        release.set()
+        return await waiting
+
+    assert asyncio.run(main()) == "slow"
+    background.join()
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_waiters_get_the_compute_error():
+    cache = PoolCache()
+    background, release = slow_compute_in_background(cache, "k", ValueError("boom"))
+    waiter = ThreadPoolExecutor(1).submit(cache.get_or_compute, "k", lambda: "recomputed")
+
+    async def main():
+        waiting = asyncio.ensure_future(cache.get_or_compute_async("k", lambda: "recomputed"))
+        await asyncio.sleep(0)
+        wait_for_waiters(cache, 2)
+        release.set()
+        with pytest.raises(ValueError):
+            await waiting
+
+    asyncio.run(main())
+    with pytest.raises(ValueError):
+        waiter.result(5)
+    background.join()
+    assert cache.get_or_compute("k", lambda: "pools") == "pools"
+
+
+def test_async_hits_and_misses():
+    cache = PoolCache()
+    assert asyncio.run(cache.get_or_compute_async("k", lambda: "pools")) == "pools"
+    assert asyncio.run(cache.get_or_compute_async("k", lambda: "recomputed")) == "pools"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
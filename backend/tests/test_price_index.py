@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from services.recommendation.catalog_index import OutfitPools
+from services.recommendation.price_index import (
+    PRICE_RANGE, PriceSegment, demo_prices, price_segments, split_segments, to_cents, with_prices,
+)
+
+
+def test_to_cents_rounds():
+    assert to_cents(19.99) == 1999
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents(0) == 0
+
+
+def test_demo_prices_are_stable_and_in_range():
+    ids = np.arange(1000)
+    prices = demo_prices(ids)
+    assert np.array_equal(prices, demo_prices(ids))
+    assert prices.min() >= PRICE_RANGE[0] and prices.max() <= PRICE_RANGE[1]
+
+
+def test_with_prices_keeps_given_prices():
+    data = pd.DataFrame({"id": [1, 2, 3], "price": [10.0, None, "bad"]})
+    prices = with_prices(data)["price"].to_numpy()
+    assert prices[0] == 10.0
+    assert np.array_equal(prices[1:], demo_prices(np.array([2, 3])))
+
+
+def test_segments_are_sorted_by_price():
+    prices = np.array([5.0, 1.0, 3.0, 2.0, 4.0])
+    pools = OutfitPools(np.array([0, 1, 2]), np.array([3, 4]), np.array([], dtype=np.int64))
+    segments = price_segments(pools, prices)
+    assert segments.topwear.positions.tolist() == [1, 2, 0]
+    assert segments.topwear.cents.tolist() == [100, 300, 500]
+    assert len(segments.footwear.positions) == 0
+    positions, cents = split_segments(segments)
+    assert positions.bottomwear.tolist() == [3, 4]
+    assert cents.bottomwear.tolist() == [200, 400]
+
+
+def test_within_is_inclusive():
+    segment = PriceSegment.from_pool(np.arange(5), np.array([1.0, 2.0, 3.0, 4.0, 5.0]))
+    assert segment.within(2, 4).positions.tolist() == [1, 2, 3]
+    assert segment.within(min_price=4.5).positions.tolist() == [4]
+    assert segment.within(max_price=1).positions.tolist() == [0]
+    assert segment.within().positions.tolist() == [0, 1, 2, 3, 4]
+    assert len(segment.within(6, None).positions) == 0
@@ -0,0 +1,207 @@
+import json
+import time
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api.routes import recommendation_routes_correct as routes
+
+QUERY = {
+    "skin_tone_hex": "#8D5524",
+    "gender": "Men",
+    "usage": "Casual",
+    "footwear_preference": "Any",
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    assert routes.catalog_store.current is not None
+    return TestClient(app)
+
+
+def test_recommend_returns_outfits(client):
+    response = client.get("/api/recommend", params={**QUERY, "count": 3, "seed": 1})
+    assert response.status_code == 200
+    outfits = response.json()["outfits"]
+    assert len(outfits) == 3
+    assert len({(o["topwear"]["id"], o["bottomwear"]["id"], o["footwear"]["id"]) for o in outfits}) == 3
+
+
+@pytest.mark.parametrize("diversity", [0, 0.3, 1])
+def test_recommend_with_impossible_budget_is_404(client, diversity):
+    response = client.get("/api/recommend", params={**QUERY, "budget": 0.01, "diversity": diversity})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "No outfit fits the budget"
+
+
+def test_paginated_recommend_with_impossible_budget_is_404(client):
+    response = client.get("/api/recommend", params={**QUERY, "budget": 0.01, "paginate": True})
+    assert response.status_code == 404
+
+
+def test_batch_item_with_impossible_budget_is_404(client):
+    request = {**QUERY, "usage": ["Casual"]}
+    response = client.post("/api/recommend/batch", json={"requests": [request, {**request, "budget": 0.01}]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["status_code"] == 200 and results[0]["outfits"]
+    assert results[1]["status_code"] == 404
+
+
+def test_no_candidates_is_404(client):
+    response = client.get("/api/recommend", params={**QUERY, "usage": "Nothing"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Not enough items found for the specified criteria"
+
+
+def batch_requests():
+    men = {**QUERY, "usage": ["Casual"]}
+    women = {**men, "gender": "Women", "skin_tone_hex": "#F3DAD6"}
+    # Interleaved, so grouping by candidate pool reorders the work
+    return [{**men, "seed": 1}, {**women, "seed": 2}, {**men, "seed": 3, "count": 2},
+            {**men, "usage": ["Nothing"]}, {**women, "seed": 4}]
+
+
+def test_batch_results_keep_the_request_order(client):
+    requests = batch_requests()
+    response = client.post("/api/recommend/batch", json={"requests": requests})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == list(range(len(requests)))
+    assert [r["status_code"] for r in results] == [200, 200, 200, 404, 200]
+    assert len(results[2]["outfits"]) == 2
+    # Every item is what /recommend answers for the same request
+    single = client.get("/api/recommend", params={**QUERY, "usage": "Casual", "seed": 3, "count": 2}).json()
+    assert results[2]["outfits"] == single["outfits"]
+
+
+def test_batch_stream_is_ndjson(client):
+    requests = batch_requests()
+    response = client.post("/api/recommend/batch", params={"stream": True}, json={"requests": requests})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == list(range(len(requests)))
+    ordered = client.post("/api/recommend/batch", json={"requests": requests}).json()["results"]
+    assert sorted(lines, key=lambda line: line["index"]) == ordered
+
+
+def test_batch_runs_off_the_event_loop(client, monkeypatch):
+    iter_batch_results = routes.iter_batch_results
+
+    def off_the_loop(catalog, requests):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return iter_batch_results(catalog, requests)
+
+    monkeypatch.setattr(routes, "iter_batch_results", off_the_loop)
+    assert client.post("/api/recommend/batch", json={"requests": batch_requests()}).status_code == 200
+
+
+@pytest.mark.parametrize("size", [0, routes.MAX_BATCH_SIZE + 1])
+def test_batch_size_is_limited(client, size):
+    request = {**QUERY, "usage": ["Casual"]}
+    assert client.post("/api/recommend/batch", json={"requests": [request] * size}).status_code == 422
+
+
+def test_more_with_unknown_cursor_is_410(client):
+    for cursor in ["nope:3", "garbage"]:
+        response = client.get("/api/recommend/more", params={"cursor": cursor})
+        assert response.status_code == 410
+
+
+def test_more_pages_never_repeat_an_outfit(client):
+    def outfit_ids(page):
+        return [(o["topwear"]["id"], o["bottomwear"]["id"], o["footwear"]["id"]) for o in page["outfits"]]
+
+    page = client.get("/api/recommend", params={**QUERY, "count": 4, "seed": 1, "paginate": True}).json()
+    served = outfit_ids(page)
+    for _ in range(3):
+        page = client.get("/api/recommend/more", params={"cursor": page["next_cursor"], "count": 4}).json()
+        assert [o["id"] for o in page["outfits"]] == list(range(len(served) + 1, len(served) + 5))
+        served += outfit_ids(page)
+    assert len(set(served)) == len(served) == 16
+
+
+def test_reload_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.delenv("CATALOG_ADMIN_TOKEN", raising=False)
+    assert client.post("/api/catalog/reload").status_code == 403
+    monkeypatch.setenv("CATALOG_ADMIN_TOKEN", "secret")
+    assert client.post("/api/catalog/reload").status_code == 401
+    assert client.post("/api/catalog/reload", headers={"X-Admin-Token": "secreT"}).status_code == 401
+
+    version = routes.catalog_store.version
+    response = client.post("/api/catalog/reload", params={"full": False}, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 202 and response.json()["started"]
+    deadline = time.monotonic() + 30
+    while client.get("/api/catalog/status").json()["reloading"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # No delta files: nothing to apply, the catalog stays as it was
+    assert routes.catalog_store.version == version
+
+
+def test_search_applies_the_filters(client):
+    response = client.get("/api/catalog/search", params={"q": "blue shirt", "gender": "Women", "limit": 15})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert 0 < len(results) <= 15
+    assert all(r["gender"] == "Women" for r in results)
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert client.get("/api/catalog/search", params={"q": ""}).status_code == 422
+
+
+def test_similar_items_exclude_the_item(client):
+    item_id = int(routes.current_catalog().data["id"].iloc[0])
+    response = client.get(f"/api/catalog/{item_id}/similar", params={"limit": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["item"]["id"] == item_id
+    assert len(body["results"]) == 5 and item_id not in [r["id"] for r in body["results"]]
+    distances = [r["distance"] for r in body["results"]]
+    assert distances == sorted(distances)
+    assert client.get("/api/catalog/-1/similar").status_code == 404
+
+
+def test_complete_look_needs_a_topwear_item(client):
+    data = routes.current_catalog().data
+    top_id = int(data.loc[data["subCategory"] == "Topwear", "id"].iloc[0])
+    response = client.get(f"/api/catalog/{top_id}/complete-look", params={"limit": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["item"]["id"] == top_id
+    assert 0 < len(body["bottomwear"]) <= 5 and 0 < len(body["footwear"]) <= 5
+    assert all(match["gender"] == body["item"]["gender"] for match in body["bottomwear"] + body["footwear"])
+
+    shoe_id = int(data.loc[data["masterCategory"] == "Footwear", "id"].iloc[0])
+    assert client.get(f"/api/catalog/{shoe_id}/complete-look").status_code == 400
+    assert client.get("/api/catalog/-1/complete-look").status_code == 404
+
+
+def test_facets_count_the_other_options(client):
+    data = routes.current_catalog().data
+    body = client.get("/api/catalog/facets", params={"gender": "Men", "usage": "Casual,Formal"}).json()
+    men = data[data["gender"] == "Men"]
+    assert body["total"] == int(men["usage"].isin(["Casual", "Formal"]).sum())
+    # Usage counts ignore the usage filter itself
+    assert body["facets"]["usage"]["Sports"] == int((men["usage"] == "Sports").sum())
+    assert sum(body["facets"]["baseColour"].values()) == body["total"]
+
+
+def test_min_price_above_max_price_is_400(client):
+    response = client.get("/api/recommend", params={**QUERY, "min_price": 50, "max_price": 20})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"count": 0}, {"budget": 0}, {"min_price": -1}, {"max_price": -1}])
+def test_invalid_parameters_are_422(client, params):
+    assert client.get("/api/recommend", params={**QUERY, **params}).status_code == 422
+
+
+@pytest.mark.parametrize("diversity", [-0.1, 2])
+def test_diversity_out_of_range_is_422(client, diversity):
+    assert client.get("/api/recommend", params={**QUERY, "diversity": diversity}).status_code == 422
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from services.recommendation.recommendation_sessions import RecommendationSessions, make_cursor, parse_cursor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def triples(n):
+    return np.arange(n * 3).reshape(n, 3)
+
+
+def test_cursor_round_trip():
+    assert parse_cursor(make_cursor("abc:def", 12)) == ("abc:def", 12)
+    for cursor in ["", "abc", "abc:", ":3", "abc:-1", "abc:x"]:
+        with pytest.raises(KeyError):
+            parse_cursor(cursor)
+
+
+def test_pages_walk_the_session_once():
+    sessions = RecommendationSessions()
+    session_id = sessions.create(triples(7), catalog_version=3)
+    cursor, served = make_cursor(session_id, 0), []
+    while cursor is not None:
+        page, offset, cursor = sessions.page(cursor, 3, catalog_version=3)
+        assert offset == len(served)
+        served.extend(map(tuple, page.tolist()))
+    assert served == list(map(tuple, triples(7).tolist()))
+    # A cursor past the end gives an empty last page
+    page, _, cursor = sessions.page(make_cursor(session_id, 9), 3, catalog_version=3)
+    assert len(page) == 0 and cursor is None
+
+
+def test_expired_session_is_gone():
+    clock = FakeClock()
+    sessions = RecommendationSessions(ttl_seconds=10, clock=clock)
+    session_id = sessions.create(triples(5))
+    clock.now = 9
+    # Every page extends the session's lifetime
+    sessions.page(make_cursor(session_id, 0), 1)
+    clock.now = 18
+    sessions.page(make_cursor(session_id, 1), 1)
+    clock.now = 28
+    with pytest.raises(KeyError):
+        sessions.page(make_cursor(session_id, 2), 1)
+    assert sessions.stats()["sessions"] == 0
+
+
+def test_session_from_another_catalog_version_is_gone():
+    sessions = RecommendationSessions()
+    session_id = sessions.create(triples(5), catalog_version=1)
+    with pytest.raises(KeyError):
+        sessions.page(make_cursor(session_id, 0), 2, catalog_version=2)
+    with pytest.raises(KeyError):
+        sessions.page(make_cursor(session_id, 0), 2, catalog_version=1)
+
+
+def test_least_recently_used_session_is_dropped():
+    sessions = RecommendationSessions(maxsize=2)
+    first, second = sessions.create(triples(2)), sessions.create(triples(2))
+    sessions.page(make_cursor(first, 0), 1)
+    sessions.create(triples(2))
+    sessions.page(make_cursor(first, 0), 1)
+    with pytest.raises(KeyError):
+        sessions.page(make_cursor(second, 0), 1)
+    assert sessions.stats()["stored_bytes"] == 2 * 2 * 3 * 4
@@ -0,0 +1,122 @@
+import base64
+import email
+import email.policy
+import json
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("mediapipe")
+from backend.api.routes import segmentation_routes as routes
+from services.ai.inference_pool import InferencePoolFull
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api")
+    return TestClient(app)
+
+
+@pytest.fixture
+def face(monkeypatch):
+    """Landmarks every frame is detected with"""
+    landmarks = np.random.default_rng(1).uniform(0.2, 0.8, (478, 3)).astype(np.float32)
+    monkeypatch.setattr(routes, "detect_face", lambda landmarker, image, timestamp_ms=None: landmarks)
+    return landmarks
+
+
+@pytest.fixture(scope="module")
+def frame():
+    image = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def form_parts(response):
+    """{field name: body} of a multipart/form-data response"""
+    header = f"Content-Type: {response.headers['content-type']}\r\n\r\n".encode()
+    message = email.message_from_bytes(header + response.content, policy=email.policy.HTTP)
+    return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+            for part in message.iter_parts()}
+
+
+def test_invalid_image_is_400(client):
+    assert client.post("/api/process-frame", json={"frame": "bm90IGFuIGltYWdl"}).status_code == 400
+    response = client.post("/api/process-frame/binary", content=b"not an image", headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 400
+
+
+def test_binary_frame_errors(client, frame):
+    assert client.post("/api/process-frame/binary", content=frame,
+                       headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.post("/api/process-frame/binary", content=b"",
+                       headers={"Content-Type": "image/jpeg"}).status_code == 400
+    assert client.post("/api/process-frame/binary", files={"other": ("f.jpg", frame, "image/jpeg")}).status_code == 400
+
+
+def test_binary_frame_without_a_face(client, frame):
+    for request in [{"content": frame, "headers": {"Content-Type": "image/jpeg"}},
+                    {"files": {"frame": ("f.jpg", frame, "image/jpeg")}}]:
+        response = client.post("/api/process-frame/binary", **request)
+        assert response.status_code == 200
+        parts = form_parts(response)
+        assert list(parts) == ["result"]
+        assert json.loads(parts["result"]) == {"hasFace": False, "fps": 0}
+
+
+def test_frame_without_a_face(client, frame):
+    response = client.post("/api/process-frame", params={"mode": "all"},
+                           json={"frame": base64.b64encode(frame).decode("ascii")})
+    assert response.status_code == 200
+    assert response.json() == {"hasFace": False, "fps": 0, "landmarks": [], "boundingBox": None,
+                               "meshVisualization": "", "segmentedFace": ""}
+
+
+def test_unknown_mode_is_422(client, frame):
+    response = client.post("/api/process-frame", params={"mode": "everything"},
+                           json={"frame": base64.b64encode(frame).decode("ascii")})
+    assert response.status_code == 422
+    response = client.post("/api/process-frame/binary", params={"dtype": "float64"}, content=frame,
+                           headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 422
+
+
+def test_landmarks_mode_skips_the_images(client, frame, face):
+    response = client.post("/api/process-frame", params={"mode": "landmarks"},
+                           json={"frame": base64.b64encode(frame).decode("ascii")})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"hasFace", "fps", "landmarks", "boundingBox"}
+    assert np.allclose(body["landmarks"], face.ravel(), atol=1e-4)
+    assert body["boundingBox"]["x"] == pytest.approx(face[:, 0].min())
+    assert body["boundingBox"]["height"] == pytest.approx(face[:, 1].max() - face[:, 1].min())
+
+    body = client.post("/api/process-frame", json={"frame": base64.b64encode(frame).decode("ascii")}).json()
+    assert set(body) == {"hasFace", "fps", "meshVisualization", "segmentedFace"}
+    assert body["meshVisualization"].startswith("data:image/jpeg;base64,")
+
+
+@pytest.mark.parametrize("dtype, numpy_dtype", [("float32", "<f4"), ("float16", "<f2")])
+def test_binary_landmarks_are_packed_as_dtype(client, frame, face, dtype, numpy_dtype):
+    response = client.post("/api/process-frame/binary", params={"mode": "all", "dtype": dtype}, content=frame,
+                           headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 200
+    parts = form_parts(response)
+    assert set(parts) == {"result", "landmarks", "meshVisualization", "segmentedFace"}
+    assert json.loads(parts["result"])["hasFace"]
+    landmarks = np.frombuffer(parts["landmarks"], dtype=numpy_dtype).reshape(478, 3)
+    assert np.allclose(landmarks, face, atol=1e-3)
+    assert parts["segmentedFace"][:2] == b"\xff\xd8"
+
+
+def test_busy_pool_is_503(client, frame, monkeypatch):
+    async def full(fn, *args):
+        raise InferencePoolFull("The face-landmarker pool is busy, try again shortly")
+
+    monkeypatch.setattr(routes.face_landmarkers, "run", full)
+    response = client.post("/api/process-frame/binary", content=frame, headers={"Content-Type": "image/jpeg"})
+    assert response.status_code == 503
+    assert response.json()["detail"] == "The face-landmarker pool is busy, try again shortly"
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from services.recommendation.similar_items import ATTRIBUTE_WEIGHTS, SimilarItemIndex
+
+
+def brute_force_distances(index, position):
+    vectors = index.vectors[index.row_profiles]
+    return ((vectors - vectors[position]) ** 2).sum(axis=1)
+
+
+def test_similar_matches_brute_force(styles):
+    index = SimilarItemIndex.from_catalog(styles)
+    for position in [0, 17, 1234, len(styles) - 1]:
+        rows, distances = index.similar(position, 25)
+        assert len(rows) == 25 and position not in rows
+        assert np.all(np.diff(distances) >= 0)
+        expected = np.delete(brute_force_distances(index, position), position)
+        assert np.allclose(distances, np.sort(expected)[:25], atol=1e-3)
+        assert np.allclose(distances, brute_force_distances(index, position)[rows], atol=1e-3)
+
+
+def test_identical_items_come_first_in_catalog_order():
+    data = pd.DataFrame({
+        "id": [10, 11, 12, 13, 14],
+        "masterCategory": ["Apparel"] * 4 + ["Footwear"],
+        "subCategory": ["Topwear"] * 4 + ["Shoes"],
+        "articleType": ["Tshirts", "Tshirts", "Shirts", "Tshirts", "Casual Shoes"],
+        "gender": ["Men"] * 5,
+        "usage": ["Casual"] * 5,
+        "season": ["Summer"] * 5,
+        "baseColour": ["Blue", "Navy Blue", "Blue", "Blue", "Blue"],
+    })
+    index = SimilarItemIndex.from_catalog(data)
+    assert len(index.vectors) == 4  # rows 0 and 3 share a profile
+
+    rows, distances = index.similar(0, 4)
+    assert rows.tolist() == [3, 1, 2, 4]
+    assert distances[0] == 0
+    # A nearby color costs less than another article type, which costs less than another category
+    assert 0 < distances[1] < ATTRIBUTE_WEIGHTS["articleType"] <= distances[2] < distances[3]
+
+
+def test_missing_values_and_short_catalogs():
+    data = pd.DataFrame({
+        "id": [1, 2, 3],
+        "articleType": ["Tshirts", None, "Tshirts"],
+        "baseColour": ["Red", "Red", None],
+    })
+    index = SimilarItemIndex.from_catalog(data)
+    rows, distances = index.similar(0, 10)
+    assert sorted(rows.tolist()) == [1, 2]
+    assert np.all(np.isfinite(distances))
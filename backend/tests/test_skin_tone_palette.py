@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from services.recommendation.skin_tone_palette import (
+    DEFAULT_SKIN_TONE, SKIN_TONE_COLOR_MAPPING, SkinTonePalette, parse_hex, rgb_to_lab,
+)
+
+
+def test_parse_hex():
+    assert parse_hex("#8D5524") == parse_hex("8d5524") == (0x8D, 0x55, 0x24)
+    assert parse_hex(" #fff ") == (255, 255, 255)
+    for value in ["#12345", "red", "", None]:
+        with pytest.raises(ValueError):
+            parse_hex(value)
+
+
+def test_rgb_to_lab_reference_values():
+    assert np.allclose(rgb_to_lab([255, 255, 255]), [100, 0, 0], atol=0.01)
+    assert np.allclose(rgb_to_lab([0, 0, 0]), [0, 0, 0], atol=0.01)
+    # sRGB red, from the CIE reference tables
+    assert np.allclose(rgb_to_lab([255, 0, 0]), [53.24, 80.09, 67.20], atol=0.05)
+
+
+def test_palette_hexes_match_exactly():
+    palette = SkinTonePalette()
+    for key, colors in SKIN_TONE_COLOR_MAPPING.items():
+        assert palette.nearest(key.lower()) == (key,)
+        assert palette.colors_for(key) == colors
+
+
+def test_other_hexes_get_the_nearest_palette():
+    palette = SkinTonePalette()
+    for key in SKIN_TONE_COLOR_MAPPING:
+        r, g, b = parse_hex(key)
+        assert palette.nearest(f"#{r + 3:02X}{g - 2:02X}{b + 1:02X}")[0] == key
+    assert palette.nearest("#FAF1F2") == ("#FBF2F3",)
+    assert palette.nearest("#3A2F27") == ("#373028",)
+
+
+def test_invalid_hex_falls_back_to_the_default():
+    assert SkinTonePalette().nearest("not a color") == (DEFAULT_SKIN_TONE,)
+
+
+def test_equally_near_palettes_are_blended():
+    palette = SkinTonePalette({"#000000": ["Black", "Grey"], "#FFFFFF": ["White", "Grey", "Beige"]})
+    # Mid grey is about as far from black as from white in Lab, not in RGB
+    keys = palette.nearest("#777777")
+    assert set(keys) == {"#000000", "#FFFFFF"}
+    colors = palette.colors_for("#777777")
+    assert colors[:len(palette.mapping[keys[0]])] == palette.mapping[keys[0]]
+    assert sorted(colors) == ["Beige", "Black", "Grey", "White"]
+    assert palette.nearest("#101010") == ("#000000",)
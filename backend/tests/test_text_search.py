@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_catalog import write_catalog
+from services.recommendation import text_search
+from services.recommendation.catalog_snapshot import build_snapshot, load_snapshot, load_snapshot_search
+from services.recommendation.text_search import TextSearchIndex, stem, tokenize
+
+ITEMS = pd.DataFrame({
+    "productDisplayName": ["Blue Linen Shirt", "Blue Denim Jeans", "White Linen Shirt", "Red Dress",
+                           "Blue Blue Shirt", "Black Formal Shoes"],
+    "articleType": ["Shirts", "Jeans", "Shirts", "Dresses", "Shirts", "Formal Shoes"],
+    "baseColour": ["Blue", "Blue", "White", "Red", "Blue", None],
+})
+
+
+def test_tokenize_folds_case_and_plurals():
+    assert tokenize("Men's Blue T-Shirts") == ["men", "s", "blue", "t", "shirt"]
+    assert [stem(w) for w in ["dresses", "accessories", "dress", "watches", "bag"]] == \
+        ["dress", "accessory", "dress", "watch", "bag"]
+
+
+def test_more_and_rarer_words_rank_higher():
+    index = TextSearchIndex.from_catalog(ITEMS)
+    rows, scores = index.search("blue linen shirt", limit=10)
+    assert rows[0] == 0
+    assert set(rows.tolist()) == {0, 1, 2, 4}
+    assert np.all(np.diff(scores) <= 0)
+    # "linen" is rarer than "blue", so the white linen shirt beats the blue jeans
+    assert rows.tolist().index(2) < rows.tolist().index(1)
+
+
+def test_no_known_words_match_nothing():
+    index = TextSearchIndex.from_catalog(ITEMS)
+    assert len(index.search("purple", limit=5)[0]) == 0
+    assert len(index.search("", limit=5)[0]) == 0
+    assert len(index.search("shirt", limit=0)[0]) == 0
+
+
+def test_keep_filters_before_ranking():
+    index = TextSearchIndex.from_catalog(ITEMS)
+    rows, _ = index.search("shirt", limit=2, keep=lambda rows: rows != 0)
+    assert 0 not in rows.tolist() and len(rows) == 2
+
+
+@pytest.mark.parametrize("query", ["men", "blue shirt", "casual blue men tshirt", "navy formal shoe", "watch"])
+def test_pruned_search_matches_exhaustive_scoring(styles, monkeypatch, query):
+    index = TextSearchIndex.from_catalog(styles)
+    term_ids = sorted({index.vocab[t] for t in tokenize(query) if t in index.vocab})
+    lists = [(int(index.offsets[t]), int(index.offsets[t + 1])) for t in term_ids]
+    every_row = np.arange(len(styles))
+    _, expected_scores = index._top(every_row, index._score(every_row, lists), 10, None)
+    expected_scores = expected_scores[expected_scores > 0]
+
+    # Force the threshold-pruned scan with a shallow seed
+    monkeypatch.setattr(text_search, "EXHAUSTIVE_POSTINGS", 0)
+    monkeypatch.setattr(text_search, "SEED_POSTINGS", 8)
+    rows, scores = index.search(query, limit=10)
+    # Same top scores; which of several equally scored rows fill the last places may differ
+    assert np.allclose(scores, expected_scores)
+    assert len(set(rows.tolist())) == len(rows)
+    order = np.argsort(rows)
+    assert np.allclose(index._score(rows[order], lists), scores[order])
+
+
+def test_snapshot_search_matches_the_built_index(tmp_path):
+    styles, images = write_catalog(str(tmp_path), 500, seed=4)
+    snapshot_dir = build_snapshot(styles, images, str(tmp_path / "snapshot"))
+    data, _ = load_snapshot(snapshot_dir)
+    built, attached = TextSearchIndex.from_catalog(data), load_snapshot_search(snapshot_dir)
+    for query in ["blue shirt", "women casual shoes"]:
+        for a, b in zip(built.search(query, limit=500), attached.search(query, limit=500)):
+            assert np.array_equal(a, b)
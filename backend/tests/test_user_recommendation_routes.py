@@ -0,0 +1,151 @@
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import auth
+from backend.api.routes import recommendation_routes_correct as routes
+from backend.api.routes import user_recommendation_routes as user_routes
+from backend.models.database import User, UserRecommendation
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(routes.router, prefix="/api")
+    app.include_router(user_routes.router, prefix="/api")
+    return TestClient(app)
+
+
+def sign_up(client, occasion="CASUAL"):
+    """Headers and id of a new user with a skin tone and preferences saved"""
+    email = f"{uuid.uuid4().hex}@example.com"
+    token = client.post("/api/auth/register", json={"email": email, "password": "secret"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.post("/api/auth/skin-tone", json={"skin_tone": "#8D5524"}, headers=headers).status_code == 200
+    save_preferences(client, headers, occasion)
+    db = auth.SessionLocal()
+    try:
+        return headers, db.query(User).filter(User.email == email).one().id
+    finally:
+        db.close()
+
+
+def save_preferences(client, headers, occasion):
+    preferences = {"gender": "male", "occasion": occasion, "footwear": "Any"}
+    assert client.post("/api/auth/preferences", json=preferences, headers=headers).status_code == 200
+
+
+def stored_row(user_id):
+    db = auth.SessionLocal()
+    try:
+        return db.get(UserRecommendation, user_id)
+    finally:
+        db.close()
+
+
+def outfit_ids(response):
+    return [[o["topwear"]["id"], o["bottomwear"]["id"], o["footwear"]["id"]] for o in response.json()["outfits"]]
+
+
+def wait_for_reload():
+    deadline = time.monotonic() + 30
+    while routes.catalog_store.stats()["reloading"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_saving_preferences_materializes_outfits(client):
+    assert user_routes.materialize_recommendations in auth.preference_listeners
+    headers, user_id = sign_up(client)
+    row = stored_row(user_id)
+    assert row is not None and 0 < len(row.outfits) <= user_routes.MATERIALIZED_OUTFITS
+    assert '"usage": ["Casual"]' in row.inputs
+    ids = set(routes.current_catalog().data["id"].tolist())
+    assert all(len(outfit) == 3 and set(outfit) <= ids for outfit in row.outfits)
+
+    # New preferences replace the stored outfits
+    save_preferences(client, headers, "FORMAL")
+    assert '"usage": ["Formal"]' in stored_row(user_id).inputs
+
+
+def test_me_serves_the_stored_outfits(client):
+    headers, user_id = sign_up(client)
+    row = stored_row(user_id)
+    # Store them in another order: a live ranking would not return exactly these
+    reordered = row.outfits[::-1]
+    user_routes.store_recommendations(user_id, json.loads(row.inputs), reordered)
+
+    response = client.get("/api/recommend/me", params={"count": 3}, headers=headers)
+    assert response.status_code == 200
+    assert outfit_ids(response) == reordered[:3]
+
+
+def test_me_pages_through_the_stored_outfits(client):
+    headers, user_id = sign_up(client)
+    stored = stored_row(user_id).outfits
+    first = client.get("/api/recommend/me", params={"count": 2, "paginate": True}, headers=headers)
+    assert outfit_ids(first) == stored[:2]
+    cursor = first.json()["next_cursor"]
+    assert cursor is not None
+
+    second = client.get("/api/recommend/more", params={"cursor": cursor, "count": 2})
+    assert second.status_code == 200
+    assert outfit_ids(second) == stored[2:4]
+
+
+def test_outdated_outfits_are_ranked_again(client):
+    headers, user_id = sign_up(client)
+    row = stored_row(user_id)
+    inputs = json.loads(row.inputs)
+    user_routes.store_recommendations(user_id, inputs, row.outfits[::-1])
+
+    db = auth.SessionLocal()
+    try:
+        db.get(UserRecommendation, user_id).computed_at = datetime.utcnow() - user_routes.MAX_AGE - timedelta(minutes=1)
+        db.commit()
+    finally:
+        db.close()
+    response = client.get("/api/recommend/me", params={"count": 3}, headers=headers)
+    assert response.status_code == 200
+    # Ranked live, and stored again by the background task
+    assert outfit_ids(response) != row.outfits[::-1][:3]
+    assert datetime.utcnow() - stored_row(user_id).computed_at < timedelta(minutes=1)
+
+
+def test_outfits_with_removed_items_are_ranked_again(client, tmp_path, monkeypatch):
+    headers, user_id = sign_up(client)
+    stored = stored_row(user_id).outfits
+    removed = stored[0][1]
+    version = routes.catalog_store.version
+
+    # A new catalog version without one of the stored bottomwear items
+    (tmp_path / "0001.csv").write_text(f"op,id\nremove,{removed}\n")
+    monkeypatch.setattr(routes.catalog_store, "delta_dir", str(tmp_path))
+    try:
+        assert routes.catalog_store.reload(full=False)
+        wait_for_reload()
+        assert routes.catalog_store.version == version + 1
+
+        response = client.get("/api/recommend/me", params={"count": 20}, headers=headers)
+        assert response.status_code == 200
+        served = outfit_ids(response)
+        assert served and all(removed not in outfit for outfit in served)
+        assert all(removed not in outfit for outfit in stored_row(user_id).outfits)
+    finally:
+        os.remove(tmp_path / "0001.csv")
+        routes.catalog_store.reload(full=True)
+        wait_for_reload()
+
+
+def test_me_needs_saved_preferences(client):
+    email = f"{uuid.uuid4().hex}@example.com"
+    token = client.post("/api/auth/register", json={"email": email, "password": "secret"}).json()["access_token"]
+    response = client.get("/api/recommend/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+    assert client.get("/api/recommend/me").status_code == 401
@@ -1,8 +1,9 @@
 "use client";
 
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
 import { useAuth } from "../context/AuthContext";
 import { useRouter } from "next/navigation";
+import { getCatalogFacets } from "../services/api";
 
 const GENDERS = [
   { value: "male", label: "Male" },
@@ -39,6 +40,32 @@ export default function PreferencesForm() {
   const [footwear, setFootwear] = useState(user?.preferences?.footwear || "");
   const [error, setError] = useState("");
   const [success, setSuccess] = useState(false);
+  // Catalog item counts per option; options counted 0 cannot be recommended
+  const [usageCounts, setUsageCounts] = useState<Record<string, number>>({});
+  const [footwearCounts, setFootwearCounts] = useState<Record<string, number>>(
+    {}
+  );
+
+  useEffect(() => {
+    if (!gender) return;
+    const catalogGender = gender === "male" ? "Men" : "Women";
+    // Occasion narrows clothing only; footwear is matched on gender, like the recommender does
+    Promise.all([
+      getCatalogFacets({
+        gender: catalogGender,
+        subCategory: ["Topwear", "Bottomwear"],
+      }),
+      getCatalogFacets({ gender: catalogGender, masterCategory: "Footwear" }),
+    ])
+      .then(([clothing, shoes]) => {
+        setUsageCounts(clothing.facets.usage || {});
+        setFootwearCounts(shoes.facets.articleType || {});
+      })
+      .catch((err) => console.error("Error fetching catalog facets:", err));
+  }, [gender]);
+
+  const isEmptyOption = (counts: Record<string, number>, value: string) =>
+    Object.keys(counts).length > 0 && !counts[value];
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -107,7 +134,11 @@ export default function PreferencesForm() {
           >
             <option value="">Select Occasion</option>
             {OCCASIONS.map((o) => (
-              <option key={o.value} value={o.value}>
+              <option
+                key={o.value}
+                value={o.value}
+                disabled={isEmptyOption(usageCounts, o.label)}
+              >
                 {o.label}
               </option>
             ))}
@@ -126,7 +157,13 @@ export default function PreferencesForm() {
           >
             <option value="">Select Footwear</option>
             {FOOTWEAR_OPTIONS.map((f) => (
-              <option key={f.value} value={f.value}>
+              <option
+                key={f.value}
+                value={f.value}
+                disabled={
+                  f.value !== "Any" && isEmptyOption(footwearCounts, f.value)
+                }
+              >
                 {f.label}
               </option>
             ))}
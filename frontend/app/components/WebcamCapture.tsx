@@ -1,5 +1,5 @@
 import React, { useEffect, useRef, useState } from 'react';
-import { processFrame } from '../services/api';
+import { connectFaceMeshStream, processFrameBinary } from '../services/api';
 import { ProcessedFrame } from '../types';
 
 interface WebcamCaptureProps {
@@ -52,9 +52,18 @@ const WebcamCapture: React.FC<WebcamCaptureProps> = ({ onFrameProcessed, isCaptu
         if (!isCapturing || !videoRef.current || !canvasRef.current) return;
     
         let animationFrameId: number;
-    
+
+        // Frames go over the face mesh WebSocket, which pushes results back as
+        // they are ready; while it is down, each frame is posted instead
+        let streamClosed = false;
+        const faceMeshStream = connectFaceMeshStream(onFrameProcessed, () => {
+          streamClosed = true;
+        });
+
         const captureAndProcessFrame = async () => {
-          if (!processingRef.current && videoRef.current && canvasRef.current) {
+          // While the socket connects or the server still has frames in hand, camera frames are skipped
+          const readyToSend = streamClosed || faceMeshStream.isReady();
+          if (!processingRef.current && readyToSend && videoRef.current && canvasRef.current) {
             processingRef.current = true;
             
             const video = videoRef.current;
@@ -70,32 +79,42 @@ const WebcamCapture: React.FC<WebcamCaptureProps> = ({ onFrameProcessed, isCaptu
             // Draw current video frame to canvas
             context.drawImage(video, 0, 0, canvas.width, canvas.height);
             
-            // Convert canvas to base64 image
-            const frameData = canvas.toDataURL('image/jpeg', 0.8);
-            
             // Send to backend for processing
             try {
-              // Log the request being sent
-              console.log('Sending frame to backend for processing...');
-              
-              // For debugging, let's add a fallback mock response
-              let result;
-              try {
-                result = await processFrame(frameData);
-                console.log('Received response from backend:', result);
-              } catch (apiError) {
-                console.error('Backend API error:', apiError);
-                // If API fails, use a mock response to see if the UI is working
-                console.log('Using mock response for debugging');
-                result = {
-                  meshVisualization: frameData, // Use the camera feed as placeholder
-                  segmentedFace: frameData,
-                  hasFace: true,
-                  fps: 30
-                };
+              // Encode the canvas as a JPEG blob, posted as raw bytes
+              const frameBlob = await new Promise<Blob | null>((resolve) =>
+                canvas.toBlob(resolve, 'image/jpeg', 0.8)
+              );
+              if (!frameBlob) {
+                throw new Error('Could not encode the webcam frame');
               }
+
+              if (!streamClosed) {
+                faceMeshStream.sendFrame(frameBlob);
+              } else {
+                // Log the request being sent
+                console.log('Sending frame to backend for processing...');
               
-              onFrameProcessed(result);
+                // For debugging, let's add a fallback mock response
+                let result;
+                try {
+                  result = await processFrameBinary(frameBlob);
+                  console.log('Received response from backend:', result);
+                } catch (apiError) {
+                  console.error('Backend API error:', apiError);
+                  // If API fails, use a mock response to see if the UI is working
+                  console.log('Using mock response for debugging');
+                  const frameData = canvas.toDataURL('image/jpeg', 0.8);
+                  result = {
+                    meshVisualization: frameData, // Use the camera feed as placeholder
+                    segmentedFace: frameData,
+                    hasFace: true,
+                    fps: 30
+                  };
+                }
+              
+                onFrameProcessed(result);
+              }
             } catch (err) {
               console.error('Error in frame processing flow:', err);
             } finally {
@@ -113,6 +132,7 @@ const WebcamCapture: React.FC<WebcamCaptureProps> = ({ onFrameProcessed, isCaptu
           if (animationFrameId) {
             cancelAnimationFrame(animationFrameId);
           }
+          faceMeshStream.close();
         };
       }, [isCapturing, onFrameProcessed]);
 
@@ -1,18 +1,11 @@
 "use client";
 // src/app/page.tsx
 import React, { useEffect, useState, useRef } from "react";
-import { getOutfitRecommendations } from "../services/api";
+import { getMyRecommendations } from "../services/api";
 import { useAuth } from "../context/AuthContext";
 import { ArrowBigRightDash } from "lucide-react";
 import { useRouter } from "next/navigation";
 
-function toCamelCase(str: string) {
-  return str
-    .split("_")
-    .map((word) => word.charAt(0).toUpperCase() + word.slice(1).toLowerCase())
-    .join(" ");
-}
-
 export default function RecommendationSystem() {
   const { token, user } = useAuth();
   const [isLoading, setIsLoading] = useState(false);
@@ -31,33 +24,9 @@ export default function RecommendationSystem() {
       setIsLoading(true);
       setError(null);
 
-      // Always fetch the latest preference from the backend
-      const response = await fetch(
-        "http://localhost:8000/api/auth/preferences",
-        {
-          headers: { Authorization: `Bearer ${token}` },
-        }
-      );
-      if (!response.ok) {
-        setError("Failed to fetch preferences");
-        setIsLoading(false);
-        return;
-      }
-      const prefs = await response.json();
-      if (!prefs || prefs.length === 0) {
-        setError("No preferences found.");
-        setIsLoading(false);
-        return;
-      }
-      const latest = prefs[0];
-      const preferences = {
-        skin_tone_hex: user.skin_tone || "",
-        gender: latest.gender === "male" ? "Men" : "Women",
-        usage: [toCamelCase(latest.occasion || "")],
-        footwear_preference: latest.footwear || "",
-      };
+      // Ranked by the backend when the preferences and skin tone were saved
       try {
-        const data = await getOutfitRecommendations(preferences);
+        const data = await getMyRecommendations(token);
         setRecommendations(data.outfits || []);
         setSelectedOutfit(
           data.outfits && data.outfits.length > 0 ? data.outfits[0] : null
@@ -1,7 +1,12 @@
 import {
+  CatalogSearchResponse,
+  CompleteLookResponse,
+  FaceLandmarksFrame,
+  FacetCountsResponse,
   ProcessedFrame,
   RecommendationRequest,
   RecommendationResponse,
+  SimilarItemsResponse,
 } from "../types";
 
 // Define types for the body measurement responses
@@ -59,6 +64,191 @@ export const processFrame = async (
   }
 };
 
+// Object URLs of the last two binary frame results; older ones are released
+// as new frames arrive, leaving the shown result valid for a frame longer
+let frameObjectUrls: string[][] = [];
+
+const partObjectUrl = (form: FormData, name: string): string => {
+  const part = form.get(name);
+  return part instanceof Blob ? URL.createObjectURL(part) : "";
+};
+
+// Same as processFrame, but posts the raw JPEG and gets the images back as
+// binary parts of a multipart response instead of base64 in JSON
+export const processFrameBinary = async (
+  frame: Blob
+): Promise<ProcessedFrame> => {
+  try {
+    const response = await fetch(
+      `http://localhost:8000/api/process-frame/binary`,
+      {
+        method: "POST",
+        headers: {
+          "Content-Type": frame.type || "image/jpeg",
+        },
+        body: frame,
+      }
+    );
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! Status: ${response.status}`);
+    }
+
+    const form = await response.formData();
+    const result = JSON.parse(form.get("result") as string);
+    const meshVisualization = partObjectUrl(form, "meshVisualization");
+    const segmentedFace = partObjectUrl(form, "segmentedFace");
+
+    frameObjectUrls.push([meshVisualization, segmentedFace].filter(Boolean));
+    while (frameObjectUrls.length > 2) {
+      frameObjectUrls.shift()!.forEach((url) => URL.revokeObjectURL(url));
+    }
+
+    return {
+      meshVisualization,
+      segmentedFace,
+      hasFace: result.hasFace,
+      fps: result.fps,
+    };
+  } catch (error) {
+    console.error("Error processing frame:", error);
+    return {
+      meshVisualization: "",
+      segmentedFace: "",
+      hasFace: false,
+      fps: 0,
+    };
+  }
+};
+
+/**
+ * Only the face landmarks of a frame, packed as float32, for clients that
+ * draw the mesh themselves: a few KB per frame instead of two JPEGs
+ */
+export const processFrameLandmarks = async (
+  frame: Blob
+): Promise<FaceLandmarksFrame> => {
+  const response = await fetch(
+    `http://localhost:8000/api/process-frame/binary?mode=landmarks&dtype=float32`,
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": frame.type || "image/jpeg",
+      },
+      body: frame,
+    }
+  );
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! Status: ${response.status}`);
+  }
+
+  const form = await response.formData();
+  const result = JSON.parse(form.get("result") as string);
+  const part = form.get("landmarks");
+  return {
+    hasFace: result.hasFace,
+    fps: result.fps,
+    landmarks:
+      part instanceof Blob
+        ? new Float32Array(await part.arrayBuffer())
+        : new Float32Array(0),
+    boundingBox: result.boundingBox ?? null,
+  };
+};
+
+export interface FaceMeshStream {
+  // Whether a frame sent now would be taken: the socket is open and the
+  // server has few enough frames in hand
+  isReady: () => boolean;
+  sendFrame: (frame: Blob) => void;
+  close: () => void;
+}
+
+// Frames sent but neither answered nor dropped by the server yet, beyond
+// which the stream skips camera frames instead of queueing them
+const MAX_PENDING_STREAM_FRAMES = 2;
+
+/**
+ * Opens the /ws/face-mesh stream. Each result arrives as a JSON message
+ * naming its images, followed by one binary JPEG message per image; the
+ * images are handed over as object URLs, released two results later like
+ * processFrameBinary's. onClose also runs when the stream cannot connect.
+ */
+export const connectFaceMeshStream = (
+  onResult: (frame: ProcessedFrame) => void,
+  onClose?: () => void
+): FaceMeshStream => {
+  const socket = new WebSocket(`ws://localhost:8000/api/ws/face-mesh`);
+  socket.binaryType = "blob";
+
+  let sent = 0;
+  let answered = 0;
+  let dropped = 0;
+  let pending: { result: any; names: string[]; urls: Record<string, string> } | null = null;
+  const objectUrls: string[][] = [];
+
+  const deliver = () => {
+    const { result, urls } = pending!;
+    pending = null;
+    objectUrls.push(Object.values(urls));
+    while (objectUrls.length > 2) {
+      objectUrls.shift()!.forEach((url) => URL.revokeObjectURL(url));
+    }
+    onResult({
+      meshVisualization: urls.meshVisualization || "",
+      segmentedFace: urls.segmentedFace || "",
+      hasFace: result.hasFace,
+      fps: result.fps,
+    });
+  };
+
+  socket.onmessage = (event) => {
+    if (typeof event.data !== "string") {
+      // The next image of the result being assembled
+      if (!pending) return;
+      const name = pending.names[Object.keys(pending.urls).length];
+      pending.urls[name] = URL.createObjectURL(event.data as Blob);
+      if (Object.keys(pending.urls).length === pending.names.length) deliver();
+      return;
+    }
+
+    const message = JSON.parse(event.data);
+    answered += 1;
+    if (message.type === "error") {
+      console.error("Face mesh stream error:", message.detail);
+      return;
+    }
+    dropped = message.droppedFrames;
+    pending = { result: message, names: message.images, urls: {} };
+    if (!message.images.length) deliver();
+  };
+
+  socket.onerror = (event) => {
+    console.error("Face mesh stream error:", event);
+  };
+
+  // The last results' URLs outlive the socket: the page analyzes the last
+  // segmented face after capture stops
+  socket.onclose = () => {
+    onClose?.();
+  };
+
+  const isReady = () =>
+    socket.readyState === WebSocket.OPEN &&
+    sent - answered - dropped < MAX_PENDING_STREAM_FRAMES;
+
+  return {
+    isReady,
+    sendFrame: (frame: Blob) => {
+      if (!isReady()) return;
+      socket.send(frame);
+      sent += 1;
+    },
+    close: () => socket.close(),
+  };
+};
+
 export const analyzeSkinToneUpload = async (imageFile: File): Promise<any> => {
   try {
     const formData = new FormData();
@@ -94,6 +284,11 @@ export async function getOutfitRecommendations(
       usage: preferences.usage.join(","),
       footwear_preference: preferences.footwear_preference,
     });
+    for (const key of ["min_price", "max_price", "budget"] as const) {
+      if (preferences[key] !== undefined) {
+        params.set(key, String(preferences[key]));
+      }
+    }
     const response = await fetch(
       `http://localhost:8000/api/recommend?${params.toString()}`
     );
@@ -113,6 +308,147 @@ export async function getOutfitRecommendations(
   }
 }
 
+/**
+ * The signed-in user's outfits, precomputed when they saved their
+ * preferences and skin tone
+ */
+export async function getMyRecommendations(
+  token: string,
+  count = 3
+): Promise<RecommendationResponse> {
+  const params = new URLSearchParams({ count: String(count) });
+  const response = await fetch(
+    `http://localhost:8000/api/recommend/me?${params.toString()}`,
+    { headers: { Authorization: `Bearer ${token}` } }
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
+/**
+ * Fetches the next page of a paginated recommendation session
+ */
+export async function getMoreOutfitRecommendations(
+  cursor: string,
+  count = 3
+): Promise<RecommendationResponse> {
+  const params = new URLSearchParams({ cursor, count: String(count) });
+  const response = await fetch(
+    `http://localhost:8000/api/recommend/more?${params.toString()}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
+/**
+ * Free-text catalog search, optionally narrowed by gender and usage
+ */
+export async function searchCatalog(
+  query: string,
+  filters: { gender?: string; usage?: string[]; limit?: number } = {}
+): Promise<CatalogSearchResponse> {
+  const params = new URLSearchParams({ q: query });
+  if (filters.gender) params.set("gender", filters.gender);
+  if (filters.usage?.length) params.set("usage", filters.usage.join(","));
+  if (filters.limit) params.set("limit", String(filters.limit));
+  const response = await fetch(
+    `http://localhost:8000/api/catalog/search?${params.toString()}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
+/**
+ * Closest substitutes for a catalog item, e.g. to swap into an outfit card
+ */
+export async function getSimilarItems(
+  itemId: number,
+  limit = 10
+): Promise<SimilarItemsResponse> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  const response = await fetch(
+    `http://localhost:8000/api/catalog/${itemId}/similar?${params.toString()}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
+/**
+ * Bottomwear and footwear that complete the look of a chosen topwear item
+ */
+export async function getCompleteLook(
+  itemId: number,
+  limit = 10
+): Promise<CompleteLookResponse> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  const response = await fetch(
+    `http://localhost:8000/api/catalog/${itemId}/complete-look?${params.toString()}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
+/**
+ * Live item counts per color, usage, article type and subcategory for a
+ * partial filter, e.g. to disable options that would match nothing
+ */
+export async function getCatalogFacets(
+  filters: Record<string, string | string[]>
+): Promise<FacetCountsResponse> {
+  const params = new URLSearchParams();
+  for (const [field, value] of Object.entries(filters)) {
+    const values = Array.isArray(value) ? value : [value];
+    if (values.length && values.every(Boolean)) params.set(field, values.join(","));
+  }
+  const response = await fetch(
+    `http://localhost:8000/api/catalog/facets?${params.toString()}`
+  );
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      errorData.detail || `API request failed with status ${response.status}`
+    );
+  }
+
+  return await response.json();
+}
+
 /**
  * Fetches mock outfit recommendations (for testing)
  */
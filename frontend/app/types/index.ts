@@ -14,6 +14,22 @@ export interface ProcessedFrame {
     fps:number;
 }
 
+// Normalized box around the face, as fractions of the frame
+export interface BoundingBox {
+    x: number;
+    y: number;
+    width: number;
+    height: number;
+}
+
+// /process-frame?mode=landmarks: the face's 478 landmarks without the rendered images
+export interface FaceLandmarksFrame {
+    hasFace: boolean;
+    fps: number;
+    landmarks: Float32Array; // normalized x, y, z per landmark, back to back
+    boundingBox: BoundingBox | null;
+}
+
 export interface BodyFrame {
     hasPose: boolean;
     visualizationImage?: string;
@@ -69,6 +85,50 @@ export interface Outfit {
 
 export interface RecommendationResponse {
   outfits: Outfit[];
+  next_cursor?: string | null;
+}
+
+export interface CatalogItem {
+  id: number;
+  display_name: string;
+  article_type: string;
+  color: string;
+  gender: string;
+  usage: string;
+  image_url: string;
+}
+
+export interface CatalogSearchResult extends CatalogItem {
+  score: number;
+}
+
+export interface CatalogSearchResponse {
+  query: string;
+  results: CatalogSearchResult[];
+}
+
+export interface SimilarItem extends CatalogItem {
+  distance: number;
+}
+
+export interface SimilarItemsResponse {
+  item: CatalogItem;
+  results: SimilarItem[];
+}
+
+export interface LookMatch extends CatalogItem {
+  score: number;
+}
+
+export interface CompleteLookResponse {
+  item: CatalogItem;
+  bottomwear: LookMatch[];
+  footwear: LookMatch[];
+}
+
+export interface FacetCountsResponse {
+  total: number;
+  facets: Record<string, Record<string, number>>;
 }
 
 export interface RecommendationRequest {
@@ -76,6 +136,9 @@ export interface RecommendationRequest {
   gender: string;
   usage: string[];
   footwear_preference: string;
+  min_price?: number;
+  max_price?: number;
+  budget?: number;
 }
 
 export interface SkinTone {